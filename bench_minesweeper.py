@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+扫雷游戏性能测试脚本
+
+默认运行核心热点路径的基准测试套件 (init_board、place_mines、reveal_cell、
+flood_fill、reveal_all_mines、render)，覆盖多种大小和地雷密度，使用固定种子。
+结果写入JSON文件，并与保存的基准线比较，发现性能回退时返回非零退出码。
+
+使用 --report 运行对比报告：迭代式与递归洪水填充、纯Python与NumPy生成、
+求解器速度、录像加载、命令行增量显示、启动器启动用时以及紧凑游戏板。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+from minesweeper import Minesweeper
+from minesweeper_compact import CompactBoard
+from minesweeper_solver import MinesweeperSolver
+from minesweeper_engine import HAS_NUMPY, generate_board
+from minesweeper_replay import GameRecorder, ReplayReader
+from minesweeper_terminal import CLEAR_SCREEN, TerminalRenderer
+
+# 基准测试的游戏板大小和地雷密度
+SUITE_SIZES = [(16, 30), (100, 100), (300, 300)]
+SUITE_DENSITIES = [0.05, 0.2]
+SUITE_SEED = 2024
+
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_BASELINE = "bench_baseline.json"
+
+
+def recursive_flood_fill(game: Minesweeper, row: int, col: int):
+    """原递归实现，仅用于性能对比"""
+    for dr in [-1, 0, 1]:
+        for dc in [-1, 0, 1]:
+            new_row, new_col = row + dr, col + dc
+
+            if (0 <= new_row < game.rows and
+                0 <= new_col < game.cols and
+                game.revealed[new_row][new_col] == ' '):
+
+                game.revealed[new_row][new_col] = str(game.board[new_row][new_col])
+                game.cells_to_reveal -= 1
+
+                if game.board[new_row][new_col] == 0:
+                    recursive_flood_fill(game, new_row, new_col)
+
+
+def bench_flood_fill(rows: int, cols: int, recursive: bool = False) -> str:
+    """在无地雷的游戏板上揭开(0, 0)，返回揭开速度描述"""
+    game = Minesweeper(rows, cols, 0)
+    reveal = (lambda: recursive_flood_fill(game, 0, 0)) if recursive else (lambda: game.reveal_cell(0, 0))
+
+    start = time.perf_counter()
+    try:
+        reveal()
+    except RecursionError:
+        return "RecursionError"
+    elapsed = time.perf_counter() - start
+
+    cells = rows * cols - game.cells_to_reveal
+    return f"{cells / elapsed:>12,.0f} 格/秒"
+
+
+def bench_generate_board(rows: int, cols: int, density: float, use_numpy: bool) -> str:
+    """生成指定密度的游戏板，返回耗时描述"""
+    if use_numpy and not HAS_NUMPY:
+        return "未安装NumPy"
+
+    mines = int(rows * cols * density)
+    start = time.perf_counter()
+    generate_board(rows, cols, mines, random.Random(0), use_numpy=use_numpy)
+    elapsed = time.perf_counter() - start
+    return f"{elapsed * 1000:>10.1f} ms"
+
+
+def bench_compact_board(rows: int, cols: int, mines: int) -> str:
+    """生成紧凑游戏板并统计剩余格子，返回耗时和内存描述"""
+    start = time.perf_counter()
+    board = CompactBoard.generate(rows, cols, mines, random.Random(0))
+    generated = time.perf_counter() - start
+
+    start = time.perf_counter()
+    board.cells_to_reveal()
+    board.flag_count()
+    counted = time.perf_counter() - start
+
+    return (f"生成 {generated:.2f} s, 计数 {counted * 1000:.1f} ms, "
+            f"占用 {board.nbytes() / 1e6:.1f} MB")
+
+
+def bench_solver(games: int = 50) -> str:
+    """用求解器玩高级游戏(16x30, 99个地雷)，从空格开始，需要猜测时随机揭开，返回求解速度描述"""
+    moves = 0
+    elapsed = 0.0
+
+    for seed in range(games):
+        game = Minesweeper(16, 30, 99, seed=seed)
+        solver = MinesweeperSolver(game)
+        rng = random.Random(seed)
+
+        # 模拟首次点击安全: 从一个空格开始
+        zeros = [(i, j) for i in range(game.rows) for j in range(game.cols)
+                 if game.board[i][j] == 0]
+        game.reveal_cell(*rng.choice(zeros))
+
+        while True:
+
+            start = time.perf_counter()
+            moves += solver.solve().moves
+            elapsed += time.perf_counter() - start
+
+            if game.game_over:
+                break
+            hidden = [(i, j) for i in range(game.rows) for j in range(game.cols)
+                      if game.revealed[i][j] == ' ']
+            game.reveal_cell(*rng.choice(hidden))
+
+    return f"{moves / elapsed:,.0f} 步/秒, 平均 {elapsed / moves * 1e6:.1f} µs/步"
+
+
+def bench_replay(moves: int = 100000) -> str:
+    """录制一局多步游戏(反复标记/取消标记)，返回加载和跳转耗时描述"""
+    game = Minesweeper(300, 300, 9000, seed=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.msr")
+        with GameRecorder(path, game) as recorder:
+            game.recorder = recorder
+            for i in range(moves):
+                cell = i // 2
+                game.toggle_flag(cell % 300, (cell // 300) % 300)
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        replay = ReplayReader(path)
+        loaded = time.perf_counter() - start
+
+        rng = random.Random(0)
+        replay.state_at(0)  # 解压游戏板
+        start = time.perf_counter()
+        for _ in range(20):
+            replay.state_at(rng.randrange(moves + 1))
+        seek = (time.perf_counter() - start) / 20
+        replay.close()
+
+    return (f"{moves} 步, 文件 {size / 1e6:.1f} MB, 加载 {loaded * 1000:.2f} ms, "
+            f"跳转 {seek * 1000:.1f} ms/次")
+
+
+class _ByteSink:
+    """只统计写入字节数的输出流，模拟终端"""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data: str):
+        self.bytes += len(data.encode('utf-8'))
+
+    def flush(self):
+        pass
+
+
+def bench_terminal(rows: int, cols: int, mines: int, moves: int = 100) -> str:
+    """
+    按相同顺序揭开安全格子，比较每步的输出字节数和帧耗时
+
+    旧方式: os.system 清屏 (输出重定向到 /dev/null，字节数按清屏序列计算) 后输出完整文本；
+    新方式: TerminalRenderer 只输出变化的格子
+    """
+    order = Minesweeper(rows, cols, mines, seed=0)
+    safe = [(i, j) for i in range(rows) for j in range(cols) if order.board[i][j] != -1]
+    random.Random(0).shuffle(safe)
+    clear = 'clear > /dev/null' if os.name == 'posix' else 'cls > nul'
+
+    def play(draw: Callable[[Minesweeper, list], int]) -> Tuple[float, float]:
+        game = Minesweeper(rows, cols, mines, seed=0)
+        frames = total_bytes = 0
+        elapsed = 0.0
+        changes = None
+        for cell in safe:
+            if frames == moves or game.game_over:
+                break
+            if game.revealed[cell[0]][cell[1]] != ' ':
+                continue
+            start = time.perf_counter()
+            total_bytes += draw(game, changes)
+            elapsed += time.perf_counter() - start
+            frames += 1
+            changes = game.reveal(*cell)
+        return total_bytes / frames, elapsed / frames
+
+    def full_redraw(game: Minesweeper, changes) -> int:
+        os.system(clear)
+        sink = _ByteSink()
+        sink.write(game.render() + "\n")
+        return sink.bytes + len(CLEAR_SCREEN)
+
+    renderers = {}
+
+    def incremental(game: Minesweeper, changes) -> int:
+        if id(game) not in renderers:
+            # 假设终端足够高，能放下整个游戏板
+            renderers[id(game)] = TerminalRenderer(game, _ByteSink(), height=rows + 100)
+        renderer = renderers[id(game)]
+        renderer.draw(changes)
+        written, renderer.out.bytes = renderer.out.bytes, 0
+        return written
+
+    old_bytes, old_time = play(full_redraw)
+    new_bytes, new_time = play(incremental)
+    return (f"旧 {old_bytes:>9,.0f} 字节/帧 {old_time * 1000:>7.3f} ms/帧, "
+            f"新 {new_bytes:>7,.0f} 字节/帧 {new_time * 1000:>7.3f} ms/帧")
+
+
+def bench_startup(mode: str, runs: int = 5) -> str:
+    """
+    测量启动器在进程内启动指定版本到第一帧的用时 (启动器 --startup-time 的输出)，
+    以及旧方式为该版本再启动一个解释器并导入游戏模块的用时
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    launcher = os.path.join(here, 'minesweeper_launcher.py')
+    module = 'minesweeper_gui' if mode == 'gui' else 'minesweeper'
+
+    in_process = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, launcher, '--mode', mode, '--startup-time'],
+                                capture_output=True, text=True, cwd=here)
+        if result.returncode != 0:
+            return "无法启动: " + (result.stderr.strip().splitlines() or ["未知错误"])[-1]
+        in_process.append(float(result.stderr.split(':')[-1].split()[0]))
+
+    second_interpreter = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {module}'], check=True, cwd=here)
+        second_interpreter.append((time.perf_counter() - start) * 1000)
+
+    return (f"进程内 {min(in_process):.1f} ms, "
+            f"旧方式另启解释器 {min(second_interpreter):.1f} ms (另加启动器等待 500 ms)")
+
+
+def _largest_opening(game: Minesweeper) -> Tuple[int, int]:
+    """找到展开面积最大的空格，用于测试大面积展开"""
+    best, best_size = (0, 0), -1
+    scratch = Minesweeper(game.rows, game.cols, 0)
+    scratch.board = game.board
+
+    for i, row in enumerate(game.board):
+        for j, value in enumerate(row):
+            if value != 0 or scratch.revealed[i][j] != ' ':
+                continue
+            before = scratch.cells_to_reveal
+            scratch.reveal_cell(i, j)
+            size = before - scratch.cells_to_reveal
+            if size > best_size:
+                best, best_size = (i, j), size
+
+    return best
+
+
+def _suite_cases(rows: int, cols: int, density: float) -> Dict[str, Callable[[], Callable[[], object]]]:
+    """
+    生成一组基准测试用例
+
+    每个用例是一个准备函数，返回要计时的函数；准备工作不计入耗时。
+    """
+    mines = int(rows * cols * density)
+
+    def new_game() -> Minesweeper:
+        return Minesweeper(rows, cols, mines, seed=SUITE_SEED)
+
+    # 相同种子的游戏板相同，最大空白区域只需计算一次
+    opening = _largest_opening(new_game())
+
+    def init_board():
+        game = new_game()
+        return game.init_board
+
+    def place_mines():
+        rng = random.Random(SUITE_SEED)
+        return lambda: generate_board(rows, cols, mines, rng, avoid=(rows // 2, cols // 2))
+
+    def reveal_cell():
+        game = new_game()
+        return lambda: game.reveal_cell(*opening)
+
+    def flood_fill():
+        game = new_game()
+        row, col = opening
+        game.revealed[row][col] = '0'
+        game.engine.visible[row * cols + col] = 0
+        return lambda: game.flood_fill(row, col)
+
+    def reveal_all_mines():
+        game = new_game()
+        return game.reveal_all_mines
+
+    def render():
+        game = new_game()
+        game.reveal_cell(*opening)
+        return game.render
+
+    return {
+        'init_board': init_board,
+        'place_mines': place_mines,
+        'reveal_cell': reveal_cell,
+        'flood_fill': flood_fill,
+        'reveal_all_mines': reveal_all_mines,
+        'render': render,
+    }
+
+
+def run_suite(repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    运行基准测试套件
+
+    Returns:
+        {用例名: {'min': 最短耗时(秒), 'median': 中位耗时(秒), 'repeat': 次数}}
+    """
+    results = {}
+
+    for rows, cols in SUITE_SIZES:
+        for density in SUITE_DENSITIES:
+            for name, setup in _suite_cases(rows, cols, density).items():
+                timings = []
+                for _ in range(repeat):
+                    func = setup()
+                    start = time.perf_counter()
+                    func()
+                    timings.append(time.perf_counter() - start)
+
+                key = f"{name}/{rows}x{cols}/{density:.2f}"
+                results[key] = {
+                    'min': min(timings),
+                    'median': statistics.median(timings),
+                    'repeat': repeat,
+                }
+                print(f"{key:<36} {min(timings) * 1000:>10.3f} ms")
+
+    return results
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, float]],
+                          baseline: Dict[str, Dict[str, float]],
+                          threshold: float, min_delta: float = 1e-4) -> List[str]:
+    """
+    与基准线比较最短耗时
+
+    Args:
+        results: 本次结果
+        baseline: 基准线结果
+        threshold: 允许变慢的比例
+        min_delta: 忽略小于该值(秒)的差异，避免极短用例的计时抖动
+
+    Returns:
+        性能回退超过阈值的用例描述列表
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]['min']
+        after = result['min']
+        ratio = after / before if before > 0 else 1.0
+        if ratio > 1 + threshold and after - before > min_delta:
+            regressions.append(f"{key}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def report():
+    """运行对比报告"""
+    print("洪水填充性能测试 (无地雷游戏板，揭开整个区域)")
+    print(f"{'大小':>12} {'递归':>18} {'迭代':>18}")
+
+    for rows, cols in [(20, 20), (30, 30), (100, 100), (300, 300), (1000, 1000)]:
+        recursive = bench_flood_fill(rows, cols, recursive=True)
+        iterative = bench_flood_fill(rows, cols)
+        print(f"{f'{rows}x{cols}':>12} {recursive:>18} {iterative:>18}")
+
+    for density in (0.2, 0.99):
+        print(f"\n游戏板生成性能测试 (地雷密度{density:.0%})")
+        print(f"{'大小':>12} {'纯Python':>16} {'NumPy':>16}")
+
+        for rows, cols in [(16, 30), (100, 100), (1000, 1000)]:
+            python_time = bench_generate_board(rows, cols, density, use_numpy=False)
+            numpy_time = bench_generate_board(rows, cols, density, use_numpy=True)
+            print(f"{f'{rows}x{cols}':>12} {python_time:>16} {numpy_time:>16}")
+
+    print("\n求解器性能测试 (高级 16x30, 99个地雷)")
+    print(bench_solver())
+
+    print("\n录像加载和跳转 (300x300)")
+    print(bench_replay())
+
+    print("\n命令行显示 (每步揭开一个安全格子，旧方式为清屏后完整输出)")
+    for rows, cols, mines in [(16, 30, 99), (100, 100, 2000)]:
+        print(f"{f'{rows}x{cols}':>12} {bench_terminal(rows, cols, mines)}")
+
+    print("\n启动器启动用时 (到第一帧)")
+    for mode in ('cli', 'gui'):
+        print(f"{mode:>12} {bench_startup(mode)}")
+
+    print("\n紧凑游戏板 (地雷密度1%)")
+    for rows, cols in [(1000, 1000), (10000, 10000)]:
+        result = bench_compact_board(rows, cols, rows * cols // 100)
+        print(f"{f'{rows}x{cols}':>12} {result}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="扫雷游戏性能测试")
+    parser.add_argument('--report', action='store_true', help="运行对比报告而不是基准测试套件")
+    parser.add_argument('--repeat', type=int, default=5, help="每个用例的重复次数")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="结果JSON文件")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基准线JSON文件")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果保存为基准线")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="允许的性能回退比例，默认0.25表示慢25%%以内")
+    parser.add_argument('--min-delta-ms', type=float, default=0.1,
+                        help="忽略小于该毫秒数的差异")
+    args = parser.parse_args()
+
+    if args.report:
+        report()
+        return
+
+    results = run_suite(args.repeat)
+    data = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': HAS_NUMPY,
+        'results': results,
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    print(f"\n结果已写入 {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        print(f"基准线已保存到 {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    except FileNotFoundError:
+        print(f"未找到基准线 {args.baseline}，使用 --save-baseline 创建")
+        return
+
+    regressions = compare_with_baseline(results, baseline, args.threshold,
+                                        args.min_delta_ms / 1000)
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项性能回退:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+    print("\n没有发现性能回退")
+
+
+if __name__ == "__main__":
+    main()
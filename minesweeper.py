@@ -4,13 +4,36 @@
 A Minesweeper game implemented in Python
 """
 
+import argparse
 import random
-import os
 import sys
-from typing import List, Tuple, Optional
+import time
+from typing import List, Optional, Tuple
+
+from minesweeper_engine import (ACTION_REDO, ACTION_UNDO, CELL_FLAG, CELL_HIDDEN, CELL_WIN,
+                                CODE_TO_CHAR, ChangeSet, GameEngine, count_adjacent)
+from minesweeper_save import DEFAULT_SAVE_PATH, PAGE_SIZE, SaveFile, save_game
+import minesweeper_metrics
+
+
+def _engine_attribute(name: str, doc: str) -> property:
+    """把属性读写转发给 self.engine"""
+    return property(lambda self: getattr(self.engine, name),
+                    lambda self, value: setattr(self.engine, name, value), doc=doc)
+
 
 class Minesweeper:
-    def __init__(self, rows: int = 10, cols: int = 10, mines: int = 10):
+    # 游戏状态保存在共用的 GameEngine 中
+    game_over = _engine_attribute('game_over', "游戏是否结束")
+    game_won = _engine_attribute('game_won', "是否获胜")
+    cells_to_reveal = _engine_attribute('cells_to_reveal', "剩余未揭开且非地雷的格子数")
+    mine_positions = _engine_attribute('mine_positions', "地雷位置的扁平索引 (row * cols + col)")
+    flags = _engine_attribute('flags', "已标记格子的扁平索引")
+    flag_counts = _engine_attribute('flag_counts', "每个格子周围已标记的格子数")
+    recorder = _engine_attribute('recorder', "可选的操作录制器，见 minesweeper_replay.GameRecorder")
+
+    def __init__(self, rows: int = 10, cols: int = 10, mines: int = 10,
+                 seed: Optional[int] = None, no_guess: bool = False):
         """
         初始化扫雷游戏
 
@@ -18,83 +41,174 @@ class Minesweeper:
             rows: 行数
             cols: 列数
             mines: 地雷数量
+            seed: 随机种子，相同种子生成相同的游戏板，None表示随机选择
+            no_guess: 生成只靠推理就能完成的游戏板，并从中心格子开始
         """
+        self._init_fields(rows, cols, mines, seed, no_guess, GameEngine(rows, cols, mines))
+        self.init_board()
+
+    def _init_fields(self, rows: int, cols: int, mines: int, seed: Optional[int],
+                     no_guess: bool, engine: GameEngine):
+        """设置各属性，不生成游戏板"""
         self.rows = rows
         self.cols = cols
         self.mines = mines
+        self.no_guess = no_guess
+        # 无猜模式的生成结果 (尝试次数、用时等)，见 minesweeper_noguess.NoGuessResult
+        self.generation = None
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.rng = random.Random(self.seed)
+
+        # 游戏规则和扁平存储的游戏状态
+        self.engine = engine
+        # 游戏板状态: 0-8表示周围地雷数, -1表示地雷，None表示第一次访问时从引擎生成
+        self._board: Optional[List[List[int]]] = []
+        # 玩家可见状态: ' '未揭开, 'F'已标记, 数字表示已揭开，由引擎返回的变化集合更新；
+        # None表示第一次访问时按引擎的可见状态生成
+        self._revealed: Optional[List[List[str]]] = []
+        # 终端渲染器，第一次显示时创建，见 minesweeper_terminal.TerminalRenderer
+        self.renderer = None
+        # 撤销日志，调用 enable_undo() 后记录，见 minesweeper_history.UndoLog
+        self.history = None
+        # 存档，第一次保存或读取存档后增量保存，见 minesweeper_save.SaveFile
+        self.save_file = None
+        # 游戏中输入 s 时保存的路径，autosave 为真时每步之后自动保存
+        self.save_path = DEFAULT_SAVE_PATH
+        self.autosave = False
+        # 之前各次游戏的用时(秒)和本次开始的时间
+        self.elapsed = 0.0
+        self.start_time = None
+
+    @classmethod
+    def from_board(cls, board: List[List[int]], seed: int = 0) -> 'Minesweeper':
+        """
+        用已有的游戏板创建游戏，不重新放置地雷
 
-        # 游戏板状态: 0-8表示周围地雷数, -1表示地雷
-        self.board: List[List[int]] = []
-        # 玩家可见状态: ' '未揭开, 'F'已标记, 数字表示已揭开
-        self.revealed: List[List[str]] = []
-        # 游戏状���
-        self.game_over = False
-        self.game_won = False
-        # 剩余未揭开且非地雷的格子数
-        self.cells_to_reveal = rows * cols - mines
-        # 已标记的地雷数
-        self.flagged_mines = 0
+        Args:
+            board: 游戏板，-1表示地雷，0-8表示周围地雷数
+            seed: 记录用的随机种子
+        """
+        rows, cols = len(board), len(board[0])
+        game = cls(rows, cols, 0, seed)
+        game.board = board
+        game.mines = game.engine.mines = len(game.mine_positions)
+        return game
+
+    @classmethod
+    def load(cls, path: str) -> 'Minesweeper':
+        """
+        读取存档继续游戏，之后的 save() 增量写回同一存档
 
-        self.init_board()
+        Raises:
+            ValueError: 不是有效的扫雷存档
+        """
+        save_file = SaveFile(path)
+        # 不生成游戏板，直接使用映射的存档；嵌套列表形式的游戏板和可见状态在第一次访问时生成
+        game = cls.__new__(cls)
+        game._init_fields(save_file.rows, save_file.cols, save_file.mines, save_file.seed,
+                          False, save_file.engine())
+        game._board = None
+        game._revealed = None
+        game.elapsed = save_file.elapsed
+        game.save_file = save_file
+        return game
+
+    @property
+    def board(self) -> List[List[int]]:
+        """游戏板: 0-8表示周围地雷数, -1表示地雷"""
+        if self._board is None:
+            self._board = self.engine.board_rows()
+        return self._board
+
+    @board.setter
+    def board(self, board: List[List[int]]):
+        """换用指定的游戏板，周围地雷数按其中的地雷位置重新计算"""
+        cols = self.cols
+        positions = [r * cols + c for r, row in enumerate(board)
+                     for c, value in enumerate(row) if value == -1]
+        self._board = board
+        self.engine.set_board(count_adjacent(self.rows, cols, positions), positions)
+
+    @property
+    def revealed(self) -> List[List[str]]:
+        """玩家可见状态: ' '未揭开, 'F'已标记, 数字表示已揭开"""
+        if self._revealed is None:
+            cols = self.cols
+            codes = self.engine.visible
+            self._revealed = [[CODE_TO_CHAR[code] for code in codes[r * cols:(r + 1) * cols]]
+                              for r in range(self.rows)]
+        return self._revealed
+
+    @revealed.setter
+    def revealed(self, revealed: List[List[str]]):
+        self._revealed = revealed
+
+    @property
+    def flagged_mines(self) -> int:
+        """已标记的格子数"""
+        return len(self.engine.flags)
 
     def init_board(self):
         """初始化游戏板"""
-        # 初始化空板
-        self.board = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
         self.revealed = [[' ' for _ in range(self.cols)] for _ in range(self.rows)]
+        if not self.no_guess:
+            # 放置地雷并计算周围地雷数
+            self._board = self.engine.place_mines(self.rng)
+            return
 
-        # 放置地雷
-        mines_placed = 0
-        while mines_placed < self.mines:
-            row = random.randint(0, self.rows - 1)
-            col = random.randint(0, self.cols - 1)
-
-            if self.board[row][col] != -1:
-                self.board[row][col] = -1
-                mines_placed += 1
-
-                # 更新周围格子的地雷计数
-                for dr in [-1, 0, 1]:
-                    for dc in [-1, 0, 1]:
-                        if dr == 0 and dc == 0:
-                            continue
-                        new_row, new_col = row + dr, col + dc
-                        if (0 <= new_row < self.rows and
-                            0 <= new_col < self.cols and
-                            self.board[new_row][new_col] != -1):
-                            self.board[new_row][new_col] += 1
-
-    def display(self):
-        """显示游戏板"""
-        os.system('clear' if os.name == 'posix' else 'cls')
-
-        print(f"扫雷游戏 - 剩余地雷: {self.mines - self.flagged_mines}")
-        print(f"状态: {'游戏结束' if self.game_over else '胜利!' if self.game_won else '进行中'}")
-        print()
+        # 延迟导入，普通模式不加载生成器
+        from minesweeper_noguess import generate_no_guess
+        first = (self.rows // 2, self.cols // 2)
+        self.generation = generate_no_guess(self.rows, self.cols, self.mines, first, self.rng)
+        self._board = self.generation.board
+        self.engine.set_board(self._board, self.generation.positions)
+        # 命令行版本没有第一次点击，直接揭开起点
+        self.reveal(*first)
+
+    def display(self, changes: Optional[ChangeSet] = None):
+        """
+        显示游戏板，第一次完整输出，之后只重写变化的格子
 
-        # 显示列号
-        print("   " + " ".join(f"{i:2d}" for i in range(self.cols)))
-        print("   " + "---" * self.cols)
+        Args:
+            changes: 上次显示以来的变化集合，None表示逐格比较
+        """
+        if self.renderer is None:
+            # 延迟导入，只有交互显示时才需要终端渲染器
+            from minesweeper_terminal import TerminalRenderer
+            self.renderer = TerminalRenderer(self)
+        self.renderer.draw(changes)
+
+    def render_header(self) -> List[str]:
+        """游戏板上方的状态行和列号"""
+        return [
+            f"扫雷游戏 - 剩余地雷: {self.mines - self.flagged_mines}",
+            f"状态: {'游戏结束' if self.game_over else '胜利!' if self.game_won else '进行中'}",
+            "",
+            # 显示列号
+            "   " + " ".join(f"{i:2d}" for i in range(self.cols)),
+            "   " + "---" * self.cols,
+        ]
+
+    def render(self) -> str:
+        """生成游戏板的显示文本"""
+        lines = self.render_header()
 
         for i, row in enumerate(self.revealed):
-            # 显示行号
-            print(f"{i:2d}|", end="")
+            # 显示行号，未揭开的格子显示为'?'
+            cells = "".join(f" {'?' if cell == ' ' else cell} " for cell in row)
+            lines.append(f"{i:2d}|{cells}")
 
-            for j, cell in enumerate(row):
-                if cell == ' ':
-                    print(" ?", end=" ")
-                elif cell == 'F':
-                    print(" F", end=" ")
-                else:
-                    print(f" {cell}", end=" ")
-            print()
-        print()
+        lines.append("")
+        return "\n".join(lines)
 
     def get_valid_input(self, prompt: str) -> Tuple[int, int, str]:
         """获取有效的用户输入"""
         while True:
             try:
                 user_input = input(prompt).strip().split()
+                if len(user_input) == 1 and user_input[0].lower() in ('u', 'y', 's'):
+                    # 撤销、重做和保存不需要坐标
+                    return -1, -1, user_input[0].lower()
                 if len(user_input) < 2:
                     print("请输入 行 列 [操作]，例如: 0 0 或 0 0 f")
                     continue
@@ -107,8 +221,8 @@ class Minesweeper:
                     print(f"请输入有效的坐标 (0-{self.rows-1}, 0-{self.cols-1})")
                     continue
 
-                if action not in ['r', 'f', 'q']:
-                    print("操作必须是 'r'(揭开), 'f'(标记), 或 'q'(退出)")
+                if action not in ['r', 'f', 'c', 'q']:
+                    print("操作必须是 'r'(揭开), 'f'(标记), 'c'(展开周围), 或 'q'(退出)")
                     continue
 
                 return row, col, action
@@ -123,112 +237,210 @@ class Minesweeper:
         Returns:
             True表示游戏继续, False表示踩雷
         """
-        if self.revealed[row][col] != ' ' and self.revealed[row][col] != 'F':
-            return True  # 已经揭开的格子
+        changes = self.reveal(row, col)
+        return not (changes and self.board[row][col] == -1)
 
-        if self.revealed[row][col] == 'F':
-            return True  # 已标记的格子不能揭开
+    def reveal(self, row: int, col: int) -> ChangeSet:
+        """
+        揭开指定位置的格子
 
-        # 踩雷
-        if self.board[row][col] == -1:
-            self.revealed[row][col] = '*'
-            self.game_over = True
-            self.reveal_all_mines()
-            return False
+        Returns:
+            变化集合 [(格子索引, 新的可见状态编码)]，格子已揭开或已标记时为空
+        """
+        changes = self.engine.reveal(row * self.cols + col)
+        self._mark_win(row, col, changes)
+        return self._commit(changes)
 
-        # 揭开格子
-        self.revealed[row][col] = str(self.board[row][col])
-        self.cells_to_reveal -= 1
+    def flood_fill(self, row: int, col: int) -> ChangeSet:
+        """洪水填充算法，揭开空格及其周围的格子（迭代实现，不受递归深度限制）"""
+        return self._apply(self.engine.flood_fill(row * self.cols + col))
 
-        # 如果是空格，使用洪水填充揭开周围的格子
-        if self.board[row][col] == 0:
-            self.flood_fill(row, col)
+    def toggle_flag(self, row: int, col: int):
+        """切换格子的标记状态"""
+        self.flag(row, col)
 
-        # 检查是否获胜
-        if self.cells_to_reveal == 0:
-            self.game_won = True
-            self.game_over = True
-            self.revealed[row][col] = 'W'  # 标记最后一个揭开的格子
+    def flag(self, row: int, col: int) -> ChangeSet:
+        """
+        切换格子的标记状态
 
-        return True
+        Returns:
+            变化集合 [(格子索引, 新的可见状态编码)]，无法标记时为空
+        """
+        if self.engine.visible[row * self.cols + col] not in (CELL_HIDDEN, CELL_FLAG):
+            print("已揭开的格子不能标记")
+            return []
 
-    def flood_fill(self, row: int, col: int):
-        """洪水填充算法，揭开空格及其周围的格子"""
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                new_row, new_col = row + dr, col + dc
+        if not self.engine.can_flag(row * self.cols + col):
+            print(f"标记数量已达到地雷总数 {self.mines}")
+            return []
 
-                if (0 <= new_row < self.rows and
-                    0 <= new_col < self.cols and
-                    self.revealed[new_row][new_col] == ' '):
+        return self._commit(self.engine.flag(row * self.cols + col))
 
-                    self.revealed[new_row][new_col] = str(self.board[new_row][new_col])
-                    self.cells_to_reveal -= 1
+    def chord(self, row: int, col: int) -> ChangeSet:
+        """
+        双击展开: 已揭开的数字周围的标记数等于该数字时，揭开周围其余未标记的格子
 
-                    # 如果周围也是空格，递归处理
-                    if self.board[new_row][new_col] == 0:
-                        self.flood_fill(new_row, new_col)
+        Returns:
+            变化集合，条件不满足时为空
+        """
+        changes = self.engine.chord(row * self.cols + col)
+        self._mark_win(row, col, changes)
+        return self._commit(changes)
+
+    def reveal_all_mines(self) -> ChangeSet:
+        """游戏结束时显示所有地雷，返回变化集合，只访问地雷和已标记的格子"""
+        return self._apply(self.engine.reveal_all_mines())
+
+    def _mark_win(self, row: int, col: int, changes: ChangeSet):
+        """本次操作获胜时把操作的格子显示为'W'"""
+        if changes and self.game_won:
+            index = row * self.cols + col
+            self.engine.visible[index] = CELL_WIN
+            changes.append((index, CELL_WIN))
+
+    def enable_undo(self, max_bytes: Optional[int] = None):
+        """开始记录撤销日志，之前的操作不能撤销"""
+        # 延迟导入，批量模拟和回放不需要撤销
+        from minesweeper_history import DEFAULT_MAX_BYTES, UndoLog
+        self.history = UndoLog(self.engine, max_bytes or DEFAULT_MAX_BYTES)
+
+    def undo(self) -> ChangeSet:
+        """
+        撤销最近一次揭开、标记或展开操作
 
-    def toggle_flag(self, row: int, col: int):
-        """切换格子的标记状态"""
-        if self.revealed[row][col] not in [' ', 'F']:
-            print("已揭开的格子不能标记")
-            return
+        Returns:
+            变化集合，没有可撤销的操作或游戏已结束时为空
+        """
+        if self.history is None or self.game_over or not self.history.can_undo():
+            return []
+        if self.recorder is not None:
+            self.recorder.record(ACTION_UNDO, 0, 0)
+        return self._apply(self.history.undo())
 
-        if self.revealed[row][col] == ' ':
-            if self.flagged_mines < self.mines:
-                self.revealed[row][col] = 'F'
-                self.flagged_mines += 1
-            else:
-                print(f"标记数量已达到地雷总数 {self.mines}")
-        else:
-            self.revealed[row][col] = ' '
-            self.flagged_mines -= 1
-
-    def reveal_all_mines(self):
-        """游戏结束时显示所有地雷"""
-        for i in range(self.rows):
-            for j in range(self.cols):
-                if self.board[i][j] == -1:
-                    if self.revealed[i][j] != 'F':  # 已正确标记的地雷不覆盖
-                        self.revealed[i][j] = '*'
-                elif self.revealed[i][j] == 'F':  # 显示错误标记
-                    self.revealed[i][j] = 'X'
+    def redo(self) -> ChangeSet:
+        """
+        重做最近一次撤销的操作
+
+        Returns:
+            变化集合，没有可重做的操作或游戏已结束时为空
+        """
+        if self.history is None or self.game_over or not self.history.can_redo():
+            return []
+        if self.recorder is not None:
+            self.recorder.record(ACTION_REDO, 0, 0)
+        return self._apply(self.history.redo())
+
+    def _commit(self, changes: ChangeSet) -> ChangeSet:
+        """记录一次操作的变化以便撤销，并同步到 revealed"""
+        if self.history is not None:
+            self.history.record(changes)
+        return self._apply(changes)
+
+    def elapsed_time(self) -> float:
+        """包括之前各次游戏在内的用时(秒)"""
+        if self.start_time is None:
+            return self.elapsed
+        return self.elapsed + time.perf_counter() - self.start_time
+
+    def save(self, path: str) -> int:
+        """
+        保存游戏进度
+
+        第一次保存 (或换了路径) 时完整写入，之后只写回变化过的页。
+
+        Returns:
+            写入的可见状态页数，完整写入时为全部页数
+        """
+        if self.save_file is not None and self.save_file.path == path:
+            return self.save_file.save(self.engine, self.elapsed_time())
+
+        if self.save_file is not None:
+            self.save_file.close()
+        self.save_file = save_game(path, self.engine, self.seed, self.elapsed_time())
+        return (len(self.engine.visible) + PAGE_SIZE - 1) // PAGE_SIZE
+
+    def _apply(self, changes: ChangeSet) -> ChangeSet:
+        """把引擎返回的变化同步到 revealed，并记下存档中需要写回的页"""
+        # revealed 尚未生成时，之后按引擎的可见状态生成，已包含这些变化
+        revealed = self._revealed
+        if revealed is not None:
+            cols = self.cols
+            for index, code in changes:
+                revealed[index // cols][index % cols] = CODE_TO_CHAR[code]
+        if self.save_file is not None:
+            self.save_file.mark(changes)
+        return changes
+
+    def visible_codes(self) -> bytearray:
+        """按行展开的可见状态编码，见 minesweeper_engine 中的 CELL_* 常量"""
+        return bytearray(self.engine.visible)
+
+    def load_visible_codes(self, codes: bytes):
+        """从可见状态编码恢复游戏进度，计数和游戏状态随之更新"""
+        self.engine.load_visible(codes)
+        self._sync_revealed()
+        if self.history is not None:
+            self.history.reset()
+        if self.save_file is not None:
+            self.save_file.mark_all()
+
+    def _sync_revealed(self):
+        """引擎的可见状态整体改变后，revealed 在下次访问时重新生成"""
+        self._revealed = None
 
     def play(self):
         """主游戏循环"""
         print("欢迎来到扫雷游戏!")
         print("输入格式: 行 列 [操作]")
-        print("操作: r(揭开, 默认), f(标记), q(退出)")
+        print("操作: r(揭开, 默认), f(标记), c(展开周围), q(退出)")
+        print("单独输入 u 撤销, y 重做, s 保存")
         print("例如: 0 0   - 揭开(0,0)")
         print("例如: 0 0 f - 标记(0,0)")
+        print("例如: 0 0 c - 周围标记数等于(0,0)的数字时，揭开周围其余格子")
         print()
 
+        self.start_time = time.perf_counter()
+        changes = None
         while not self.game_over:
-            self.display()
+            self.display(changes)
 
             try:
-                prompt = "请输入坐标和操作 (行 列 [r/f/q]): "
+                prompt = "请输入坐标和操作 (行 列 [r/f/c/q], 或 u/y/s): "
                 row, col, action = self.get_valid_input(prompt)
 
                 if action == 'q':
                     print("游戏退出")
                     return
 
-                if action == 'f':
-                    self.toggle_flag(row, col)
+                if action == 's':
+                    self.save(self.save_path)
+                    print(f"已保存到 {self.save_path}")
+                    changes = []
+                    continue
+                if action in ('u', 'y'):
+                    changes = self.undo() if action == 'u' else self.redo()
+                    if not changes:
+                        print("没有可撤销的操作" if action == 'u' else "没有可重做的操作")
+                elif action == 'f':
+                    changes = self.flag(row, col)
+                elif action == 'c':
+                    changes = self.chord(row, col)
                 else:  # 'r'
-                    if not self.reveal_cell(row, col):
-                        break  # 踩雷了
+                    changes = self.reveal(row, col)
+
+                if self.autosave and changes:
+                    # 只写回变化过的页，每步保存的代价很小
+                    self.save(self.save_path)
 
             except KeyboardInterrupt:
                 print("\n游戏退出")
                 return
             except Exception as e:
                 print(f"发生错误: {e}")
+                changes = None
                 continue
 
-        self.display()
+        self.display(changes)
 
         if self.game_won:
             print("🎉 恭喜你，扫雷成功！")
@@ -256,16 +468,46 @@ class Minesweeper:
     def show_solution(self):
         """显示最终解答"""
         print("\n最终游戏板:")
-        for i in range(self.rows):
-            for j in range(self.cols):
-                if self.board[i][j] == -1:
-                    print("* ", end="")
-                else:
-                    print(f"{self.board[i][j]} ", end="")
-            print()
+        # 整个游戏板拼成一个字符串一次输出，地雷(-1)显示为'*'
+        chars = {value: f"{value} " for value in range(9)}
+        chars[-1] = "* "
+        print("\n".join("".join(map(chars.__getitem__, row)) for row in self.board))
+
+# 启用 minesweeper_metrics 时计时
+minesweeper_metrics.register(Minesweeper, 'init_board', 'init_board')
+minesweeper_metrics.register(Minesweeper, 'display', 'display')
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    主函数
+
+    Args:
+        argv: 命令行参数，None表示使用 sys.argv，启动器在进程内调用时传入
+    """
+    parser = argparse.ArgumentParser(description="扫雷游戏 - 命令行版本")
+    parser.add_argument('--seed', type=int, help="随机种子")
+    parser.add_argument('--record', metavar='PATH', help="把本局游戏录制到文件")
+    parser.add_argument('--no-guess', action='store_true', help="只生成靠推理就能完成的游戏板")
+    parser.add_argument('--save', metavar='PATH', default=DEFAULT_SAVE_PATH,
+                        help=f"游戏中输入 s 时的存档路径，默认为 {DEFAULT_SAVE_PATH}")
+    parser.add_argument('--load', metavar='PATH', help="读取存档继续游戏，之后保存到同一存档")
+    parser.add_argument('--autosave', action='store_true', help="每步之后自动保存")
+    parser.add_argument('--stats', action='store_true', help="统计各操作的次数和用时，游戏结束时输出")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        minesweeper_metrics.enable()
+
+    if args.load:
+        game = Minesweeper.load(args.load)
+        game.save_path = args.load
+        game.autosave = args.autosave
+        print(f"已读取存档 {args.load}: {game.rows}x{game.cols}, {game.mines}个地雷, "
+              f"用时 {game.elapsed:.0f} 秒")
+        _run(game, args)
+        return
 
-def main():
-    """主函数"""
     print("扫雷游戏设置")
     print("1. 简单 (8x8, 10个地雷)")
     print("2. 中等 (16x16, 40个地雷)")
@@ -277,13 +519,13 @@ def main():
             choice = input("请选择难度 (1-4): ").strip()
 
             if choice == '1':
-                game = Minesweeper(8, 8, 10)
+                game = Minesweeper(8, 8, 10, args.seed, args.no_guess)
                 break
             elif choice == '2':
-                game = Minesweeper(16, 16, 40)
+                game = Minesweeper(16, 16, 40, args.seed, args.no_guess)
                 break
             elif choice == '3':
-                game = Minesweeper(16, 30, 99)
+                game = Minesweeper(16, 30, 99, args.seed, args.no_guess)
                 break
             elif choice == '4':
                 rows = int(input("请输入行数 (5-20): "))
@@ -297,7 +539,7 @@ def main():
                     print("地雷数量无效")
                     continue
 
-                game = Minesweeper(rows, cols, mines)
+                game = Minesweeper(rows, cols, mines, args.seed, args.no_guess)
                 break
             else:
                 print("请输入1-4之间的数字")
@@ -308,7 +550,34 @@ def main():
             print("\n游戏退出")
             sys.exit(0)
 
-    game.play()
+    if game.generation is not None:
+        result = game.generation
+        print(f"无猜游戏板: 尝试 {result.attempts} 块, 修补 {result.repairs} 次, "
+              f"用时 {result.elapsed * 1000:.1f} ms")
+
+    game.save_path = args.save
+    game.autosave = args.autosave
+    _run(game, args)
+
+
+def _run(game: Minesweeper, args: argparse.Namespace):
+    """开始交互游戏，必要时录像"""
+    game.enable_undo()
+
+    if args.record:
+        # 延迟导入，未录制时不加载录像模块
+        from minesweeper_replay import GameRecorder
+        game.recorder = GameRecorder(args.record, game)
+
+    try:
+        game.play()
+    finally:
+        if game.recorder is not None:
+            game.recorder.close()
+        if game.save_file is not None:
+            game.save_file.close()
+        if minesweeper_metrics.is_enabled():
+            print("\n" + minesweeper_metrics.report())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
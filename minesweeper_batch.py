@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+扫雷批量模拟器
+在进程池中无界面地运行大量带种子的游戏，流式汇总胜率、步数、揭开格子数和用时
+
+用法示例:
+    python3 minesweeper_batch.py --games 100000 --rows 16 --cols 30 --mines 99 --policy solver
+"""
+
+import argparse
+import random
+import time
+from multiprocessing import Pool, cpu_count
+from typing import Callable, Dict, Optional, Tuple
+
+from minesweeper import Minesweeper
+from minesweeper_probability import game_probabilities, safest_cell
+from minesweeper_solver import MinesweeperSolver
+
+
+def _random_hidden_cell(game: Minesweeper, rng: random.Random) -> Tuple[int, int]:
+    """随机选择一个未揭开且未标记的格子"""
+    while True:
+        row = rng.randrange(game.rows)
+        col = rng.randrange(game.cols)
+        if game.revealed[row][col] == ' ':
+            return row, col
+
+
+def play_random(game: Minesweeper, rng: random.Random) -> int:
+    """随机策略: 每步随机揭开一个格子，返回步数"""
+    moves = 0
+    while not game.game_over:
+        game.reveal_cell(*_random_hidden_cell(game, rng))
+        moves += 1
+    return moves
+
+
+def play_solver(game: Minesweeper, rng: random.Random) -> int:
+    """求解器策略: 能推理时使用求解器，需要猜测时随机揭开，返回步数"""
+    solver = MinesweeperSolver(game)
+    moves = 0
+    while True:
+        moves += solver.solve().moves
+        if game.game_over:
+            return moves
+        game.reveal_cell(*_random_hidden_cell(game, rng))
+        moves += 1
+
+
+def play_probability(game: Minesweeper, rng: random.Random) -> int:
+    """概率策略: 能推理时使用求解器，需要猜测时揭开地雷概率最低的格子，返回步数"""
+    solver = MinesweeperSolver(game)
+    moves = 0
+    while True:
+        moves += solver.solve().moves
+        if game.game_over:
+            return moves
+        game.reveal_cell(*divmod(safest_cell(game_probabilities(game)), game.cols))
+        moves += 1
+
+
+# 可选的走法策略: 名称 -> play(game, rng) -> 步数
+POLICIES: Dict[str, Callable[[Minesweeper, random.Random], int]] = {
+    'random': play_random,
+    'solver': play_solver,
+    'probability': play_probability,
+}
+
+
+class BatchStats:
+    """可合并的汇总统计，只保存累计值，内存占用与游戏数无关"""
+
+    __slots__ = ('games', 'wins', 'moves', 'cells_revealed', 'time_total',
+                 'time_min', 'time_max', 'openings', 'opening_cells')
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.moves = 0
+        self.cells_revealed = 0
+        self.time_total = 0.0
+        self.time_min = float('inf')
+        self.time_max = 0.0
+        self.openings = 0       # 游戏板上的开口数
+        self.opening_cells = 0  # 开口中的格子数，包括边界
+
+    def add_game(self, won: bool, moves: int, cells_revealed: int, elapsed: float,
+                 openings: int = 0, opening_cells: int = 0):
+        """记录一局游戏"""
+        self.games += 1
+        self.wins += won
+        self.moves += moves
+        self.cells_revealed += cells_revealed
+        self.time_total += elapsed
+        self.time_min = min(self.time_min, elapsed)
+        self.time_max = max(self.time_max, elapsed)
+        self.openings += openings
+        self.opening_cells += opening_cells
+
+    def merge(self, other: 'BatchStats'):
+        """合并另一份统计"""
+        self.games += other.games
+        self.wins += other.wins
+        self.moves += other.moves
+        self.cells_revealed += other.cells_revealed
+        self.time_total += other.time_total
+        self.time_min = min(self.time_min, other.time_min)
+        self.time_max = max(self.time_max, other.time_max)
+        self.openings += other.openings
+        self.opening_cells += other.opening_cells
+
+    def summary(self) -> str:
+        """汇总描述"""
+        if not self.games:
+            return "尚无结果"
+        games = self.games
+        return (f"局数 {games}, 胜率 {self.wins / games:.2%}, "
+                f"平均步数 {self.moves / games:.1f}, "
+                f"平均揭开 {self.cells_revealed / games:.1f} 格, "
+                f"平均开口 {self.openings / games:.1f} 个 "
+                f"(每个 {self.opening_cells / max(self.openings, 1):.1f} 格), "
+                f"平均用时 {self.time_total / games * 1000:.3f} ms "
+                f"(最短 {self.time_min * 1000:.3f}, 最长 {self.time_max * 1000:.3f})")
+
+
+def run_chunk(task: Tuple[int, int, int, int, int, str]) -> BatchStats:
+    """
+    在工作进程中运行一组游戏
+
+    Args:
+        task: (起始种子, 局数, 行数, 列数, 地雷数, 策略名)
+    """
+    first_seed, count, rows, cols, mines, policy_name = task
+    play = POLICIES[policy_name]
+    stats = BatchStats()
+    safe_cells = rows * cols - mines
+
+    for seed in range(first_seed, first_seed + count):
+        start = time.perf_counter()
+        game = Minesweeper(rows, cols, mines, seed=seed)
+        # 生成游戏板后扫描一次开口，揭开空格时批量揭开，结束时直接用来统计开口；
+        # 只有第一次点击移动地雷使开口失效时才重新扫描，两次扫描都计入用时
+        game.engine.index_openings()
+        moves = play(game, random.Random(seed))
+        openings = game.engine.index_openings()
+        elapsed = time.perf_counter() - start
+
+        stats.add_game(game.game_won, moves, safe_cells - game.cells_to_reveal, elapsed,
+                       openings.count, len(openings.cells))
+
+    return stats
+
+
+def simulate(games: int, rows: int, cols: int, mines: int, policy: str = 'solver',
+             seed: int = 0, workers: Optional[int] = None, chunk_size: int = 200,
+             progress: Optional[Callable[[BatchStats], None]] = None) -> BatchStats:
+    """
+    并行模拟多局游戏
+
+    每个任务只返回一份汇总统计，主进程边接收边合并，
+    因此内存占用不随局数增长。
+
+    Args:
+        games: 局数
+        rows: 行数
+        cols: 列数
+        mines: 地雷数量
+        policy: 走法策略名，见 POLICIES
+        seed: 起始种子，第i局使用 seed + i
+        workers: 进程数，None表示CPU核数
+        chunk_size: 每个任务的局数
+        progress: 每合并一个任务后调用，参数为当前汇总统计
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"未知策略 {policy}，可选: {', '.join(POLICIES)}")
+
+    tasks = ((start, min(chunk_size, seed + games - start), rows, cols, mines, policy)
+             for start in range(seed, seed + games, chunk_size))
+
+    total = BatchStats()
+    with Pool(workers or cpu_count()) as pool:
+        for stats in pool.imap_unordered(run_chunk, tasks):
+            total.merge(stats)
+            if progress is not None:
+                progress(total)
+
+    return total
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="扫雷批量模拟器")
+    parser.add_argument('--games', type=int, default=1000, help="局数")
+    parser.add_argument('--rows', type=int, default=16, help="行数")
+    parser.add_argument('--cols', type=int, default=30, help="列数")
+    parser.add_argument('--mines', type=int, help="地雷数量")
+    parser.add_argument('--density', type=float, default=0.20625, help="地雷密度，未指定--mines时使用")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='solver', help="走法策略")
+    parser.add_argument('--seed', type=int, default=0, help="起始种子")
+    parser.add_argument('--workers', type=int, help="进程数，默认为CPU核数")
+    parser.add_argument('--chunk-size', type=int, default=200, help="每个任务的局数")
+    args = parser.parse_args()
+
+    mines = args.mines if args.mines is not None else int(args.rows * args.cols * args.density)
+    print(f"模拟 {args.games} 局 {args.rows}x{args.cols}, {mines}个地雷, 策略: {args.policy}")
+
+    start = time.perf_counter()
+    last_report = [start]
+
+    def progress(stats: BatchStats):
+        now = time.perf_counter()
+        if now - last_report[0] >= 1.0:
+            last_report[0] = now
+            print(f"[{now - start:7.1f}s] {stats.summary()}", flush=True)
+
+    stats = simulate(args.games, args.rows, args.cols, mines, args.policy, args.seed,
+                     args.workers, args.chunk_size, progress)
+
+    elapsed = time.perf_counter() - start
+    print(stats.summary())
+    print(f"总用时 {elapsed:.2f} s, {stats.games / elapsed:,.0f} 局/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+紧凑游戏板
+用位平面存储地雷、揭开和标记状态，用uint8数组存储周围地雷数，
+每个格子约1.4字节，可以在几百MB内容纳10000x10000的游戏板
+
+游戏类使用 GameEngine 的每格一字节的数组；紧凑游戏板是独立的存储格式，
+用于生成和统计超出 GameEngine 内存范围的游戏板 (见 bench_minesweeper.py --report)。
+"""
+
+import random
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from minesweeper_engine import HAS_NUMPY, place_mines
+
+if HAS_NUMPY:
+    import numpy as np
+
+# 统计位数时每次处理的字节数，避免一次性转换整个位平面
+POPCOUNT_CHUNK = 1 << 20
+
+# 格子数超过此值时直接在地雷位平面上抽样，不生成地雷位置列表
+DIRECT_SAMPLE_CELLS = 1 << 22
+
+
+def _popcount(value: int) -> int:
+    """统计整数中为1的位数"""
+    if hasattr(value, 'bit_count'):
+        return value.bit_count()
+    return bin(value).count('1')
+
+
+class _BitRow:
+    """位平面中一行的视图，支持 plane[row][col] 读写"""
+
+    __slots__ = ('bits', 'base')
+
+    def __init__(self, bits: bytearray, base: int):
+        self.bits = bits
+        self.base = base
+
+    def __getitem__(self, col: int) -> bool:
+        index = self.base + col
+        return bool(self.bits[index >> 3] >> (index & 7) & 1)
+
+    def __setitem__(self, col: int, value: bool):
+        index = self.base + col
+        if value:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+
+class BitPlane:
+    """每个格子占1位的布尔平面，接口与嵌套的bool列表相同"""
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.bits = bytearray((rows * cols + 7) // 8)
+
+    def __getitem__(self, row: int) -> _BitRow:
+        return _BitRow(self.bits, row * self.cols)
+
+    def get(self, index: int) -> bool:
+        """按扁平索引读取"""
+        return bool(self.bits[index >> 3] >> (index & 7) & 1)
+
+    def set(self, index: int, value: bool = True):
+        """按扁平索引写入"""
+        if value:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def count(self) -> int:
+        """为True的格子数"""
+        bits = self.bits
+        return sum(_popcount(int.from_bytes(bits[i:i + POPCOUNT_CHUNK], 'little'))
+                   for i in range(0, len(bits), POPCOUNT_CHUNK))
+
+    def count_without(self, other: 'BitPlane') -> int:
+        """在本平面为True且在other平面为False的格子数"""
+        total = 0
+        for i in range(0, len(self.bits), POPCOUNT_CHUNK):
+            mask = int.from_bytes(self.bits[i:i + POPCOUNT_CHUNK], 'little')
+            exclude = int.from_bytes(other.bits[i:i + POPCOUNT_CHUNK], 'little')
+            total += _popcount(mask & ~exclude)
+        return total
+
+
+class _CountRow:
+    """游戏板一行的视图，地雷返回-1，否则返回周围地雷数"""
+
+    __slots__ = ('board', 'base')
+
+    def __init__(self, board: 'CompactBoard', base: int):
+        self.board = board
+        self.base = base
+
+    def __getitem__(self, col: int) -> int:
+        index = self.base + col
+        if self.board.mine.get(index):
+            return -1
+        return self.board.counts[index]
+
+
+class CompactBoard:
+    """
+    紧凑游戏板
+
+    board[row][col] 与 Minesweeper.board 相同: -1表示地雷, 0-8表示周围地雷数；
+    revealed[row][col] 和 flagged[row][col] 与 MinesweeperGUI 中的bool列表相同。
+    """
+
+    def __init__(self, rows: int, cols: int):
+        """
+        创建没有地雷的空游戏板
+
+        Args:
+            rows: 行数
+            cols: 列数
+        """
+        self.rows = rows
+        self.cols = cols
+        self.mines = 0
+
+        # 位平面: 地雷、已揭开、已标记
+        self.mine = BitPlane(rows, cols)
+        self.revealed = BitPlane(rows, cols)
+        self.flagged = BitPlane(rows, cols)
+        # 周围地雷数 (uint8)
+        self.counts = bytearray(rows * cols)
+
+    @classmethod
+    def generate(cls, rows: int, cols: int, mines: int,
+                 rng: Optional[random.Random] = None,
+                 avoid: Optional[Tuple[int, int]] = None,
+                 use_numpy: Optional[bool] = None) -> 'CompactBoard':
+        """
+        生成紧凑游戏板
+
+        格子数不超过 DIRECT_SAMPLE_CELLS 时，同一个种子与 generate_board 放置的地雷位置相同；
+        更大的游戏板用Floyd抽样直接在地雷位平面上选出地雷，不生成地雷位置列表，
+        内存只有位平面和计数数组，耗时与地雷数成正比。
+
+        Args:
+            rows: 行数
+            cols: 列数
+            mines: 地雷数量
+            rng: 随机数生成器，None表示使用新的随机种子
+            avoid: 需要避开的格子(行, 列)，该格子及其周围8格不放地雷
+            use_numpy: 是否使用NumPy计算周围地雷数，None表示已安装时自动使用
+
+        Raises:
+            ValueError: 地雷数量为负数或超过可放置的格子数
+        """
+        if rng is None:
+            rng = random.Random()
+
+        board = cls(rows, cols)
+        if rows * cols <= DIRECT_SAMPLE_CELLS:
+            board.set_mines(place_mines(rows, cols, mines, rng, avoid), use_numpy)
+            return board
+
+        excluded = []
+        if avoid is not None:
+            avoid_row, avoid_col = avoid
+            excluded = [r * cols + c
+                        for r in range(max(avoid_row - 1, 0), min(avoid_row + 2, rows))
+                        for c in range(max(avoid_col - 1, 0), min(avoid_col + 2, cols))]
+        allowed = rows * cols - len(excluded)
+        if not 0 <= mines <= allowed:
+            raise ValueError(f"地雷数量 {mines} 无效，可放置的格子数为 {allowed}")
+
+        board.set_mines(board._sample_mines(mines, allowed, rng, excluded), use_numpy)
+        return board
+
+    def _sample_mines(self, mines: int, allowed: int, rng: random.Random,
+                      excluded: List[int]) -> Iterator[int]:
+        """
+        Floyd抽样: 在 allowed 个可放置的格子中无放回地选出 mines 个，立即写入位平面
+
+        第j步在 [0, j] 中抽一个数，已选过时改选j；用地雷位平面判断是否已选，
+        不需要额外的集合，每个地雷只抽一次随机数，密度接近100%也不会反复碰撞。
+        抽到的序号跳过 excluded (已按升序排列) 映射回格子索引，与 place_mines 相同。
+        返回生成器，调用者边抽取边计数，不保存位置列表。
+        """
+        mine = self.mine
+
+        def to_index(index: int) -> int:
+            for skipped in excluded:
+                if skipped <= index:
+                    index += 1
+                else:
+                    break
+            return index
+
+        for j in range(allowed - mines, allowed):
+            index = to_index(rng.randrange(j + 1))
+            if mine.get(index):
+                index = to_index(j)
+            mine.set(index)
+            yield index
+
+    @classmethod
+    def from_board(cls, board: List[List[int]]) -> 'CompactBoard':
+        """从嵌套列表游戏板 (-1表示地雷) 创建紧凑游戏板"""
+        rows = len(board)
+        cols = len(board[0]) if rows else 0
+        positions = [r * cols + c for r in range(rows) for c in range(cols)
+                     if board[r][c] == -1]
+
+        compact = cls(rows, cols)
+        compact.set_mines(positions, use_numpy=False)
+        return compact
+
+    def set_mines(self, positions: Iterable[int], use_numpy: Optional[bool] = None):
+        """
+        设置地雷位置(扁平索引)并计算周围地雷数
+
+        positions 只遍历一次，可以是边抽取边产生位置的生成器。
+        """
+        if use_numpy is None:
+            use_numpy = HAS_NUMPY
+        if use_numpy and not HAS_NUMPY:
+            raise RuntimeError("未安装NumPy，无法使用向量化计算")
+
+        if use_numpy:
+            mines = 0
+            for index in positions:
+                self.mine.set(index)
+                mines += 1
+            self.mines = mines
+            self._count_numpy()
+        else:
+            self.mines = self._count_python(positions)
+
+    def _count_python(self, positions: Iterable[int]) -> int:
+        """
+        纯Python实现：写入地雷位并给周围格子计数加一
+
+        Returns:
+            地雷数
+        """
+        rows, cols, counts, mine = self.rows, self.cols, self.counts, self.mine
+        mines = 0
+
+        for index in positions:
+            mine.set(index)
+            mines += 1
+            row, col = divmod(index, cols)
+            col_start = max(col - 1, 0)
+            col_end = min(col + 2, cols)
+            for r in range(max(row - 1, 0), min(row + 2, rows)):
+                base = r * cols
+                for c in range(col_start, col_end):
+                    if base + c != index:
+                        counts[base + c] += 1
+        return mines
+
+    def _count_numpy(self, band: int = 1024):
+        """NumPy实现：按行分段求3x3邻域和，限制临时数组的内存"""
+        rows, cols = self.rows, self.cols
+        bits = np.frombuffer(self.mine.bits, dtype=np.uint8)
+        counts = np.frombuffer(self.counts, dtype=np.uint8).reshape(rows, cols)
+
+        for r0 in range(0, rows, band):
+            r1 = min(r0 + band, rows)
+            # 多取上下各一行作为邻域
+            top = max(r0 - 1, 0)
+            bottom = min(r1 + 1, rows)
+            start, end = top * cols, bottom * cols
+            mask = np.unpackbits(bits[start // 8:(end + 7) // 8], bitorder='little')
+            offset = start % 8
+            mask = mask[offset:offset + end - start].reshape(bottom - top, cols)
+
+            padded = np.pad(mask, ((1 if r0 == 0 else 0, 1 if r1 == rows else 0), (1, 1)))
+            total = np.zeros((r1 - r0, cols), dtype=np.uint8)
+            for dr in (0, 1, 2):
+                for dc in (0, 1, 2):
+                    if dr == 1 and dc == 1:
+                        continue
+                    total += padded[dr:dr + r1 - r0, dc:dc + cols]
+            counts[r0:r1] = total
+
+    def __getitem__(self, row: int) -> _CountRow:
+        return _CountRow(self, row * self.cols)
+
+    def flag_count(self) -> int:
+        """已标记的格子数"""
+        return self.flagged.count()
+
+    def cells_to_reveal(self) -> int:
+        """剩余未揭开且非地雷的格子数"""
+        revealed_safe = self.revealed.count_without(self.mine)
+        return self.rows * self.cols - self.mines - revealed_safe
+
+    def nbytes(self) -> int:
+        """游戏板数据占用的字节数"""
+        return (len(self.mine.bits) + len(self.revealed.bits) +
+                len(self.flagged.bits) + len(self.counts))
@@ -0,0 +1,726 @@
+#!/usr/bin/env python3
+"""
+扫雷游戏核心引擎
+命令行版本和GUI版本共用的游戏算法
+"""
+
+import random
+import sys
+from array import array
+from collections import deque
+from functools import lru_cache
+from itertools import chain
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+# NumPy为可选依赖，未安装时使用纯Python实现
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAS_NUMPY = np is not None
+
+# 格子可见状态编码，0-8表示已揭开的数字
+CELL_HIDDEN = 9       # 未揭开
+CELL_FLAG = 10        # 已标记
+CELL_MINE = 11        # 揭开的地雷
+CELL_WRONG_FLAG = 12  # 错误标记
+CELL_WIN = 13         # 命令行版本中最后揭开的格子
+
+# 玩家操作编码
+ACTION_REVEAL = 0
+ACTION_FLAG = 1
+ACTION_UNDO = 2
+ACTION_REDO = 3
+
+# 命令行版本可见字符与编码的对应关系
+CHAR_TO_CODE = {str(n): n for n in range(9)}
+CHAR_TO_CODE.update({' ': CELL_HIDDEN, 'F': CELL_FLAG, '*': CELL_MINE,
+                     'X': CELL_WRONG_FLAG, 'W': CELL_WIN})
+CODE_TO_CHAR = {code: char for char, code in CHAR_TO_CODE.items()}
+
+# 一次操作的变化集合: [(格子索引 row * cols + col, 新的可见状态编码)]，按发生顺序排列
+ChangeSet = List[Tuple[int, int]]
+
+
+def place_mines(rows: int, cols: int, mines: int, rng: random.Random,
+                avoid: Optional[Tuple[int, int]] = None) -> List[int]:
+    """
+    随机选择地雷位置
+
+    在允许放置的格子中无放回抽样，耗时与地雷数量成正比，
+    即使地雷密度接近100%也不会因为反复碰撞而卡住。
+
+    Args:
+        rows: 行数
+        cols: 列数
+        mines: 地雷数量
+        rng: 随机数生成器
+        avoid: 需要避开的格子(行, 列)，该格子及其周围8格不放地雷
+
+    Returns:
+        地雷位置的扁平索引列表 (row * cols + col)
+
+    Raises:
+        ValueError: 地雷数量为负数或超过可放置的格子数
+    """
+    excluded = []
+    if avoid is not None:
+        avoid_row, avoid_col = avoid
+        for r in range(max(avoid_row - 1, 0), min(avoid_row + 2, rows)):
+            for c in range(max(avoid_col - 1, 0), min(avoid_col + 2, cols)):
+                excluded.append(r * cols + c)
+
+    allowed = rows * cols - len(excluded)
+    if not 0 <= mines <= allowed:
+        raise ValueError(f"地雷数量 {mines} 无效，可放置的格子数为 {allowed}")
+
+    positions = rng.sample(range(allowed), mines)
+    if not excluded:
+        return positions
+
+    # 把抽样结果映射回原索引，跳过被排除的格子(excluded已按升序排列)
+    for i, index in enumerate(positions):
+        for skipped in excluded:
+            if skipped <= index:
+                index += 1
+            else:
+                break
+        positions[i] = index
+
+    return positions
+
+
+def count_adjacent(rows: int, cols: int, mine_positions: List[int],
+                   use_numpy: Optional[bool] = None) -> List[List[int]]:
+    """
+    根据地雷位置计算游戏板
+
+    Args:
+        rows: 行数
+        cols: 列数
+        mine_positions: 地雷位置的扁平索引列表
+        use_numpy: 是否使用NumPy向量化计算，None表示已安装时自动使用
+
+    Returns:
+        游戏板: 0-8表示周围地雷数, -1表示地雷
+    """
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY
+    if use_numpy:
+        if not HAS_NUMPY:
+            raise RuntimeError("未安装NumPy，无法使用向量化计算")
+        return _count_adjacent_numpy(rows, cols, mine_positions)
+    return _count_adjacent_python(rows, cols, mine_positions)
+
+
+def _count_adjacent_python(rows: int, cols: int, mine_positions: List[int]) -> List[List[int]]:
+    """纯Python实现：每个地雷给周围格子计数加一"""
+    counts = [0] * (rows * cols)
+
+    for index in mine_positions:
+        row, col = divmod(index, cols)
+        col_start = max(col - 1, 0)
+        col_end = min(col + 2, cols)
+        for r in range(max(row - 1, 0), min(row + 2, rows)):
+            base = r * cols
+            for c in range(col_start, col_end):
+                counts[base + c] += 1
+
+    for index in mine_positions:
+        counts[index] = -1
+
+    return [counts[r * cols:(r + 1) * cols] for r in range(rows)]
+
+
+def _count_adjacent_numpy(rows: int, cols: int, mine_positions: List[int]) -> List[List[int]]:
+    """NumPy实现：在补零的布尔数组上一次性求3x3邻域和"""
+    mask = np.zeros(rows * cols, dtype=bool)
+    mask[np.asarray(mine_positions, dtype=np.int64)] = True
+    mask = mask.reshape(rows, cols)
+
+    padded = np.pad(mask, 1).astype(np.int8)
+    counts = np.zeros((rows, cols), dtype=np.int8)
+    for dr in (0, 1, 2):
+        for dc in (0, 1, 2):
+            if dr == 1 and dc == 1:
+                continue
+            counts += padded[dr:dr + rows, dc:dc + cols]
+
+    counts[mask] = -1
+    return counts.tolist()
+
+
+def generate_board(rows: int, cols: int, mines: int,
+                   rng: Optional[random.Random] = None,
+                   avoid: Optional[Tuple[int, int]] = None,
+                   use_numpy: Optional[bool] = None) -> List[List[int]]:
+    """
+    生成游戏板
+
+    同一个种子无论是否使用NumPy都会得到完全相同的游戏板。
+
+    Args:
+        rows: 行数
+        cols: 列数
+        mines: 地雷数量
+        rng: 随机数生成器，None表示使用新的随机种子
+        avoid: 需要避开的格子(行, 列)，该格子及其周围8格不放地雷
+        use_numpy: 是否使用NumPy向量化计算，None表示已安装时自动使用
+
+    Returns:
+        游戏板: 0-8表示周围地雷数, -1表示地雷
+    """
+    return generate_board_and_mines(rows, cols, mines, rng, avoid, use_numpy)[0]
+
+
+def generate_board_and_mines(rows: int, cols: int, mines: int,
+                             rng: Optional[random.Random] = None,
+                             avoid: Optional[Tuple[int, int]] = None,
+                             use_numpy: Optional[bool] = None) -> Tuple[List[List[int]], List[int]]:
+    """
+    生成游戏板，同时返回地雷位置索引
+
+    参数与 generate_board 相同。游戏结束时只需遍历地雷位置，不必扫描整个游戏板。
+
+    Returns:
+        (游戏板, 地雷位置的扁平索引列表)
+    """
+    if rng is None:
+        rng = random.Random()
+
+    positions = place_mines(rows, cols, mines, rng, avoid)
+    return count_adjacent(rows, cols, positions, use_numpy), positions
+
+
+class NeighbourTable(NamedTuple):
+    """
+    CSR格式的相邻格子表
+
+    格子i周围(不含自身)的格子为 indices[offsets[i]:offsets[i + 1]]，均为扁平索引。
+    """
+    offsets: array
+    indices: array
+
+    def of(self, index: int) -> array:
+        """格子的相邻格子"""
+        return self.indices[self.offsets[index]:self.offsets[index + 1]]
+
+
+@lru_cache(maxsize=8)
+def neighbour_table(rows: int, cols: int) -> NeighbourTable:
+    """
+    预先计算每个格子的相邻格子
+
+    同一大小的游戏板共用一张表，查询相邻格子时不再需要边界检查。
+    每个格子约占36字节，只在第一次需要时构建。
+    """
+    offsets = array('i', [0])
+    indices = array('i')
+
+    def add_cell(row: int, col: int):
+        row_range = range(max(row - 1, 0), min(row + 2, rows))
+        col_range = range(max(col - 1, 0), min(col + 2, cols))
+        indices.extend(r * cols + c for r in row_range for c in col_range
+                       if r != row or c != col)
+        offsets.append(len(indices))
+
+    for row in range(rows):
+        add_cell(row, 0)
+        if cols > 2:
+            # 中间的格子相对位置相同，按列号成组生成，避免逐格的边界检查
+            bases = [r * cols for r in range(max(row - 1, 0), min(row + 2, rows))]
+            deltas = [base + dc - row * cols for base in bases for dc in (-1, 0, 1)
+                      if base != row * cols or dc != 0]
+            first = row * cols + 1
+            columns = [range(first + d, first + d + cols - 2) for d in deltas]
+            indices.extend(chain.from_iterable(zip(*columns)))
+            start = offsets[-1]
+            offsets.extend(range(start + len(deltas), start + len(deltas) * (cols - 2) + 1,
+                                 len(deltas)))
+        if cols > 1:
+            add_cell(row, cols - 1)
+    return NeighbourTable(offsets, indices)
+
+
+class OpeningIndex:
+    """
+    开口索引: 每片相连的空格 (开口) 连同其边界上的数字格子
+
+    开口k的格子为 cells[offsets[k]:offsets[k + 1]]，按从开口第一个空格开始的展开顺序排列；
+    一个数字格子可能同时在几个开口的边界上，因此会出现在几个范围中。
+    region[i] 为空格i所在的开口编号，其他格子以及已失效的开口中的空格为-1。
+    """
+
+    __slots__ = ('region', 'offsets', 'cells', 'dropped')
+
+    def __init__(self, region: array, offsets: array, cells: array):
+        self.region = region
+        self.offsets = offsets
+        self.cells = cells
+        # 移动地雷后失效的开口编号
+        self.dropped: Set[int] = set()
+
+    @property
+    def count(self) -> int:
+        """开口数"""
+        return len(self.offsets) - 1
+
+    def of(self, label: int) -> array:
+        """开口中的格子，包括边界"""
+        return self.cells[self.offsets[label]:self.offsets[label + 1]]
+
+    def sizes(self) -> List[int]:
+        """每个开口揭开的格子数，包括边界"""
+        offsets = self.offsets
+        return [offsets[k + 1] - offsets[k] for k in range(len(offsets) - 1)]
+
+    def nbytes(self) -> int:
+        """三个数组占用的内存"""
+        return sys.getsizeof(self.region) + sys.getsizeof(self.offsets) + sys.getsizeof(self.cells)
+
+    def drop_around(self, changed: List[int], neighbours: NeighbourTable):
+        """
+        周围地雷数即将改变的格子所在的开口失效，其中的空格改为逐格展开
+
+        格子是某个开口中的空格，或在某个开口的边界上 (与其中的空格相邻) 时，
+        该开口都会受影响；其他开口保持不变。耗时与失效开口的大小成正比。
+
+        Args:
+            changed: 周围地雷数将要改变的格子
+            neighbours: 相同大小游戏板的相邻格子表
+        """
+        region = self.region
+        offsets, indices = neighbours
+        labels = set()
+        for c in changed:
+            labels.add(region[c])
+            labels.update(region[n] for n in indices[offsets[c]:offsets[c + 1]])
+        labels.discard(-1)
+        for label in labels:
+            for i in self.of(label):
+                if region[i] == label:
+                    region[i] = -1
+        self.dropped |= labels
+
+
+def opening_index(values, neighbours: NeighbourTable) -> OpeningIndex:
+    """
+    一次线性扫描标记所有开口
+
+    按索引顺序找到还没有编号的空格，从它开始按队列展开整片开口，
+    把空格和边界依次追加到 cells，因此每个开口是一段连续的范围。
+    每个空格只展开一次，总耗时与格子数成正比。
+
+    Args:
+        values: 周围地雷数，-1表示地雷
+        neighbours: 相同大小游戏板的相邻格子表
+
+    Returns:
+        开口索引
+    """
+    size = len(values)
+    offsets_n, indices = neighbours
+    region = array('i', [-1]) * size
+    # 格子最近一次被加入的开口，避免边界格子在同一个开口中重复出现
+    stamp = array('i', [-1]) * size
+    offsets = array('i', [0])
+    cells = array('i')
+    # 用字节串的 find 跳过非空格，只在空格上进入Python循环
+    raw = bytes(values)
+
+    start = raw.find(0)
+    while start != -1:
+        if region[start] == -1:
+            label = len(offsets) - 1
+            region[start] = stamp[start] = label
+            cells.append(start)
+            # 遍历列表的同时追加新找到的空格，相当于队列
+            queue = [start]
+            for i in queue:
+                for n in indices[offsets_n[i]:offsets_n[i + 1]]:
+                    if stamp[n] != label:
+                        stamp[n] = label
+                        cells.append(n)
+                        if not raw[n]:
+                            region[n] = label
+                            queue.append(n)
+            offsets.append(len(cells))
+        start = raw.find(0, start + 1)
+
+    return OpeningIndex(region, offsets, cells)
+
+
+class GameEngine:
+    """
+    命令行版本和GUI版本共用的游戏状态和规则
+
+    所有格子按行展开存放在扁平数组中，索引为 row * cols + col；
+    相邻格子来自按游戏板大小缓存的 neighbour_table，不再逐格做边界检查。
+    每个操作返回变化集合 (ChangeSet)，由前端更新自己的显示。
+    """
+
+    # 同时保存大量游戏时 (见 minesweeper_store) 不为每个引擎分配属性字典
+    __slots__ = ('rows', 'cols', 'mines', 'neighbours', 'values', 'visible', 'mine_positions',
+                 'flags', 'flag_counts', 'cells_to_reveal', 'game_over', 'game_won', 'recorder',
+                 'openings')
+
+    def __init__(self, rows: int, cols: int, mines: int):
+        """
+        创建还没有放置地雷的游戏
+
+        Args:
+            rows: 行数
+            cols: 列数
+            mines: 地雷数量
+        """
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.neighbours = neighbour_table(rows, cols)
+
+        # 周围地雷数，-1表示地雷
+        self.values = array('b', bytes(rows * cols))
+        # 可见状态编码，见 CELL_* 常量
+        self.visible = bytearray([CELL_HIDDEN]) * (rows * cols)
+        # 地雷位置和已标记格子的扁平索引，游戏结束时只需遍历这些格子
+        self.mine_positions: List[int] = []
+        self.flags: Set[int] = set()
+        # 每个格子周围已标记的格子数，标记时增量维护，用于判断能否双击展开
+        self.flag_counts = bytearray(rows * cols)
+        # 开口索引，没有时逐格展开；由游戏板池在后台构建，或调用 index_openings() 构建
+        self.openings: Optional[OpeningIndex] = None
+
+        self.cells_to_reveal = rows * cols - mines
+        self.game_over = False
+        self.game_won = False
+
+        # 可选的操作录制器，在有效的揭开和标记操作生效前调用，见 minesweeper_replay.GameRecorder
+        self.recorder = None
+
+    def place_mines(self, rng: random.Random, avoid: Optional[Tuple[int, int]] = None,
+                    use_numpy: Optional[bool] = None) -> List[List[int]]:
+        """
+        放置地雷并计算周围地雷数
+
+        Args:
+            rng: 随机数生成器
+            avoid: 需要避开的格子(行, 列)，该格子及其周围8格不放地雷
+            use_numpy: 是否使用NumPy计算周围地雷数，None表示已安装时自动使用
+
+        Returns:
+            嵌套列表形式的游戏板，供需要 board[row][col] 的代码使用
+        """
+        board, positions = generate_board_and_mines(self.rows, self.cols, self.mines,
+                                                    rng, avoid, use_numpy)
+        self.set_board(board, positions)
+        return board
+
+    def set_board(self, board: List[List[int]], positions: List[int],
+                  openings: Optional[OpeningIndex] = None):
+        """
+        使用已有的游戏板
+
+        Args:
+            board: 游戏板，-1表示地雷，0-8表示周围地雷数
+            positions: 地雷位置的扁平索引列表
+            openings: 在别处 (例如游戏板池的后台线程) 预先构建的开口索引，
+                      None表示不使用，揭开空格时逐格展开
+        """
+        self.values = array('b', chain.from_iterable(board))
+        self.mine_positions = positions
+        self.cells_to_reveal = self.rows * self.cols - len(positions)
+        self.openings = openings
+
+    def move_mine(self, source: int, target: int):
+        """
+        把地雷从source移到没有地雷的target，只更新两处周围的计数
+
+        Raises:
+            ValueError: source不是地雷或target已经是地雷
+        """
+        values = self.values
+        if values[source] != -1 or values[target] == -1:
+            raise ValueError(f"不能把地雷从 {source} 移到 {target}")
+
+        offsets, indices = self.neighbours
+        if self.openings is not None:
+            # 只有两处周围的开口会改变，其余开口继续使用
+            changed = [source, target]
+            changed += indices[offsets[source]:offsets[source + 1]]
+            changed += indices[offsets[target]:offsets[target + 1]]
+            self.openings.drop_around(changed, self.neighbours)
+        values[target] = -1
+        for n in indices[offsets[target]:offsets[target + 1]]:
+            if values[n] != -1:
+                values[n] += 1
+        neighbours = indices[offsets[source]:offsets[source + 1]]
+        for n in neighbours:
+            if values[n] != -1:
+                values[n] -= 1
+        values[source] = sum(1 for n in neighbours if values[n] == -1)
+
+        positions = self.mine_positions
+        positions[positions.index(source)] = target
+
+    def reveal(self, index: int) -> ChangeSet:
+        """
+        揭开格子，空格自动展开
+
+        Returns:
+            变化集合，格子已揭开、已标记或游戏已结束时为空
+        """
+        if self.game_over or self.visible[index] != CELL_HIDDEN:
+            return []
+
+        if self.recorder is not None:
+            self.recorder.record(ACTION_REVEAL, *divmod(index, self.cols))
+
+        value = self.values[index]
+        if value == -1:
+            # 踩雷
+            self.visible[index] = CELL_MINE
+            self.game_over = True
+            return [(index, CELL_MINE)] + self.reveal_all_mines()
+
+        self.visible[index] = value
+        self.cells_to_reveal -= 1
+        changes = [(index, value)]
+        if value == 0:
+            changes += self.flood_fill(index)
+
+        if self.cells_to_reveal == 0:
+            self.game_won = True
+            self.game_over = True
+        return changes
+
+    def index_openings(self) -> OpeningIndex:
+        """
+        完整的开口索引，供统计开口数和大小使用
+
+        没有索引或移动地雷后有开口失效时扫描整个游戏板重新构建，
+        之后揭开空格直接使用这份索引。
+        """
+        if self.openings is None or self.openings.dropped:
+            self.openings = opening_index(self.values, self.neighbours)
+        return self.openings
+
+    def flood_fill(self, index: int) -> ChangeSet:
+        """
+        从空格index开始揭开相连的区域及其边界
+
+        有开口索引时直接揭开其中预先标记好的一段格子。没有索引、起点所在的开口
+        已失效，或开口中除起点外还有已揭开或已标记的空格时 (标记会挡住展开，
+        撤销和读档也可能留下这样的状态)，改用逐格展开，保证结果与逐格展开完全相同。
+        这里不构建索引，不在揭开时扫描整个游戏板。
+
+        Returns:
+            变化集合
+        """
+        openings = self.openings
+        label = -1 if openings is None else openings.region[index]
+        if label == -1:
+            return self.expand(index)
+
+        visible = self.visible
+        values = self.values
+        pending = []
+        for n in openings.of(label):
+            if visible[n] == CELL_HIDDEN:
+                pending.append(n)
+            elif values[n] == 0 and n != index:
+                return self.expand(index)
+
+        changes = [(n, values[n]) for n in pending]
+        for n, value in changes:
+            visible[n] = value
+        self.cells_to_reveal -= len(changes)
+        return changes
+
+    def expand(self, index: int) -> ChangeSet:
+        """
+        迭代式洪水填充，从空格index开始逐格揭开相连的区域及其边界
+
+        使用队列代替递归，任意大的空白区域都不会超出递归深度限制；
+        揭开后的格子不再入队，因此每个格子只会被揭开和入队一次。相邻格子直接取自CSR表。
+
+        Returns:
+            变化集合
+        """
+        visible = self.visible
+        values = self.values
+        offsets, indices = self.neighbours
+        changes = []
+        queue = deque([index])
+
+        while queue:
+            i = queue.popleft()
+            for n in indices[offsets[i]:offsets[i + 1]]:
+                # 已揭开或已标记的格子保持不变
+                if visible[n] != CELL_HIDDEN:
+                    continue
+                value = values[n]
+                visible[n] = value
+                changes.append((n, value))
+                if value == 0:
+                    queue.append(n)
+
+        self.cells_to_reveal -= len(changes)
+        return changes
+
+    def can_flag(self, index: int) -> bool:
+        """格子未揭开，且取消标记或标记数未达地雷总数"""
+        code = self.visible[index]
+        return code == CELL_FLAG or (code == CELL_HIDDEN and len(self.flags) < self.mines)
+
+    def flag(self, index: int) -> ChangeSet:
+        """
+        切换格子的标记状态
+
+        Returns:
+            变化集合，不能标记时 (见 can_flag) 为空
+        """
+        if self.game_over or not self.can_flag(index):
+            return []
+
+        if self.recorder is not None:
+            self.recorder.record(ACTION_FLAG, *divmod(index, self.cols))
+
+        if self.visible[index] == CELL_HIDDEN:
+            self.visible[index] = code = CELL_FLAG
+            self.flags.add(index)
+            delta = 1
+        else:
+            self.visible[index] = code = CELL_HIDDEN
+            self.flags.discard(index)
+            delta = -1
+
+        flag_counts = self.flag_counts
+        for n in self.neighbours.of(index):
+            flag_counts[n] += delta
+        return [(index, code)]
+
+    def chord(self, index: int) -> ChangeSet:
+        """
+        双击展开: 已揭开的数字周围的标记数等于该数字时，揭开周围其余未标记的格子
+
+        Returns:
+            变化集合，条件不满足时为空
+        """
+        value = self.visible[index]
+        if self.game_over or not 0 < value <= 8 or self.flag_counts[index] != value:
+            return []
+
+        changes = []
+        for n in self.neighbours.of(index):
+            if self.visible[n] == CELL_HIDDEN:
+                changes += self.reveal(n)
+                if self.game_over:
+                    break
+        return changes
+
+    def reveal_all_mines(self) -> ChangeSet:
+        """踩雷后显示所有地雷和错误标记，只访问地雷和已标记的格子"""
+        visible = self.visible
+        changes = []
+        for index in self.mine_positions:
+            if visible[index] == CELL_HIDDEN:  # 已正确标记的地雷不覆盖
+                visible[index] = CELL_MINE
+                changes.append((index, CELL_MINE))
+        for index in sorted(self.flags):
+            if self.values[index] != -1 and visible[index] == CELL_FLAG:
+                visible[index] = CELL_WRONG_FLAG
+                changes.append((index, CELL_WRONG_FLAG))
+        return changes
+
+    def restore(self, changes: ChangeSet, game_over: bool, game_won: bool) -> ChangeSet:
+        """
+        直接把格子设为指定的可见状态，用于撤销和重做
+
+        标记、周围标记数和剩余格子数只按变化的格子增量更新。
+
+        Args:
+            changes: 变化集合 [(格子索引, 新的可见状态编码)]
+            game_over: 恢复后游戏是否结束
+            game_won: 恢复后是否获胜
+
+        Returns:
+            实际发生变化的格子
+        """
+        visible = self.visible
+        flag_counts = self.flag_counts
+        offsets, indices = self.neighbours
+        applied = []
+        for index, code in changes:
+            old = visible[index]
+            if old == code:
+                continue
+            visible[index] = code
+            applied.append((index, code))
+
+            # 揭开的格子: 数字或获胜标记
+            self.cells_to_reveal += (old <= 8 or old == CELL_WIN) - (code <= 8 or code == CELL_WIN)
+
+            was_flag = old == CELL_FLAG or old == CELL_WRONG_FLAG
+            is_flag = code == CELL_FLAG or code == CELL_WRONG_FLAG
+            if was_flag != is_flag:
+                delta = 1 if is_flag else -1
+                if is_flag:
+                    self.flags.add(index)
+                else:
+                    self.flags.discard(index)
+                for n in indices[offsets[index]:offsets[index + 1]]:
+                    flag_counts[n] += delta
+
+        self.game_over = game_over
+        self.game_won = game_won
+        return applied
+
+    def load_visible(self, codes: bytes):
+        """从可见状态编码恢复游戏进度，标记、计数和游戏状态随之更新"""
+        self.visible = bytearray(codes)
+        self.flags = {i for i, code in enumerate(codes) if code == CELL_FLAG or code == CELL_WRONG_FLAG}
+        self.flag_counts = bytearray(self.rows * self.cols)
+        for index in self.flags:
+            for n in self.neighbours.of(index):
+                self.flag_counts[n] += 1
+
+        opened = len(codes) - sum(codes.count(code) for code in
+                                  (CELL_HIDDEN, CELL_FLAG, CELL_MINE, CELL_WRONG_FLAG))
+        self.cells_to_reveal = self.rows * self.cols - len(self.mine_positions) - opened
+        self.game_won = self.cells_to_reveal == 0
+        self.game_over = self.game_won or CELL_MINE in codes
+
+    def attach(self, values, visible, positions: List[int], flags: List[int],
+               cells_to_reveal: int, game_over: bool, game_won: bool):
+        """
+        使用外部保存的游戏状态，例如内存映射的存档，不扫描整个游戏板
+
+        Args:
+            values: 周围地雷数，支持按索引读写的有符号字节缓冲区
+            visible: 可见状态编码，支持按索引读写的字节缓冲区
+            positions: 地雷位置的扁平索引
+            flags: 已标记格子的扁平索引
+            cells_to_reveal: 剩余未揭开且非地雷的格子数
+            game_over: 游戏是否结束
+            game_won: 是否获胜
+        """
+        self.values = values
+        self.visible = visible
+        self.mine_positions = positions
+        # 不构建开口索引，逐格展开只读取访问到的页
+        self.openings = None
+        self.flags = set(flags)
+        # 周围标记数只需从标记位置重建
+        self.flag_counts = bytearray(self.rows * self.cols)
+        for index in self.flags:
+            for n in self.neighbours.of(index):
+                self.flag_counts[n] += 1
+        self.cells_to_reveal = cells_to_reveal
+        self.game_over = game_over
+        self.game_won = game_won
+
+    def board_rows(self) -> List[List[int]]:
+        """嵌套列表形式的游戏板"""
+        cols = self.cols
+        return [self.values[r * cols:(r + 1) * cols].tolist() for r in range(self.rows)]
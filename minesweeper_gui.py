@@ -6,19 +6,206 @@
 
 import tkinter as tk
 from tkinter import messagebox, font
+import argparse
+import os
 import random
 import time
 from typing import List, Tuple, Optional
 from enum import Enum
 
+from minesweeper_engine import (ACTION_REDO, ACTION_UNDO, CELL_FLAG, CELL_HIDDEN, CELL_MINE,
+                                CELL_WIN, CELL_WRONG_FLAG, GameEngine)
+from minesweeper_history import UndoLog
+from minesweeper_pool import DEFAULT_POOL_SIZE, BoardPool, clear_first_click, generate
+from minesweeper_save import DEFAULT_SAVE_PATH, SaveFile, save_game
+import minesweeper_metrics
+
+# 无猜模式等待游戏板池时的重试间隔 (毫秒)
+POOL_RETRY_MS = 20
+
 class GameState(Enum):
     """游戏状态枚举"""
     PLAYING = "playing"
     WON = "won"
     LOST = "lost"
+    GENERATING = "generating"  # 无猜模式等待后台线程生成游戏板，不响应点击
+
+class BoardCanvas:
+    """
+    游戏板渲染器
+
+    用一个Canvas绘制整个游戏板，根据点击的像素坐标找到格子，
+    每个格子记录当前显示的状态编码，只重绘状态变化的格子。
+    """
+
+    def __init__(self, parent, rows, cols, cell_size, colors):
+        """
+        创建游戏板画布
+
+        Args:
+            parent: 父容器
+            rows: 行数
+            cols: 列数
+            cell_size: 格子边长(像素)
+            colors: 颜色配置，与 MinesweeperGUI.colors 相同
+        """
+        self.colors = colors
+        self.canvas = tk.Canvas(parent, bg='#808080', bd=0, highlightthickness=0)
+        self.canvas.pack()
+
+        # 点击回调: callback(row, col)
+        self.on_left_click = None
+        self.on_right_click = None
+        self.on_middle_click = None
+
+        self.canvas.bind('<Button-1>', lambda e: self._dispatch(self.on_left_click, e))
+        self.canvas.bind('<Button-2>', lambda e: self._dispatch(self.on_middle_click, e))
+        self.canvas.bind('<Button-3>', lambda e: self._dispatch(self.on_right_click, e))
+        self.canvas.bind('<Motion>', self._on_motion)
+        self.canvas.bind('<Leave>', lambda e: self._set_hover(None))
+
+        self.resize(rows, cols, cell_size)
+
+    def resize(self, rows, cols, cell_size):
+        """改变游戏板大小，重新创建所有格子"""
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.font = ('Arial', max(cell_size * 2 // 5, 6), 'bold')
+
+        canvas = self.canvas
+        canvas.delete('all')
+        canvas.config(width=cols * cell_size, height=rows * cell_size)
+
+        # 每个格子一个矩形，文字在需要时才创建
+        self.rects = []
+        for i in range(rows):
+            y = i * cell_size
+            for j in range(cols):
+                x = j * cell_size
+                self.rects.append(canvas.create_rectangle(
+                    x, y, x + cell_size, y + cell_size,
+                    fill=self.colors['default'], outline='#808080', tags='cell'
+                ))
+
+        self.texts = [None] * (rows * cols)
+        self.codes = bytearray([CELL_HIDDEN]) * (rows * cols)
+        self.hover = None
+
+    def reset(self):
+        """把所有格子恢复为未揭开状态"""
+        self.canvas.delete('text')
+        self.canvas.itemconfig('cell', fill=self.colors['default'])
+        self.texts = [None] * (self.rows * self.cols)
+        self.codes = bytearray([CELL_HIDDEN]) * (self.rows * self.cols)
+        self.hover = None
+
+    def cell_at(self, x, y):
+        """像素坐标对应的格子(行, 列)，不在游戏板内返回None"""
+        row = int(self.canvas.canvasy(y)) // self.cell_size
+        col = int(self.canvas.canvasx(x)) // self.cell_size
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def update_cell(self, row, col, code):
+        """
+        显示格子的新状态，状态未变化时不做任何操作
+
+        Args:
+            row: 行
+            col: 列
+            code: 可见状态编码，见 minesweeper_engine 中的 CELL_* 常量
+        """
+        self._paint(row * self.cols + col, code)
+
+    def apply(self, changes):
+        """
+        一次性显示一次操作的全部变化
+
+        Args:
+            changes: 变化集合 [(格子索引, 可见状态编码)]，见 minesweeper_engine.ChangeSet
+        """
+        paint = self._paint
+        for index, code in changes:
+            paint(index, code)
+
+    def _paint(self, index, code):
+        """按扁平索引显示格子的新状态"""
+        if self.codes[index] == code:
+            return
+        self.codes[index] = code
+
+        colors = self.colors
+        if code == CELL_HIDDEN:
+            fill, text, fg = colors['default'], '', 'black'
+        elif code == CELL_FLAG:
+            fill, text, fg = colors['default'], '🚩', colors['flag']
+        elif code == CELL_MINE:
+            fill, text, fg = colors['mine'], '💣', 'black'
+        elif code == CELL_WRONG_FLAG:
+            fill, text, fg = colors['default'], '❌', 'black'
+        else:
+            fill = colors['revealed']
+            text = str(code) if code else ''
+            fg = colors['text'][code - 1] if code else 'black'
+
+        if index == self.hover and code in (CELL_HIDDEN, CELL_FLAG):
+            fill = colors['hover']
+        self.canvas.itemconfig(self.rects[index], fill=fill)
+        self._set_text(index, text, fg)
+
+    def _set_text(self, index, text, fg):
+        """设置格子文字，没有文字时删除文字对象"""
+        item = self.texts[index]
+        if not text:
+            if item is not None:
+                self.canvas.delete(item)
+                self.texts[index] = None
+            return
+
+        if item is None:
+            row, col = divmod(index, self.cols)
+            size = self.cell_size
+            self.texts[index] = self.canvas.create_text(
+                col * size + size // 2, row * size + size // 2,
+                text=text, fill=fg, font=self.font, tags='text'
+            )
+        else:
+            self.canvas.itemconfig(item, text=text, fill=fg)
+
+    def highlight(self, index, color):
+        """临时改变一个未揭开格子的底色，格子状态变化或鼠标经过时恢复"""
+        if self.codes[index] in (CELL_HIDDEN, CELL_FLAG):
+            self.canvas.itemconfig(self.rects[index], fill=color)
+
+    def _dispatch(self, callback, event):
+        """把点击事件转换为格子坐标并调用回调"""
+        cell = self.cell_at(event.x, event.y)
+        if callback is not None and cell is not None:
+            callback(*cell)
+
+    def _on_motion(self, event):
+        """鼠标移动时高亮所在的未揭开格子"""
+        cell = self.cell_at(event.x, event.y)
+        self._set_hover(None if cell is None else cell[0] * self.cols + cell[1])
+
+    def _set_hover(self, index):
+        """切换高亮的格子，只重绘前后两个格子"""
+        if index == self.hover:
+            return
+
+        previous, self.hover = self.hover, index
+        for i in (previous, index):
+            if i is not None and self.codes[i] in (CELL_HIDDEN, CELL_FLAG):
+                color = self.colors['hover'] if i == index else self.colors['default']
+                self.canvas.itemconfig(self.rects[i], fill=color)
+
 
 class MinesweeperGUI:
-    def __init__(self, master, rows=10, cols=10, mines=10):
+    def __init__(self, master, rows=10, cols=10, mines=10, seed=None, record_dir=None,
+                 no_guess=False, pool_size=DEFAULT_POOL_SIZE, save_path=DEFAULT_SAVE_PATH,
+                 autosave=0):
         """
         初始化GUI扫雷游戏
 
@@ -27,11 +214,36 @@ class MinesweeperGUI:
             rows: 行数
             cols: 列数
             mines: 地雷数量
+            seed: 随机种子，决定游戏板池中各块游戏板的种子，相同种子和首次点击位置生成相同的游戏板
+            record_dir: 录像目录，指定后每局游戏录制为 game_<种子>.msr
+            no_guess: 是否只生成从第一次点击开始靠推理就能完成的游戏板
+            pool_size: 每种难度在后台预先生成的游戏板数，0表示在界面线程上生成
+            save_path: Ctrl+S 保存和 Ctrl+O 读取的存档路径
+            autosave: 自动保存的间隔(秒)，0表示不自动保存
         """
         self.master = master
         self.rows = rows
         self.cols = cols
         self.mines = mines
+        self.rng = random.Random(seed)
+        self.seed = None  # 本局游戏板的种子，取得游戏板时确定
+
+        # 预先生成的游戏板，新游戏和第一次点击时直接取用
+        self.pool = BoardPool(pool_size, seed=self.rng.randrange(1 << 32)) if pool_size else None
+
+        # 录像
+        self.record_dir = record_dir
+
+        # 存档，每局第一次保存时完整写入，之后只写回变化过的页
+        self.save_path = save_path
+        self.save_file = None
+        self.autosave = autosave
+
+        # 无猜模式，在界面上可以切换，每局开始时确定
+        self.no_guess = tk.BooleanVar(master, value=no_guess)
+        self.game_no_guess = no_guess
+        # 等待游戏板池时定时重试的 after 回调
+        self.pending_board = None
 
         # 游戏状态
         self.game_state = GameState.PLAYING
@@ -39,12 +251,10 @@ class MinesweeperGUI:
         self.start_time = None
         self.elapsed_time = 0
 
-        # 游戏数据
-        self.board: List[List[int]] = []  # -1表示地雷, 0-8表示周围地雷数
-        self.revealed: List[List[bool]] = []  # 是否已揭开
-        self.flagged: List[List[bool]] = []  # 是否已标记
-        self.cells_to_reveal = rows * cols - mines  # 需要揭开的格子数
-        self.flag_count = 0  # 已标记的格子数
+        # 游戏数据和规则，与命令行版本共用，见 minesweeper_engine.GameEngine
+        self.engine = GameEngine(rows, cols, mines)
+        # 撤销日志，每局开始时重新创建
+        self.history = UndoLog(self.engine)
 
         # 颜色配置
         self.colors = {
@@ -54,11 +264,14 @@ class MinesweeperGUI:
             'flag': '#0000ff',
             'text': ['#000080', '#008000', '#ff0000', '#000080', '#800000',
                     '#008080', '#000000', '#808080', '#000000'],
-            'hover': '#d0d0d0'
+            'hover': '#d0d0d0',
+            'hint': '#90ee90'
         }
 
         self.setup_ui()
         self.new_game()
+        if autosave:
+            self.master.after(autosave * 1000, self.autosave_tick)
 
     def setup_ui(self):
         """设置用户界面"""
@@ -148,35 +361,39 @@ class MinesweeperGUI:
             )
             btn.pack(side=tk.LEFT, padx=2)
 
+        # 无猜模式开关，从下一局开始生效
+        tk.Checkbutton(control_frame, text="无猜", variable=self.no_guess, bg='#c0c0c0',
+                       command=self.prepare_next_game).pack(side=tk.RIGHT)
+
+        # 提示按钮：高亮地雷概率最低的格子
+        tk.Button(control_frame, text="提示", width=6, command=self.show_hint).pack(side=tk.RIGHT)
+
+        # 撤销和重做，也可以用 Ctrl+Z / Ctrl+Y
+        tk.Button(control_frame, text="重做", width=6, command=self.redo).pack(side=tk.RIGHT)
+        tk.Button(control_frame, text="撤销", width=6, command=self.undo).pack(side=tk.RIGHT)
+        self.master.bind('<Control-z>', lambda e: self.undo())
+        self.master.bind('<Control-y>', lambda e: self.redo())
+
+        # 保存和读取存档
+        self.master.bind('<Control-s>', lambda e: self.save())
+        self.master.bind('<Control-o>', lambda e: self.load())
+
     def create_game_panel(self, parent):
         """创建游戏面板"""
         self.game_frame = tk.Frame(parent, bg='#808080', relief=tk.SUNKEN, bd=3)
         self.game_frame.pack()
 
-        self.buttons = []
-        for i in range(self.rows):
-            row_buttons = []
-            for j in range(self.cols):
-                btn = tk.Button(
-                    self.game_frame,
-                    width=2,
-                    height=1,
-                    font=('Arial', 10, 'bold'),
-                    relief=tk.RAISED,
-                    bd=2,
-                    bg=self.colors['default'],
-                    command=lambda r=i, c=j: self.on_left_click(r, c),
-                    activebackground='#e0e0e0'
-                )
-
-                # 绑定右键事件
-                btn.bind('<Button-3>', lambda e, r=i, c=j: self.on_right_click(r, c))
-                btn.bind('<Enter>', lambda e, b=btn: b.config(bg=self.colors['hover']))
-                btn.bind('<Leave>', lambda e, b=btn: b.config(bg=self.colors['default']))
-
-                btn.grid(row=i, column=j, padx=1, pady=1)
-                row_buttons.append(btn)
-            self.buttons.append(row_buttons)
+        self.board_view = BoardCanvas(self.game_frame, self.rows, self.cols,
+                                      self.cell_size(), self.colors)
+        self.board_view.on_left_click = self.on_left_click
+        self.board_view.on_right_click = self.on_right_click
+        self.board_view.on_middle_click = self.on_middle_click
+
+    def cell_size(self):
+        """根据屏幕大小计算格子边长，使大游戏板也能完整显示"""
+        max_width = self.master.winfo_screenwidth() * 9 // 10
+        max_height = self.master.winfo_screenheight() * 3 // 4
+        return max(min(24, max_width // self.cols, max_height // self.rows), 6)
 
     def new_game(self):
         """开始新游戏"""
@@ -185,31 +402,43 @@ class MinesweeperGUI:
         self.first_click = True
         self.start_time = None
         self.elapsed_time = 0
-        self.flag_count = 0
+        self.seed = None
+        self.game_no_guess = self.no_guess.get()
+        self.cancel_pending_board()
+        self.stop_recording()
+        self.close_save()
 
         # 重置计时器
         self.timer_var.set("000")
         self.mine_counter_var.set(f"{self.mines:03d}")
 
-        # 更新笑脸按钮
+        # 更新笑脸按钮，清除标题栏中的提示
         self.new_game_btn.config(text='😊')
+        self.master.title("扫雷游戏")
+
+        # 初始化游戏数据，普通模式的地雷在第一次点击时放置
+        self.engine = GameEngine(self.rows, self.cols, self.mines)
+
+        # 重置游戏板外观
+        self.board_view.reset()
+
+        self.history = UndoLog(self.engine)
+        if self.game_no_guess:
+            self.start_no_guess()
+        elif self.pool is not None:
+            # 让后台线程在玩家点击前准备好这种难度的游戏板
+            self.pool.prepare(self.pool_key())
 
-        # 初始化游戏数据
-        self.board = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
-        self.revealed = [[False for _ in range(self.cols)] for _ in range(self.rows)]
-        self.flagged = [[False for _ in range(self.cols)] for _ in range(self.rows)]
-        self.cells_to_reveal = self.rows * self.cols - self.mines
-
-        # 重置按钮外观
-        for i in range(self.rows):
-            for j in range(self.cols):
-                self.buttons[i][j].config(
-                    text='',
-                    bg=self.colors['default'],
-                    fg='black',
-                    relief=tk.RAISED,
-                    state=tk.NORMAL
-                )
+    def prepare_next_game(self):
+        """切换无猜模式时，让后台线程为下一局的模式准备游戏板"""
+        if self.pool is not None:
+            self.pool.prepare((self.rows, self.cols, self.mines, self.no_guess.get()))
+
+    def cancel_pending_board(self):
+        """取消等待游戏板池的重试"""
+        if self.pending_board is not None:
+            self.master.after_cancel(self.pending_board)
+            self.pending_board = None
 
     def change_difficulty(self, rows, cols, mines):
         """改变游戏难度"""
@@ -217,42 +446,100 @@ class MinesweeperGUI:
         self.cols = cols
         self.mines = mines
 
-        # 重建游戏面板
-        self.game_frame.destroy()
-        self.create_game_panel(self.master)
+        # 调整游戏面板大小
+        self.board_view.resize(rows, cols, self.cell_size())
 
         self.new_game()
 
+    def pool_key(self):
+        """当前难度在游戏板池中的键"""
+        return (self.rows, self.cols, self.mines, self.game_no_guess)
+
+    def take_board(self):
+        """取一块预先生成的游戏板，没有游戏板池时当场生成"""
+        if self.pool is not None:
+            pooled = self.pool.take(self.pool_key())
+        else:
+            pooled = generate(self.pool_key(), self.rng.randrange(1 << 32))
+        return self.use_board(pooled)
+
+    def use_board(self, pooled):
+        """把取得的游戏板放入引擎，返回该游戏板"""
+        self.engine.set_board(pooled.board, pooled.positions, pooled.openings)
+        self.seed = pooled.seed
+        return pooled
+
     def place_mines(self, avoid_row, avoid_col):
-        """放置地雷，避开第一次点击的位置"""
-        mines_placed = 0
-
-        while mines_placed < self.mines:
-            row = random.randint(0, self.rows - 1)
-            col = random.randint(0, self.cols - 1)
-
-            # 避开第一次点击的位置及其周围8格
-            if abs(row - avoid_row) <= 1 and abs(col - avoid_col) <= 1:
-                continue
-
-            if self.board[row][col] != -1:
-                self.board[row][col] = -1
-                mines_placed += 1
-
-                # 更新周围格子的地雷计数
-                for dr in [-1, 0, 1]:
-                    for dc in [-1, 0, 1]:
-                        if dr == 0 and dc == 0:
-                            continue
-                        new_row, new_col = row + dr, col + dc
-                        if (0 <= new_row < self.rows and
-                            0 <= new_col < self.cols and
-                            self.board[new_row][new_col] != -1):
-                            self.board[new_row][new_col] += 1
-
-        # 重新计算需要揭开的格子数（实际地雷数量可能因为避开策略而略有调整）
-        actual_mines = sum(row.count(-1) for row in self.board)
-        self.cells_to_reveal = self.rows * self.cols - actual_mines
+        """放置地雷，把第一次点击的位置及其周围的地雷移到别处"""
+        self.take_board()
+        clear_first_click(self.engine, avoid_row, avoid_col, random.Random(self.seed))
+
+    def start_no_guess(self):
+        """
+        无猜模式: 开局时取得游戏板并揭开它的起点，之后只靠推理就能完成
+
+        游戏板池还没有这种难度的游戏板时 (例如刚启动或刚切换难度)，先显示未揭开的
+        游戏板并定时重试，由后台线程生成，不在界面线程上生成。
+        """
+        self.pending_board = None
+        if self.pool is None:
+            pooled = self.take_board()
+        else:
+            pooled = self.pool.try_take(self.pool_key())
+            if pooled is None:
+                self.game_state = GameState.GENERATING
+                self.master.title("扫雷游戏 - 无猜 (正在生成游戏板...)")
+                self.pending_board = self.master.after(POOL_RETRY_MS, self.start_no_guess)
+                return
+            self.use_board(pooled)
+
+        self.game_state = GameState.PLAYING
+        row, col = pooled.start
+        self.apply(self.engine.reveal(row * self.cols + col))
+        # 开局揭开的起点不能撤销
+        self.history = UndoLog(self.engine)
+
+        result = pooled.generation
+        self.master.title(f"扫雷游戏 - 无猜 (尝试 {result.attempts} 块, 修补 {result.repairs} 次, "
+                          f"{result.elapsed * 1000:.0f} ms)")
+        # 很小的游戏板可能一开局就全部揭开
+        self.check_game_over()
+
+    @property
+    def board(self) -> List[List[int]]:
+        """嵌套列表形式的游戏板，-1表示地雷, 0-8表示周围地雷数，供录像使用"""
+        return self.engine.board_rows()
+
+    @property
+    def cells_to_reveal(self) -> int:
+        """剩余未揭开且非地雷的格子数"""
+        return self.engine.cells_to_reveal
+
+    @property
+    def flag_count(self) -> int:
+        """已标记的格子数"""
+        return len(self.engine.flags)
+
+    def start_recording(self):
+        """开始录制本局游戏（仅在指定录像目录时）"""
+        if self.record_dir is None:
+            return
+
+        # 延迟导入，未录制时不加载录像模块
+        from minesweeper_replay import GameRecorder
+        path = os.path.join(self.record_dir, f"game_{self.seed}.msr")
+        # 引擎在每个有效的揭开和标记操作生效前记录
+        self.engine.recorder = GameRecorder(path, self)
+
+    def stop_recording(self):
+        """结束录制并写完录像文件"""
+        if self.engine.recorder is not None:
+            self.engine.recorder.close()
+            self.engine.recorder = None
+
+    def visible_codes(self):
+        """按行展开的可见状态编码，见 minesweeper_engine 中的 CELL_* 常量"""
+        return bytearray(self.engine.visible)
 
     def start_timer(self):
         """开始计时"""
@@ -271,121 +558,212 @@ class MinesweeperGUI:
         if self.game_state != GameState.PLAYING:
             return
 
-        if self.revealed[row][col] or self.flagged[row][col]:
+        if self.engine.visible[row * self.cols + col] != CELL_HIDDEN:
             return
 
-        # 第一次点击时放置地雷
+        # 第一次点击时放置地雷，无猜模式在开局时已经放置
         if self.first_click:
-            self.place_mines(row, col)
+            if not self.game_no_guess:
+                self.place_mines(row, col)
             self.first_click = False
             self.start_timer()
+            self.start_recording()
 
-        self.reveal_cell(row, col)
+        self.apply(self.record(self.reveal_cell(row, col)))
+        self.check_game_over()
 
     def on_right_click(self, row, col):
         """处理右键点击"""
         if self.game_state != GameState.PLAYING:
             return
 
-        if self.revealed[row][col]:
+        if self.engine.visible[row * self.cols + col] not in (CELL_HIDDEN, CELL_FLAG):
             return
 
-        self.toggle_flag(row, col)
+        self.apply(self.record(self.toggle_flag(row, col)))
 
-    def reveal_cell(self, row, col):
-        """揭开指定格子"""
-        if self.revealed[row][col] or self.flagged[row][col]:
+    def on_middle_click(self, row, col):
+        """处理中键点击: 数字周围的标记数等于该数字时，揭开周围其余格子"""
+        if self.game_state != GameState.PLAYING:
             return
 
-        self.revealed[row][col] = True
-        btn = self.buttons[row][col]
+        self.apply(self.record(self.engine.chord(row * self.cols + col)))
+        self.check_game_over()
 
-        # 踩雷
-        if self.board[row][col] == -1:
-            btn.config(
-                text='💣',
-                bg=self.colors['mine'],
-                relief=tk.SUNKEN
-            )
-            self.game_over(False)
-            return
+    def apply(self, changes):
+        """重绘变化的格子，并记下存档中需要写回的页"""
+        self.board_view.apply(changes)
+        if self.save_file is not None:
+            self.save_file.mark(changes)
 
-        # 正常格子
-        self.cells_to_reveal -= 1
+    def current_elapsed(self):
+        """本局的用时(秒)"""
+        if self.start_time is None:
+            return 0.0
+        if self.game_state != GameState.PLAYING:
+            return float(self.elapsed_time)
+        return time.time() - self.start_time
 
-        if self.board[row][col] == 0:
-            # 空格子 - 洪水填充
-            btn.config(
-                bg=self.colors['revealed'],
-                relief=tk.SUNKEN
-            )
-            self.flood_fill(row, col)
-        else:
-            # 数字格子
-            btn.config(
-                text=str(self.board[row][col]),
-                bg=self.colors['revealed'],
-                fg=self.colors['text'][self.board[row][col] - 1],
-                relief=tk.SUNKEN
-            )
+    def save(self, quiet=False):
+        """
+        保存进度到 save_path，每局第一次完整写入，之后只写回变化过的页
 
-        # 检查胜利条件
-        if self.cells_to_reveal == 0:
-            self.game_over(True)
-
-    def flood_fill(self, row, col):
-        """洪水填充算法"""
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                new_row, new_col = row + dr, col + dc
-
-                if (0 <= new_row < self.rows and
-                    0 <= new_col < self.cols and
-                    not self.revealed[new_row][new_col] and
-                    not self.flagged[new_row][new_col]):
-
-                    self.revealed[new_row][new_col] = True
-                    self.cells_to_reveal -= 1
-
-                    btn = self.buttons[new_row][new_col]
-                    if self.board[new_row][new_col] == 0:
-                        btn.config(
-                            bg=self.colors['revealed'],
-                            relief=tk.SUNKEN
-                        )
-                        self.flood_fill(new_row, new_col)
-                    else:
-                        btn.config(
-                            text=str(self.board[new_row][new_col]),
-                            bg=self.colors['revealed'],
-                            fg=self.colors['text'][self.board[new_row][new_col] - 1],
-                            relief=tk.SUNKEN
-                        )
+        Args:
+            quiet: 自动保存时不弹出提示
+        """
+        if self.first_click:
+            if not quiet:
+                messagebox.showinfo("保存", "游戏还没有开始")
+            return
+        if self.save_file is None:
+            self.save_file = save_game(self.save_path, self.engine, self.seed, self.current_elapsed())
+        else:
+            self.save_file.save(self.engine, self.current_elapsed())
+        if not quiet:
+            self.master.title(f"扫雷游戏 - 已保存到 {self.save_path}")
+
+    def autosave_tick(self):
+        """定时自动保存进行中的游戏"""
+        if self.game_state == GameState.PLAYING and not self.first_click:
+            self.save(quiet=True)
+        self.master.after(self.autosave * 1000, self.autosave_tick)
+
+    def load(self):
+        """从 save_path 读取存档继续游戏，游戏板和可见状态按需从映射中读入"""
+        try:
+            save_file = SaveFile(self.save_path)
+        except (OSError, ValueError) as e:
+            messagebox.showwarning("读取", f"无法读取存档: {e}")
+            return
 
-    def toggle_flag(self, row, col):
-        """切换标记状态"""
-        btn = self.buttons[row][col]
-
-        if self.flagged[row][col]:
-            # 取消标记
-            self.flagged[row][col] = False
-            self.flag_count -= 1
-            btn.config(text='')
+        self.cancel_pending_board()
+        self.stop_recording()
+        self.close_save()
+        if (save_file.rows, save_file.cols) != (self.rows, self.cols):
+            self.rows, self.cols = save_file.rows, save_file.cols
+            self.board_view.resize(self.rows, self.cols, self.cell_size())
+        self.mines = save_file.mines
+        self.engine = save_file.engine()
+        self.history = UndoLog(self.engine)
+        self.save_file = save_file
+        self.seed = save_file.seed
+        self.first_click = False
+
+        self.board_view.reset()
+        # 命令行版本获胜时把最后揭开的格子记为 CELL_WIN，这里按它的数字显示
+        values = self.engine.values
+        self.board_view.apply([(i, values[i] if code == CELL_WIN else code)
+                               for i, code in enumerate(self.engine.visible)
+                               if code != CELL_HIDDEN])
+        self.mine_counter_var.set(f"{self.mines - self.flag_count:03d}")
+        self.elapsed_time = int(save_file.elapsed)
+        self.timer_var.set(f"{min(self.elapsed_time, 999):03d}")
+        self.master.title(f"扫雷游戏 - 已读取 {self.save_path}")
+
+        if self.engine.game_over:
+            self.game_state = GameState.WON if self.engine.game_won else GameState.LOST
+            self.new_game_btn.config(text='😎' if self.engine.game_won else '😵')
+            self.start_time = None
         else:
-            # 添加标记
-            if self.flag_count >= self.mines:
-                messagebox.showwarning("提示", "标记数量已达地雷总数！")
-                return
+            self.game_state = GameState.PLAYING
+            self.new_game_btn.config(text='😊')
+            self.start_time = time.time() - save_file.elapsed
+            self.update_timer()
+
+    def close_save(self):
+        """关闭本局的存档，下一次保存重新完整写入"""
+        if self.save_file is not None:
+            self.save_file.close()
+            self.save_file = None
+
+    def record(self, changes):
+        """把一次操作的变化集合记入撤销日志，原样返回"""
+        self.history.record(changes)
+        return changes
+
+    def undo(self):
+        """撤销最近一次操作，只在游戏进行中可用"""
+        if self.game_state != GameState.PLAYING or not self.history.can_undo():
+            return
+        if self.engine.recorder is not None:
+            self.engine.recorder.record(ACTION_UNDO, 0, 0)
+        self.apply(self.history.undo())
+        self.mine_counter_var.set(f"{self.mines - self.flag_count:03d}")
 
-            self.flagged[row][col] = True
-            self.flag_count += 1
-            btn.config(text='🚩', fg=self.colors['flag'])
+    def redo(self):
+        """重做最近一次撤销的操作，重做获胜的一步时结束游戏"""
+        if self.game_state != GameState.PLAYING or not self.history.can_redo():
+            return
+        if self.engine.recorder is not None:
+            self.engine.recorder.record(ACTION_REDO, 0, 0)
+        self.apply(self.history.redo())
+        self.mine_counter_var.set(f"{self.mines - self.flag_count:03d}")
+        self.check_game_over()
 
+    def show_hint(self):
+        """计算每个未揭开格子的地雷概率，高亮最安全的格子并在标题栏显示概率"""
+        if self.game_state != GameState.PLAYING or self.first_click:
+            return
+
+        # 延迟导入，不使用提示时不加载概率模块
+        from minesweeper_probability import game_probabilities, safest_cell
+        try:
+            probabilities = game_probabilities(self)
+        except ValueError:
+            messagebox.showwarning("提示", "标记与数字矛盾，请检查标记！")
+            return
+
+        index = safest_cell(probabilities)
+        if index is None:
+            return
+        row, col = divmod(index, self.cols)
+        self.board_view.highlight(index, self.colors['hint'])
+        self.master.title(f"扫雷游戏 - 提示: ({row}, {col}) 地雷概率 {probabilities[index]:.1%}")
+
+    def check_game_over(self):
+        """先画出整次操作的结果，再弹出提示"""
+        if self.engine.game_over:
+            self.game_over(self.engine.game_won)
+
+    def reveal_cell(self, row, col):
+        """
+        揭开指定格子，只更新游戏状态，不操作界面
+
+        Returns:
+            变化集合 [(格子索引, 可见状态编码)]
+        """
+        return self.engine.reveal(row * self.cols + col)
+
+    def reveal_all_mines(self):
+        """踩雷后显示所有地雷和错误标记，返回变化集合，只访问地雷和已标记的格子"""
+        return self.engine.reveal_all_mines()
+
+    def toggle_flag(self, row, col):
+        """切换标记状态，返回变化集合"""
+        if not self.engine.can_flag(row * self.cols + col):
+            messagebox.showwarning("提示", "标记数量已达地雷总数！")
+            return []
+
+        changes = self.engine.flag(row * self.cols + col)
         self.mine_counter_var.set(f"{self.mines - self.flag_count:03d}")
+        return changes
+
+    def close(self):
+        """结束录制、关闭存档并停止后台生成，返回游戏板池的计数"""
+        self.cancel_pending_board()
+        self.stop_recording()
+        self.close_save()
+        if self.pool is None:
+            return None
+        self.pool.close()
+        return self.pool.stats()
 
     def game_over(self, won):
-        """游戏结束"""
+        """游戏结束，棋盘上的地雷已由 reveal_cell 的变化集合画出"""
         self.game_state = GameState.WON if won else GameState.LOST
+        self.stop_recording()
+        if minesweeper_metrics.is_enabled():
+            print(minesweeper_metrics.report())
 
         # 更新笑脸
         self.new_game_btn.config(text='😎' if won else '😵')
@@ -393,38 +771,81 @@ class MinesweeperGUI:
         if won:
             messagebox.showinfo("恭喜", "🎉 恭喜你，扫雷成功！")
         else:
-            # 显示所有地雷
-            for i in range(self.rows):
-                for j in range(self.cols):
-                    if self.board[i][j] == -1 and not self.flagged[i][j]:
-                        self.buttons[i][j].config(
-                            text='💣',
-                            bg=self.colors['mine'],
-                            relief=tk.SUNKEN
-                        )
-                    elif self.flagged[i][j] and self.board[i][j] != -1:
-                        self.buttons[i][j].config(text='❌')
-
             messagebox.showwarning("游戏结束", "💣 很遗憾，你踩到地雷了！")
 
-def main():
-    """主函数"""
-    root = tk.Tk()
+# 启用 minesweeper_metrics 时计时: 取得游戏板和重绘
+minesweeper_metrics.register(MinesweeperGUI, 'take_board', 'init_board')
+minesweeper_metrics.register(BoardCanvas, 'reset', 'repaint')
+minesweeper_metrics.register(BoardCanvas, 'apply', 'repaint')
+
+def open_game(root, rows=10, cols=10, mines=10, seed=None, record_dir=None, no_guess=False,
+              pool_size=DEFAULT_POOL_SIZE, save_path=DEFAULT_SAVE_PATH, autosave=0):
+    """
+    在已有的主窗口中打开游戏并居中显示，启动器和 main() 共用
+
+    Args:
+        root: tkinter主窗口，可以是启动器用过的窗口
+        其余参数同 MinesweeperGUI
+
+    Returns:
+        MinesweeperGUI 实例
+    """
     root.configure(bg='#c0c0c0')
+    root.geometry('')  # 取消之前窗口设置的固定大小
+
+    # 创建游戏，窗口大小随游戏板自动调整
+    game = MinesweeperGUI(root, rows, cols, mines, seed=seed, record_dir=record_dir,
+                          no_guess=no_guess, pool_size=pool_size, save_path=save_path,
+                          autosave=autosave)
 
     # 设置窗口位置在屏幕中央
     root.update_idletasks()
-    width = 400
-    height = 500
+    width = root.winfo_reqwidth()
+    height = root.winfo_reqheight()
     x = (root.winfo_screenwidth() // 2) - (width // 2)
     y = (root.winfo_screenheight() // 2) - (height // 2)
-    root.geometry(f'{width}x{height}+{x}+{y}')
+    root.geometry(f'+{x}+{y}')
 
-    # 创建游戏
-    game = MinesweeperGUI(root)
+    return game
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="扫雷游戏 - GUI版本")
+    parser.add_argument('--rows', type=int, default=10, help="行数")
+    parser.add_argument('--cols', type=int, default=10, help="列数")
+    parser.add_argument('--mines', type=int, default=10, help="地雷数量")
+    parser.add_argument('--seed', type=int, help="随机种子")
+    parser.add_argument('--record-dir', metavar='DIR', help="把每局游戏录制到该目录")
+    parser.add_argument('--no-guess', action='store_true', help="只生成靠推理就能完成的游戏板")
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                        help="每种难度在后台预先生成的游戏板数，0表示不预先生成")
+    parser.add_argument('--pool-stats', action='store_true', help="退出时输出游戏板池的命中和补充延迟")
+    parser.add_argument('--save', metavar='PATH', default=DEFAULT_SAVE_PATH,
+                        help=f"Ctrl+S 保存和 Ctrl+O 读取的存档路径，默认为 {DEFAULT_SAVE_PATH}")
+    parser.add_argument('--load', metavar='PATH', help="读取存档继续游戏，之后保存到同一存档")
+    parser.add_argument('--autosave', type=int, default=0, metavar='SECONDS',
+                        help="每隔若干秒自动保存，0表示不自动保存")
+    parser.add_argument('--stats', action='store_true', help="统计各操作的次数和用时，每局结束时输出")
+    args = parser.parse_args()
+
+    if args.stats:
+        minesweeper_metrics.enable()
+
+    root = tk.Tk()
+    game = open_game(root, args.rows, args.cols, args.mines,
+                     seed=args.seed, record_dir=args.record_dir, no_guess=args.no_guess,
+                     pool_size=args.pool_size, save_path=args.load or args.save,
+                     autosave=args.autosave)
+    if args.load:
+        game.load()
 
     # 运行主循环
     root.mainloop()
+    stats = game.close()
+    if args.pool_stats and stats is not None:
+        print(f"游戏板池: 命中 {stats['hits']}, 未命中 {stats['misses']}, "
+              f"补充 {stats['refills']} 次, 平均延迟 {stats['refill_avg_ms']:.1f} ms, "
+              f"最长 {stats['refill_max_ms']:.1f} ms")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
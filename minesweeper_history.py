@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+撤销和重做
+每次操作只记录变化的格子 (索引、原编码、新编码)，撤销时按原编码写回，
+不复制游戏板或可见状态。日志超过内存上限时，最旧的记录合并成检查点。
+"""
+
+from array import array
+from collections import deque
+from typing import Deque, Optional
+
+from minesweeper_engine import ChangeSet, GameEngine
+
+# 撤销日志的默认内存上限 (字节)
+DEFAULT_MAX_BYTES = 1 << 20
+
+
+class Delta:
+    """一次操作 (或合并后的多次操作) 改变的格子"""
+
+    __slots__ = ('indices', 'old', 'new', 'before', 'after', 'moves')
+
+    def __init__(self, indices: array, old: bytes, new: bytes,
+                 before: tuple, after: tuple, moves: int = 1):
+        self.indices = indices  # 格子索引
+        self.old = old          # 操作前的可见状态编码
+        self.new = new          # 操作后的可见状态编码
+        self.before = before    # 操作前的 (game_over, game_won)
+        self.after = after      # 操作后的 (game_over, game_won)
+        self.moves = moves      # 包含的操作数，大于1表示检查点
+
+    @property
+    def nbytes(self) -> int:
+        """占用的数据字节数"""
+        return len(self.indices) * self.indices.itemsize + len(self.old) + len(self.new)
+
+    def merge(self, later: 'Delta') -> 'Delta':
+        """与之后的一条记录合并: 每个格子保留最早的原编码和最晚的新编码"""
+        old = dict(zip(self.indices, self.old))
+        new = dict(zip(self.indices, self.new))
+        for index, before, after in zip(later.indices, later.old, later.new):
+            old.setdefault(index, before)
+            new[index] = after
+
+        # 先变化后又恢复原状的格子不需要保留
+        indices = array('i', (i for i in old if old[i] != new[i]))
+        return Delta(indices, bytes(old[i] for i in indices), bytes(new[i] for i in indices),
+                     self.before, later.after, self.moves + later.moves)
+
+
+class UndoLog:
+    def __init__(self, engine: GameEngine, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        为游戏引擎创建撤销日志
+
+        Args:
+            engine: 游戏引擎，每次操作后用 record() 记录其变化集合
+            max_bytes: 撤销和重做记录的内存上限
+        """
+        self.engine = engine
+        self.max_bytes = max_bytes
+        self.undo_stack: Deque[Delta] = deque()
+        self.redo_stack: Deque[Delta] = deque()
+        self.nbytes = 0
+        # 上次记录时的可见状态和游戏状态，用来得到每个格子的原编码
+        self.shadow = bytearray(engine.visible)
+        self.state = (engine.game_over, engine.game_won)
+
+    def record(self, changes: ChangeSet):
+        """
+        记录一次操作，在操作完成后调用
+
+        Args:
+            changes: 操作返回的变化集合，同一格子可以出现多次
+        """
+        if not changes:
+            return
+
+        shadow = self.shadow
+        old = {}
+        for index, code in changes:
+            if index not in old:
+                old[index] = shadow[index]
+            shadow[index] = code
+
+        indices = array('i', (i for i in old if old[i] != shadow[i]))
+        after = (self.engine.game_over, self.engine.game_won)
+        delta = Delta(indices, bytes(old[i] for i in indices), bytes(shadow[i] for i in indices),
+                      self.state, after)
+        self.state = after
+
+        # 新的操作使重做记录失效
+        self.nbytes -= sum(d.nbytes for d in self.redo_stack)
+        self.redo_stack.clear()
+        self.undo_stack.append(delta)
+        self.nbytes += delta.nbytes
+        self._trim()
+
+    def _trim(self):
+        """
+        超过内存上限时把最旧的两条记录合并成检查点
+
+        检查点最多包含整个游戏板的格子；检查点本身超过上限的一半时丢弃，
+        更早的操作不能再撤销。
+        """
+        stack = self.undo_stack
+        while self.nbytes > self.max_bytes and len(stack) > 1:
+            first = stack.popleft()
+            self.nbytes -= first.nbytes
+            if first.moves > 1 and first.nbytes * 2 > self.max_bytes:
+                continue
+            second = stack.popleft()
+            merged = first.merge(second)
+            self.nbytes += merged.nbytes - second.nbytes
+            stack.appendleft(merged)
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    def undo(self) -> ChangeSet:
+        """
+        撤销最近一次操作 (或一个检查点)
+
+        Returns:
+            变化集合，没有可撤销的操作时为空
+        """
+        if not self.undo_stack:
+            return []
+        delta = self.undo_stack.pop()
+        self.redo_stack.append(delta)
+        return self._apply(delta.indices, delta.old, delta.before)
+
+    def redo(self) -> ChangeSet:
+        """
+        重做最近一次撤销的操作
+
+        Returns:
+            变化集合，没有可重做的操作时为空
+        """
+        if not self.redo_stack:
+            return []
+        delta = self.redo_stack.pop()
+        self.undo_stack.append(delta)
+        return self._apply(delta.indices, delta.new, delta.after)
+
+    def _apply(self, indices: array, codes: bytes, state: tuple) -> ChangeSet:
+        """把格子写回指定编码并同步影子状态"""
+        changes = list(zip(indices, codes))
+        for index, code in changes:
+            self.shadow[index] = code
+        self.state = state
+        return self.engine.restore(changes, *state)
+
+    def reset(self, engine: Optional[GameEngine] = None):
+        """清空日志，例如新游戏或加载进度之后"""
+        if engine is not None:
+            self.engine = engine
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.nbytes = 0
+        self.shadow = bytearray(self.engine.visible)
+        self.state = (self.engine.game_over, self.engine.game_won)
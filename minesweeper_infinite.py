@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+无限扫雷
+游戏板按固定大小的区块划分，每个区块的地雷由 (种子, 区块坐标) 的哈希确定，
+只有揭开或洪水填充到达时才生成区块。坐标可以是任意整数(包括负数)，
+内存占用随探索的面积增长；超出内存预算的冷区块按LRU顺序写入磁盘。
+
+用法示例:
+    python3 minesweeper_infinite.py --seed 1 --density 0.18
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import zlib
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from minesweeper_engine import (CELL_FLAG, CELL_HIDDEN, CELL_MINE, CODE_TO_CHAR,
+                                place_mines)
+
+DEFAULT_CHUNK_SIZE = 32
+DEFAULT_DENSITY = 0.18
+DEFAULT_MAX_CHUNKS = 4096
+
+# 地雷在区块游戏板中的取值，其余为周围地雷数0-8
+MINE = 0xFF
+
+# 地雷密度过低时空白区域会无限连通，单次洪水填充最多揭开的格子数
+DEFAULT_FLOOD_LIMIT = 1_000_000
+# 展开一个空格最多揭开的格子数，flood_limit 不能小于此值
+MAX_EXPAND = 8
+
+
+class Chunk:
+    """内存中的区块: 地雷和周围地雷数，以及玩家可见状态"""
+
+    __slots__ = ('board', 'visible', 'dirty')
+
+    def __init__(self, board: bytearray, visible: bytearray):
+        self.board = board        # MINE表示地雷，否则为周围地雷数
+        self.visible = visible    # 可见状态编码，见 minesweeper_engine 中的 CELL_* 常量
+        self.dirty = False        # 可见状态在上次写入磁盘后是否改变
+
+
+class InfiniteMinesweeper:
+    def __init__(self, seed: Optional[int] = None, density: float = DEFAULT_DENSITY,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, max_chunks: int = DEFAULT_MAX_CHUNKS,
+                 spill_dir: Optional[str] = None, flood_limit: int = DEFAULT_FLOOD_LIMIT):
+        """
+        初始化无限扫雷
+
+        原点(0, 0)及其周围8格没有地雷，第一步揭开原点一定安全。
+
+        Args:
+            seed: 随机种子，相同种子生成相同的地雷分布，None表示随机选择
+            density: 每个区块的地雷密度
+            chunk_size: 区块边长
+            max_chunks: 内存中最多保留的区块数，超出时把最久未使用的区块写入磁盘
+            spill_dir: 冷区块的存放目录，None表示使用临时目录并在 close() 时删除
+            flood_limit: 单次洪水填充最多揭开的格子数，未展开的部分在下次揭开时继续
+
+        Raises:
+            ValueError: 地雷密度不在 (0, 1) 之间、max_chunks 小于1或 flood_limit 小于8
+        """
+        if not 0 < density < 1:
+            raise ValueError(f"地雷密度 {density} 无效，必须在0和1之间")
+        if max_chunks < 1:
+            raise ValueError(f"内存中至少要保留1个区块，当前为 {max_chunks}")
+        if flood_limit < MAX_EXPAND:
+            raise ValueError(f"洪水填充上限至少为 {MAX_EXPAND}，当前为 {flood_limit}")
+
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.density = density
+        self.chunk_size = chunk_size
+        self.chunk_mines = round(density * chunk_size * chunk_size)
+        self.max_chunks = max_chunks
+        self.flood_limit = flood_limit
+
+        self._own_spill_dir = spill_dir is None
+        self.spill_dir = spill_dir if spill_dir is not None else tempfile.mkdtemp(prefix='minesweeper-')
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+        # 内存中的区块，按最近使用排序
+        self.chunks: 'OrderedDict[Tuple[int, int], Chunk]' = OrderedDict()
+        # 已写入磁盘的区块
+        self.spilled = set()
+
+        # 游戏状态，无限模式没有胜利，只会踩雷结束
+        self.game_over = False
+        self.revealed_count = 0
+        self.flagged_mines = 0
+        # 已揭开但因达到 flood_limit 还没有展开的空格
+        self.frontier: 'deque[Tuple[int, int]]' = deque()
+
+        # 区块统计
+        self.chunks_generated = 0
+        self.chunks_spilled = 0
+        self.chunks_loaded = 0
+
+    def _mine_positions(self, chunk_row: int, chunk_col: int) -> List[int]:
+        """区块内地雷位置(扁平索引)，只由种子和区块坐标决定"""
+        key = f"{self.seed},{chunk_row},{chunk_col}".encode()
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        rng = random.Random(int.from_bytes(digest, 'little'))
+
+        size = self.chunk_size
+        positions = place_mines(size, size, self.chunk_mines, rng)
+        if -1 <= chunk_row <= 0 and -1 <= chunk_col <= 0:
+            # 去掉原点周围的地雷
+            top, left = chunk_row * size, chunk_col * size
+            positions = [p for p in positions
+                         if not (abs(top + p // size) <= 1 and abs(left + p % size) <= 1)]
+        return positions
+
+    def _build_board(self, chunk_row: int, chunk_col: int) -> bytearray:
+        """生成区块游戏板，边界格子的计数需要相邻8个区块的地雷位置"""
+        size = self.chunk_size
+        padded = size + 2
+        mines = bytearray(padded * padded)
+
+        # 把本区块及相邻区块中落在扩展一圈范围内的地雷放到带边框的网格中
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                for p in self._mine_positions(chunk_row + dr, chunk_col + dc):
+                    r = dr * size + p // size + 1
+                    c = dc * size + p % size + 1
+                    if 0 <= r < padded and 0 <= c < padded:
+                        mines[r * padded + c] = 1
+
+        board = bytearray(size * size)
+        for r in range(size):
+            above = r * padded
+            here = above + padded
+            below = here + padded
+            for c in range(size):
+                if mines[here + c + 1]:
+                    board[r * size + c] = MINE
+                else:
+                    board[r * size + c] = (mines[above + c] + mines[above + c + 1] + mines[above + c + 2] +
+                                           mines[here + c] + mines[here + c + 2] +
+                                           mines[below + c] + mines[below + c + 1] + mines[below + c + 2])
+        return board
+
+    def _spill_path(self, key: Tuple[int, int]) -> str:
+        return os.path.join(self.spill_dir, f"{key[0]}_{key[1]}.chunk")
+
+    def _chunk(self, key: Tuple[int, int]) -> Chunk:
+        """取得区块，必要时生成或从磁盘读回，并按LRU顺序淘汰冷区块"""
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        board = self._build_board(*key)
+        if key in self.spilled:
+            with open(self._spill_path(key), 'rb') as f:
+                visible = bytearray(zlib.decompress(f.read()))
+            self.chunks_loaded += 1
+        else:
+            visible = bytearray([CELL_HIDDEN]) * (self.chunk_size * self.chunk_size)
+            self.chunks_generated += 1
+
+        chunk = self.chunks[key] = Chunk(board, visible)
+        while len(self.chunks) > self.max_chunks:
+            self._evict()
+        return chunk
+
+    def _evict(self):
+        """把最久未使用的区块移出内存，可见状态有变化时写入磁盘"""
+        key, chunk = self.chunks.popitem(last=False)
+        if not chunk.dirty:
+            return  # 未改动或磁盘上已是最新，需要时可以重新生成或读回
+        with open(self._spill_path(key), 'wb') as f:
+            f.write(zlib.compress(bytes(chunk.visible)))
+        self.spilled.add(key)
+        self.chunks_spilled += 1
+
+    def _locate(self, row: int, col: int) -> Tuple[Chunk, int]:
+        """格子所在的区块和区块内的扁平索引"""
+        size = self.chunk_size
+        chunk_row, r = divmod(row, size)
+        chunk_col, c = divmod(col, size)
+        return self._chunk((chunk_row, chunk_col)), r * size + c
+
+    def is_mine(self, row: int, col: int) -> bool:
+        """格子是否为地雷"""
+        chunk, index = self._locate(row, col)
+        return chunk.board[index] == MINE
+
+    def adjacent(self, row: int, col: int) -> int:
+        """格子周围的地雷数，地雷返回-1"""
+        chunk, index = self._locate(row, col)
+        value = chunk.board[index]
+        return -1 if value == MINE else value
+
+    def visible_code(self, row: int, col: int) -> int:
+        """格子的可见状态编码"""
+        chunk, index = self._locate(row, col)
+        return chunk.visible[index]
+
+    def reveal_cell(self, row: int, col: int) -> bool:
+        """
+        揭开指定位置的格子
+
+        上次洪水填充达到 flood_limit 时，先继续展开剩下的空白区域。
+
+        Returns:
+            True表示游戏继续, False表示踩雷
+        """
+        if self.game_over:
+            return False
+        chunk, index = self._locate(row, col)
+        if chunk.visible[index] != CELL_HIDDEN:
+            if self.frontier:
+                self.flood_fill()
+            return True
+
+        chunk.dirty = True
+        value = chunk.board[index]
+        if value == MINE:
+            chunk.visible[index] = CELL_MINE
+            self.game_over = True
+            return False
+
+        chunk.visible[index] = value
+        self.revealed_count += 1
+        if value == 0:
+            self.flood_fill(row, col)
+        elif self.frontier:
+            self.flood_fill()
+        return True
+
+    def flood_fill(self, row: Optional[int] = None, col: Optional[int] = None) -> int:
+        """
+        从空格(row, col)开始揭开相连的空白区域及其边界，区块在到达时才生成
+
+        与 GameEngine.expand 相同的队列实现，但没有边界；
+        最多揭开 flood_limit 个格子。达到上限时只展开能完整展开的空格，
+        其余空格留在 frontier 中，下次调用时继续，不会留下周围还有未揭开格子的空格。
+
+        Args:
+            row, col: 已揭开的空格，None表示只继续上次剩下的空格
+
+        Returns:
+            揭开的格子数
+        """
+        size = self.chunk_size
+        locate = self._chunk
+        queue = self.frontier
+        if row is not None:
+            queue.append((row, col))
+        revealed = 0
+        # 展开一个空格最多揭开8格，剩余额度不足时停止，保证不超过上限
+        limit = self.flood_limit - MAX_EXPAND
+
+        # 同一区块内的连续访问不必重复查找
+        last_key = None
+        chunk = None
+
+        while queue and revealed <= limit:
+            r, c = queue.popleft()
+            for nr in (r - 1, r, r + 1):
+                chunk_row, local_r = divmod(nr, size)
+                for nc in (c - 1, c, c + 1):
+                    chunk_col, local_c = divmod(nc, size)
+                    key = (chunk_row, chunk_col)
+                    if key != last_key:
+                        chunk = locate(key)
+                        last_key = key
+                    index = local_r * size + local_c
+                    if chunk.visible[index] != CELL_HIDDEN:
+                        continue
+                    value = chunk.board[index]
+                    chunk.visible[index] = value
+                    chunk.dirty = True
+                    revealed += 1
+                    if value == 0:
+                        queue.append((nr, nc))
+
+        self.revealed_count += revealed
+        return revealed
+
+    def toggle_flag(self, row: int, col: int):
+        """切换格子的标记状态，已揭开的格子不能标记"""
+        chunk, index = self._locate(row, col)
+        code = chunk.visible[index]
+        if code == CELL_HIDDEN:
+            chunk.visible[index] = CELL_FLAG
+            self.flagged_mines += 1
+        elif code == CELL_FLAG:
+            chunk.visible[index] = CELL_HIDDEN
+            self.flagged_mines -= 1
+        else:
+            print("已揭开的格子不能标记")
+            return
+        chunk.dirty = True
+
+    def render(self, top: int, left: int, rows: int, cols: int) -> str:
+        """
+        生成一个窗口的显示文本，格式与 Minesweeper.render() 的游戏板部分相同
+
+        Args:
+            top: 窗口第一行的行号
+            left: 窗口第一列的列号
+            rows: 窗口行数
+            cols: 窗口列数
+        """
+        width = max(len(str(n)) for n in (top, top + rows - 1))
+        lines = [
+            f"列 {left} 到 {left + cols - 1} (列号只显示绝对值的最后两位)",
+            " " * (width + 1) + " ".join(f"{abs(c) % 100:2d}" for c in range(left, left + cols)),
+        ]
+        for r in range(top, top + rows):
+            cells = []
+            for c in range(left, left + cols):
+                code = self.visible_code(r, c)
+                cells.append(f" {'?' if code == CELL_HIDDEN else CODE_TO_CHAR[code]} ")
+            lines.append(f"{r:>{width}}|{''.join(cells)}")
+        return "\n".join(lines)
+
+    def stats(self) -> Dict[str, int]:
+        """区块统计"""
+        size = self.chunk_size
+        return {
+            'chunks_in_memory': len(self.chunks),
+            'chunks_on_disk': len(self.spilled),
+            'chunks_generated': self.chunks_generated,
+            'chunks_spilled': self.chunks_spilled,
+            'chunks_loaded': self.chunks_loaded,
+            'memory_bytes': len(self.chunks) * size * size * 2,
+        }
+
+    def close(self):
+        """删除自动创建的临时目录"""
+        if self._own_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="无限扫雷 - 命令行版本")
+    parser.add_argument('--seed', type=int, help="随机种子")
+    parser.add_argument('--density', type=float, default=DEFAULT_DENSITY, help="地雷密度")
+    parser.add_argument('--max-chunks', type=int, default=DEFAULT_MAX_CHUNKS,
+                        help="内存中最多保留的区块数")
+    parser.add_argument('--view', type=int, nargs=2, default=[15, 25], metavar=('ROWS', 'COLS'),
+                        help="显示窗口的行数和列数")
+    args = parser.parse_args()
+
+    view_rows, view_cols = args.view
+    with InfiniteMinesweeper(args.seed, args.density, max_chunks=args.max_chunks) as game:
+        print(f"无限扫雷 (种子 {game.seed})，原点(0, 0)一定安全")
+        print("输入格式: 行 列 [f]，坐标可以是任意整数，q 退出")
+        row = col = 0
+
+        while not game.game_over:
+            print(game.render(row - view_rows // 2, col - view_cols // 2, view_rows, view_cols))
+            print(f"已揭开 {game.revealed_count} 格, 已标记 {game.flagged_mines} 格, "
+                  f"内存中 {len(game.chunks)} 个区块")
+            try:
+                parts = input("请输入坐标和操作: ").split()
+                if parts and parts[0].lower() == 'q':
+                    return
+                row, col = int(parts[0]), int(parts[1])
+            except (ValueError, IndexError):
+                print("请输入 行 列 [f]，例如: 0 0 或 3 -5 f")
+                continue
+            except (KeyboardInterrupt, EOFError):
+                print("\n游戏退出")
+                return
+
+            if len(parts) > 2 and parts[2].lower() == 'f':
+                game.toggle_flag(row, col)
+            else:
+                game.reveal_cell(row, col)
+
+        print(game.render(row - view_rows // 2, col - view_cols // 2, view_rows, view_cols))
+        print(f"💣 踩到地雷了！共揭开 {game.revealed_count} 格")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,36 @@
 #!/usr/bin/env python3
 """
 扫雷游戏启动器
-可以选择启动命令行版本或GUI版本
+可以选择启动命令行版本或GUI版本，两者都在当前进程中运行：
+GUI版本复用启动器的窗口，游戏模块在选择版本之后才导入
 """
 
-import tkinter as tk
-from tkinter import messagebox, font
-import subprocess
+import time
+
+# 尽早记录启动时刻，用于测量到第一帧的启动用时
+LAUNCH_TIME = time.perf_counter()
+
+import argparse
 import sys
-import os
+import tkinter as tk
+from tkinter import messagebox
+
 
 class MinesweeperLauncher:
-    def __init__(self, master):
+    def __init__(self, master, on_first_frame=None):
+        """
+        创建启动器
+
+        Args:
+            master: tkinter主窗口，启动GUI版本时由游戏继续使用
+            on_first_frame: 游戏显示第一帧后调用，参数为版本名 'gui' 或 'cli'
+        """
         self.master = master
+        self.on_first_frame = on_first_frame
+        # 选择的版本，None表示直接关闭了启动器
+        self.mode = None
+        # GUI版本的游戏实例
+        self.game = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -108,43 +126,82 @@ class MinesweeperLauncher:
         info_label.pack()
 
     def launch_gui(self):
-        """启动GUI版本"""
+        """在当前窗口中启动GUI版本"""
         try:
-            self.master.withdraw()  # 隐藏启动器
-            subprocess.Popen([sys.executable, "minesweeper_gui.py"])
-            self.master.after(500, self.master.quit)  # 延迟关闭启动器
+            # 延迟导入，只选择命令行版本时不加载GUI模块
+            from minesweeper_gui import open_game
         except Exception as e:
             messagebox.showerror("错误", f"无法启动GUI版本：{e}")
+            return
+
+        self.mode = 'gui'
+        for child in self.master.winfo_children():
+            child.destroy()
+        self.game = open_game(self.master)
+
+        if self.on_first_frame is not None:
+            self.master.update()
+            self.on_first_frame('gui')
 
     def launch_cli(self):
-        """启动命令行版本"""
-        try:
-            self.master.withdraw()  # 隐藏启动器
-            # 在新的终端窗口中运行
-            if sys.platform == "win32":
-                subprocess.Popen(['cmd', '/c', 'start', 'cmd', '/k',
-                                f'python minesweeper.py'], shell=True)
-            elif sys.platform == "darwin":  # macOS
-                subprocess.Popen(['osascript', '-e',
-                               f'tell app "Terminal" to do script "python3 minesweeper.py"'])
-            else:  # Linux
-                subprocess.Popen(['gnome-terminal', '--', 'python3', 'minesweeper.py'],
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            self.master.after(500, self.master.quit)
-        except Exception as e:
-            # 如果在新终端中失败，在当前终端中运行
-            try:
-                self.master.withdraw()
-                subprocess.run([sys.executable, "minesweeper.py"])
-                self.master.quit()
-            except Exception as e2:
-                messagebox.showerror("错误", f"无法启动命令行版本：{e2}")
+        """关闭启动器窗口，之后在当前终端中运行命令行版本"""
+        if not sys.stdin.isatty():
+            messagebox.showerror("错误", "命令行版本需要在终端中运行启动器")
+            return
+
+        self.mode = 'cli'
+        self.master.quit()
+
+
+def run_cli(on_first_frame=None, argv=None):
+    """
+    在当前进程中运行命令行版本
+
+    Args:
+        on_first_frame: 显示难度菜单前调用，参数为 'cli'
+        argv: 传给 minesweeper.main 的参数
+    """
+    # 延迟导入，只选择GUI版本时不加载命令行模块
+    import minesweeper
+
+    if on_first_frame is not None:
+        on_first_frame('cli')
+    minesweeper.main(argv if argv is not None else [])
+
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="扫雷游戏启动器")
+    parser.add_argument('--mode', choices=['gui', 'cli'], help="直接启动指定版本，不显示选择界面")
+    parser.add_argument('--startup-time', action='store_true',
+                        help="显示第一帧后输出启动用时并退出")
+    args = parser.parse_args()
+
+    def on_first_frame(mode):
+        elapsed = time.perf_counter() - LAUNCH_TIME
+        print(f"启动用时 ({mode}): {elapsed * 1000:.1f} ms", file=sys.stderr)
+        if args.startup_time:
+            if root is not None:
+                root.destroy()
+            sys.exit(0)
+
+    root = None
+    if args.mode == 'cli':
+        run_cli(on_first_frame if args.startup_time else None)
+        return
+
     root = tk.Tk()
-    launcher = MinesweeperLauncher(root)
+    launcher = MinesweeperLauncher(root, on_first_frame if args.startup_time else None)
+    if args.mode == 'gui':
+        launcher.launch_gui()
     root.mainloop()
 
+    if launcher.mode == 'cli':
+        root.destroy()
+        run_cli()
+    elif launcher.game is not None:
+        launcher.game.close()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+扫雷服务器负载测试
+同时打开多个连接，每个连接不断开始新游戏并随机揭开或标记格子，
+统计每步操作的延迟 (p50/p99) 和每秒操作数
+
+不指定 --port 时在本进程中启动一个服务器，客户端和服务器共用一个事件循环，
+结果偏保守；测试独立运行的服务器时指定 --port。
+连接数较多时需要调大文件描述符上限，例如 ulimit -n 8192。
+
+用法示例:
+    python3 minesweeper_loadgen.py --clients 1000 --duration 10
+    python3 minesweeper_loadgen.py --port 7777 --clients 2000 --rows 16 --cols 30 --mines 99
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+from minesweeper_engine import CELL_FLAG, CELL_HIDDEN
+from minesweeper_server import REPLY_LIMIT, GameServer
+
+# 随机操作中标记的比例
+FLAG_RATIO = 0.1
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """已排序数据的百分位数 (最近秩)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run_client(host: str, port: int, rows: int, cols: int, mines: int, seed: int,
+                     deadline: float, latencies: List[float]) -> int:
+    """
+    一个连接: 反复开始新游戏，随机揭开或标记未揭开的格子，直到截止时间
+
+    根据回复中的变化集合在本地维护可见状态，不需要 state 命令。
+
+    Args:
+        deadline: time.perf_counter() 的截止时间
+        latencies: 每步操作的延迟(秒)追加到这里
+
+    Returns:
+        开始的游戏数
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port, limit=REPLY_LIMIT)
+    games = 0
+
+    async def request(line: str) -> List[str]:
+        writer.write(line.encode('utf-8') + b'\n')
+        await writer.drain()
+        reply = (await reader.readline()).decode('utf-8').split()
+        if not reply or reply[0] != 'ok':
+            raise RuntimeError(f"{line}: {' '.join(reply)}")
+        return reply
+
+    try:
+        while time.perf_counter() < deadline:
+            await request(f"new {rows} {cols} {mines} {rng.randrange(1 << 32)}")
+            games += 1
+            visible = bytearray([CELL_HIDDEN]) * (rows * cols)
+            state = 'playing'
+            flags = 0
+            while state == 'playing' and time.perf_counter() < deadline:
+                # 随机取一个未揭开的格子，已标记的格子只取消标记
+                index = rng.randrange(rows * cols)
+                while visible[index] not in (CELL_HIDDEN, CELL_FLAG):
+                    index = rng.randrange(rows * cols)
+                # 标记数达到地雷总数后服务器会拒绝新标记
+                if visible[index] == CELL_FLAG or (rng.random() < FLAG_RATIO and flags < mines):
+                    action = 'flag'
+                else:
+                    action = 'reveal'
+
+                start = time.perf_counter()
+                reply = await request(f"{action} {index // cols} {index % cols}")
+                latencies.append(time.perf_counter() - start)
+
+                state = reply[1]
+                for cell in reply[3:]:
+                    i, code = map(int, cell.split(':'))
+                    flags += (code == CELL_FLAG) - (visible[i] == CELL_FLAG)
+                    visible[i] = code
+    finally:
+        writer.write(b'quit\n')
+        writer.close()
+    return games
+
+
+async def run_load(host: Optional[str], port: Optional[int], clients: int, duration: float,
+                   rows: int, cols: int, mines: int, seed: int = 0) -> Dict[str, float]:
+    """
+    运行负载测试
+
+    Args:
+        host, port: 服务器地址，port为None时在本进程中启动服务器
+        clients: 同时连接数
+        duration: 持续时间(秒)
+
+    Returns:
+        操作数、每秒操作数、游戏数和延迟百分位 (毫秒)
+    """
+    server = None
+    if port is None:
+        server = GameServer()
+        host = '127.0.0.1'
+        port = await server.start(host, 0)
+
+    latencies: List[float] = []
+    start = time.perf_counter()
+    deadline = start + duration
+    try:
+        games = await asyncio.gather(*(run_client(host, port, rows, cols, mines, seed + i,
+                                                  deadline, latencies)
+                                       for i in range(clients)))
+    finally:
+        if server is not None:
+            await server.close()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'moves': len(latencies),
+        'moves_per_sec': len(latencies) / elapsed,
+        'games': sum(games),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="扫雷服务器负载测试")
+    parser.add_argument('--host', default='127.0.0.1', help="服务器地址")
+    parser.add_argument('--port', type=int, help="服务器端口，不指定时在本进程中启动服务器")
+    parser.add_argument('--clients', type=int, default=100, help="同时连接数")
+    parser.add_argument('--duration', type=float, default=10.0, help="持续时间(秒)")
+    parser.add_argument('--rows', type=int, default=16, help="行数")
+    parser.add_argument('--cols', type=int, default=30, help="列数")
+    parser.add_argument('--mines', type=int, default=99, help="地雷数量")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_load(args.host if args.port else None, args.port, args.clients,
+                                 args.duration, args.rows, args.cols, args.mines, args.seed))
+    print(f"{args.clients} 个连接, {stats['games']} 局, {stats['moves']} 步, "
+          f"{stats['moves_per_sec']:.0f} 步/秒")
+    print(f"延迟 p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, "
+          f"最长 {stats['max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+热点路径计数
+记录放置地雷、揭开、洪水填充、标记、显示地雷和绘制的调用次数、累计和最长用时
+
+未启用时不做任何事：各模块只登记需要计时的方法，enable() 时才把它们换成计时的包装，
+disable() 时换回原来的方法，因此关闭时没有额外开销。
+每个计时点只计自身的用时和格子数，不含其中调用的其他计时点
+(例如 reveal_cell 不含展开空格的 flood_fill)，各行相加不会重复计算。
+计数不加锁，多线程同时调用时 (例如服务器的线程池) 结果只是近似值。
+
+用法示例:
+    python3 minesweeper.py --stats
+    python3 minesweeper_gui.py --stats
+"""
+
+import functools
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from minesweeper_engine import GameEngine
+
+
+class Counter:
+    """一个计时点的累计值"""
+
+    __slots__ = ('calls', 'total', 'peak', 'cells')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0   # 累计用时(秒)
+        self.peak = 0.0    # 最长一次的用时(秒)
+        self.cells = 0     # 涉及的格子数 (变化集合的长度)
+
+    def clear(self):
+        self.__init__()
+
+    def add(self, elapsed: float, cells: int):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.peak:
+            self.peak = elapsed
+        self.cells += cells
+
+
+class _Entry(NamedTuple):
+    cls: type
+    method: str
+    name: str
+    cells: bool
+
+
+# 登记的计时点，按登记顺序输出
+_entries: List[_Entry] = []
+# 启用时被替换的原方法
+_originals: Dict[Tuple[type, str], Callable] = {}
+counters: Dict[str, Counter] = {}
+# 每个线程正在执行的计时点，每层为 [其中调用的计时点的用时, 格子数]
+_calls = threading.local()
+
+
+def register(cls: type, method: str, name: str, cells: bool = False):
+    """
+    登记需要计时的方法，已启用时立即生效
+
+    Args:
+        cls: 方法所在的类
+        method: 方法名
+        name: 计时点名称，多个方法可以共用一个名称
+        cells: 方法返回变化集合，累计其长度
+    """
+    entry = _Entry(cls, method, name, cells)
+    _entries.append(entry)
+    counters.setdefault(name, Counter())
+    if _originals:
+        _patch(entry)
+
+
+def _patch(entry: _Entry):
+    func = getattr(entry.cls, entry.method)
+    _originals[entry.cls, entry.method] = func
+    counter = counters[entry.name]
+    perf_counter = time.perf_counter
+    cells = entry.cells
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_calls, 'stack', None)
+        if stack is None:
+            stack = _calls.stack = []
+        nested = [0.0, 0]
+        stack.append(nested)
+        start = perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            stack.pop()
+        elapsed = perf_counter() - start
+        count = len(result) if cells else 0
+        if stack:
+            # 从外层计时点中扣除
+            stack[-1][0] += elapsed
+            stack[-1][1] += count
+        counter.add(elapsed - nested[0], count - nested[1] if cells else 0)
+        return result
+
+    setattr(entry.cls, entry.method, wrapper)
+
+
+def enable():
+    """开始计时"""
+    if _originals:
+        return
+    for entry in _entries:
+        _patch(entry)
+
+
+def disable():
+    """停止计时，换回原来的方法，计数保留"""
+    for (cls, method), func in _originals.items():
+        setattr(cls, method, func)
+    _originals.clear()
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def reset():
+    """清零所有计数"""
+    for counter in counters.values():
+        counter.clear()
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    """
+    当前计数，每个计时点不含其中调用的其他计时点
+
+    Returns:
+        {计时点: {'calls': 次数, 'total_ms': 累计毫秒, 'peak_ms': 最长毫秒, 'cells': 格子数}}
+    """
+    return {name: {'calls': c.calls, 'total_ms': c.total * 1000, 'peak_ms': c.peak * 1000,
+                   'cells': c.cells}
+            for name, c in counters.items()}
+
+
+def report() -> str:
+    """计数表格，只包含被调用过的计时点"""
+    lines = [f"{'计时点':<16}{'次数':>8}{'累计ms':>12}{'最长ms':>10}{'格子数':>10}"]
+    for name, values in snapshot().items():
+        if values['calls']:
+            lines.append(f"{name:<19}{values['calls']:>10}{values['total_ms']:>14.2f}"
+                         f"{values['peak_ms']:>12.3f}{values['cells']:>12}")
+    return "\n".join(lines)
+
+
+# 命令行版本和GUI版本共用的引擎方法；前端各自登记初始化和绘制
+register(GameEngine, 'place_mines', 'place_mines')
+register(GameEngine, 'reveal', 'reveal_cell', cells=True)
+register(GameEngine, 'flood_fill', 'flood_fill', cells=True)
+register(GameEngine, 'flag', 'toggle_flag')
+register(GameEngine, 'chord', 'chord', cells=True)
+register(GameEngine, 'reveal_all_mines', 'reveal_all_mines', cells=True)
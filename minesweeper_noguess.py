@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+无猜游戏板生成
+生成从第一次点击开始只靠推理就能完成的游戏板
+
+生成随机游戏板后用 LogicSolver 从第一次点击开始推理；推理卡住时，
+把卡住处边界上的一个地雷移到别处，再从头验证。局部修补通常几次就能成功，比整块重新生成快得多；
+修补次数过多时才换一块新的游戏板。多个进程可以用不同的种子同时生成，取最先完成的结果。
+
+用法示例:
+    python3 minesweeper_noguess.py --rows 16 --cols 30 --mines 99 --games 20
+"""
+
+import argparse
+import random
+import time
+from multiprocessing import Pool
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+from minesweeper_engine import count_adjacent, neighbour_table, place_mines
+
+# LogicSolver.state 中的格子状态
+UNKNOWN = 0
+SAFE = 1
+MINE = 2
+
+# 一块游戏板最多修补的次数，超过后重新生成
+DEFAULT_MAX_REPAIRS = 400
+
+
+class NoGuessResult(NamedTuple):
+    """无猜游戏板的生成结果"""
+    board: List[List[int]]   # 游戏板，-1表示地雷，0-8表示周围地雷数
+    positions: List[int]     # 地雷位置的扁平索引
+    attempts: int            # 生成的随机游戏板数
+    repairs: int             # 修补次数
+    elapsed: float           # 用时(秒)
+
+
+class LogicSolver:
+    """
+    在扁平数组上从起点开始推理
+
+    只使用单格约束、相交约束之间的子集/超集约束和总地雷数，
+    与 minesweeper_solver.MinesweeperSolver 的规则相同，但直接读取地雷分布，
+    只在格子状态变化时重新检查相邻的数字，适合生成时反复验证。
+    """
+
+    def __init__(self, rows: int, cols: int, mines: int):
+        """
+        Args:
+            rows: 行数
+            cols: 列数
+            mines: 地雷数量
+        """
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.neighbours = neighbour_table(rows, cols)
+        self.state = bytearray(rows * cols)
+
+    def solve(self, counts: bytearray, start: int) -> bool:
+        """
+        从格子start开始推理
+
+        Args:
+            counts: 每个格子周围的地雷数，地雷格子的值不会被读取
+            start: 第一次点击的格子，必须安全
+
+        Returns:
+            是否揭开了所有安全格子；返回后 state 为推理结束时各格子的状态
+        """
+        offsets, indices = self.neighbours
+        size = self.rows * self.cols
+        state = self.state = bytearray(size)
+        # 每个格子周围还未知的格子数和已确定的地雷数
+        unknown = bytearray(offsets[i + 1] - offsets[i] for i in range(size))
+        known_mines = bytearray(size)
+        work: List[int] = []
+        totals = [0, 0]  # 已揭开的格子数, 已确定的地雷数
+
+        def reveal(index: int):
+            queue = [index]
+            while queue:
+                i = queue.pop()
+                if state[i] != UNKNOWN:
+                    continue
+                state[i] = SAFE
+                totals[0] += 1
+                neighbours = indices[offsets[i]:offsets[i + 1]]
+                for n in neighbours:
+                    unknown[n] -= 1
+                    if state[n] == SAFE:
+                        work.append(n)
+                work.append(i)
+                if counts[i] == 0:
+                    queue.extend(n for n in neighbours if state[n] == UNKNOWN)
+
+        def mark(i: int):
+            if state[i] != UNKNOWN:
+                return
+            state[i] = MINE
+            totals[1] += 1
+            for n in indices[offsets[i]:offsets[i + 1]]:
+                unknown[n] -= 1
+                known_mines[n] += 1
+                if state[n] == SAFE:
+                    work.append(n)
+
+        safe_total = size - self.mines
+        reveal(start)
+        while True:
+            # 单格约束: 只检查状态变化过的格子周围的数字
+            while work:
+                i = work.pop()
+                if not unknown[i]:
+                    continue
+                need = counts[i] - known_mines[i]
+                if need == 0:
+                    for n in indices[offsets[i]:offsets[i + 1]]:
+                        reveal(n)
+                elif need == unknown[i]:
+                    for n in indices[offsets[i]:offsets[i + 1]]:
+                        mark(n)
+
+            if totals[0] == safe_total:
+                return True
+
+            safe, mines = self._subset_rule(counts, unknown, known_mines)
+            if not safe and not mines:
+                # 全局约束: 剩余地雷数为0或等于未知格子数
+                remaining = self.mines - totals[1]
+                hidden = [i for i in range(size) if state[i] == UNKNOWN]
+                if remaining == 0:
+                    safe = hidden
+                elif remaining == len(hidden):
+                    mines = hidden
+                else:
+                    return False
+
+            for i in mines:
+                mark(i)
+            for i in safe:
+                reveal(i)
+
+    def _subset_rule(self, counts: bytearray, unknown: bytearray,
+                     known_mines: bytearray) -> Tuple[Set[int], Set[int]]:
+        """
+        对共享未知格子的两个数字应用子集/超集约束
+
+        Returns:
+            (一定安全的格子, 一定是地雷的格子)
+        """
+        offsets, indices = self.neighbours
+        state = self.state
+        constraints = []
+        by_cell = {}
+        for i in range(self.rows * self.cols):
+            if state[i] != SAFE or not unknown[i]:
+                continue
+            cells = frozenset(n for n in indices[offsets[i]:offsets[i + 1]] if state[n] == UNKNOWN)
+            for cell in cells:
+                by_cell.setdefault(cell, []).append(len(constraints))
+            constraints.append((cells, counts[i] - known_mines[i]))
+
+        safe: Set[int] = set()
+        mines: Set[int] = set()
+        for i, (a, mines_a) in enumerate(constraints):
+            related = {j for cell in a for j in by_cell[cell] if j != i}
+            for j in related:
+                b, mines_b = constraints[j]
+                only_b = b - a
+                if not only_b:
+                    continue
+                only_a = a - b
+                if mines_b - mines_a == len(only_b):
+                    mines.update(only_b)
+                    safe.update(only_a)
+                elif not only_a and mines_b == mines_a:
+                    safe.update(only_b)
+        return safe, mines
+
+
+def _repair(solver: LogicSolver, counts: bytearray, is_mine: bytearray, rng: random.Random,
+            protected: Set[int]):
+    """
+    修改推理卡住处附近的地雷分布
+
+    边界 (与已揭开的数字相邻的未知格子) 上的一个地雷随机移到没有数字接触的未知格子
+    或已揭开区域中的格子。只在未知区域内移动时，被地雷包围的格子和最后剩下的二选一
+    往往无法消除；移到已揭开区域会改变那里的数字，但之后会从头验证，不影响结果。
+    counts 和 is_mine 原地更新。
+
+    Args:
+        protected: 不能放地雷的格子 (第一次点击及其周围)
+    """
+    offsets, indices = solver.neighbours
+    state = solver.state
+    frontier = []
+    interior = []
+    for i in range(len(state)):
+        if state[i] != UNKNOWN:
+            continue
+        if any(state[n] == SAFE for n in indices[offsets[i]:offsets[i + 1]]):
+            frontier.append(i)
+        else:
+            interior.append(i)
+
+    sources = [i for i in frontier if is_mine[i]] or [i for i in interior if is_mine[i]]
+    targets = [i for i in interior if not is_mine[i]]
+    targets += [i for i in range(len(state)) if state[i] == SAFE and i not in protected]
+    if not sources or not targets:
+        return
+
+    source = rng.choice(sources)
+    target = rng.choice(targets)
+    is_mine[source] = 0
+    is_mine[target] = 1
+    for n in indices[offsets[source]:offsets[source + 1]]:
+        counts[n] -= 1
+    for n in indices[offsets[target]:offsets[target + 1]]:
+        counts[n] += 1
+
+
+def generate_no_guess(rows: int, cols: int, mines: int, first: Tuple[int, int],
+                      rng: Optional[random.Random] = None,
+                      max_repairs: int = DEFAULT_MAX_REPAIRS,
+                      deadline: Optional[float] = None) -> Optional[NoGuessResult]:
+    """
+    生成从first开始只靠推理就能完成的游戏板
+
+    first及其周围8格不放地雷，因此第一次点击总会展开一片区域。
+
+    Args:
+        rows: 行数
+        cols: 列数
+        mines: 地雷数量
+        first: 第一次点击的格子(行, 列)
+        rng: 随机数生成器，None表示使用新的随机种子
+        max_repairs: 一块游戏板最多修补的次数，超过后重新生成
+        deadline: time.perf_counter() 的截止时间，超过时返回None，None表示不限时
+
+    Returns:
+        生成结果，超过截止时间时为None
+
+    Raises:
+        ValueError: 地雷数量无效
+    """
+    if rng is None:
+        rng = random.Random()
+
+    start_time = time.perf_counter()
+    solver = LogicSolver(rows, cols, mines)
+    offsets, indices = solver.neighbours
+    start = first[0] * cols + first[1]
+    protected = set(indices[offsets[start]:offsets[start + 1]])
+    protected.add(start)
+    attempts = repairs = 0
+
+    while deadline is None or time.perf_counter() < deadline:
+        attempts += 1
+        positions = place_mines(rows, cols, mines, rng, avoid=first)
+        is_mine = bytearray(rows * cols)
+        counts = bytearray(rows * cols)
+        for index in positions:
+            is_mine[index] = 1
+            for n in indices[offsets[index]:offsets[index + 1]]:
+                counts[n] += 1
+
+        for _ in range(max_repairs):
+            if solver.solve(counts, start):
+                positions = [i for i, mine in enumerate(is_mine) if mine]
+                return NoGuessResult(count_adjacent(rows, cols, positions, use_numpy=False),
+                                     positions, attempts, repairs,
+                                     time.perf_counter() - start_time)
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            # 第一次点击及其周围始终不放地雷
+            _repair(solver, counts, is_mine, rng, protected)
+            repairs += 1
+
+    return None
+
+
+def _generate_task(task: Tuple[int, int, int, Tuple[int, int], int]) -> NoGuessResult:
+    """在工作进程中用指定种子生成"""
+    rows, cols, mines, first, seed = task
+    return generate_no_guess(rows, cols, mines, first, random.Random(seed))
+
+
+def race_no_guess(rows: int, cols: int, mines: int, first: Tuple[int, int],
+                  seed: int, workers: int) -> NoGuessResult:
+    """
+    用多个进程同时生成，返回最先完成的结果
+
+    第i个进程使用种子 seed + i，其余进程在得到结果后终止。
+    进程启动本身需要几十毫秒，只在单个进程生成较慢时 (大游戏板或高密度) 才值得使用。
+
+    Returns:
+        生成结果，用时包含进程启动
+    """
+    start_time = time.perf_counter()
+    tasks = [(rows, cols, mines, first, seed + i) for i in range(workers)]
+    with Pool(workers) as pool:
+        result = next(pool.imap_unordered(_generate_task, tasks))
+        pool.terminate()
+    return result._replace(elapsed=time.perf_counter() - start_time)
+
+
+def main():
+    """主函数: 连续生成多块游戏板，输出尝试次数和用时"""
+    parser = argparse.ArgumentParser(description="无猜游戏板生成")
+    parser.add_argument('--rows', type=int, default=16, help="行数")
+    parser.add_argument('--cols', type=int, default=30, help="列数")
+    parser.add_argument('--mines', type=int, default=99, help="地雷数量")
+    parser.add_argument('--games', type=int, default=20, help="生成的游戏板数")
+    parser.add_argument('--seed', type=int, default=0, help="起始种子")
+    parser.add_argument('--workers', type=int, default=1, help="同时生成的进程数")
+    args = parser.parse_args()
+
+    first = (args.rows // 2, args.cols // 2)
+    times = []
+    for seed in range(args.seed, args.seed + args.games):
+        if args.workers > 1:
+            result = race_no_guess(args.rows, args.cols, args.mines, first, seed * args.workers,
+                                   args.workers)
+        else:
+            result = generate_no_guess(args.rows, args.cols, args.mines, first, random.Random(seed))
+        times.append(result.elapsed)
+        print(f"种子 {seed}: 尝试 {result.attempts} 块, 修补 {result.repairs} 次, "
+              f"用时 {result.elapsed * 1000:.1f} ms")
+
+    times.sort()
+    print(f"平均 {sum(times) / len(times) * 1000:.1f} ms, "
+          f"中位数 {times[len(times) // 2] * 1000:.1f} ms, 最长 {times[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
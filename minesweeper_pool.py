@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+预先生成的游戏板池
+后台线程为每种难度准备若干块游戏板，新游戏和第一次点击直接取用，
+不在界面线程上生成。命中、未命中和补充延迟的计数用于判断后台是否跟得上。
+"""
+
+import random
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from itertools import chain
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from minesweeper_engine import (GameEngine, OpeningIndex, generate_board_and_mines,
+                                neighbour_table, opening_index)
+
+# 难度: (行数, 列数, 地雷数, 是否无猜)
+PoolKey = Tuple[int, int, int, bool]
+
+# 每种难度预先生成的游戏板数
+DEFAULT_POOL_SIZE = 3
+# 同时保留的难度数，超过时丢弃最久未使用的难度的游戏板
+DEFAULT_MAX_KEYS = 4
+
+
+class PooledBoard(NamedTuple):
+    """预先生成的游戏板"""
+    board: List[List[int]]          # 游戏板，-1表示地雷，0-8表示周围地雷数
+    positions: List[int]            # 地雷位置的扁平索引
+    seed: int                       # 生成用的种子
+    start: Optional[Tuple[int, int]]  # 无猜游戏板的起点，普通游戏板为None
+    generation: object = None       # 无猜模式的生成结果，见 minesweeper_noguess.NoGuessResult
+    openings: Optional[OpeningIndex] = None  # 后台线程构建的开口索引，当场生成时为None
+
+
+def generate(key: PoolKey, seed: int) -> PooledBoard:
+    """
+    生成一块游戏板
+
+    普通游戏板不避开任何格子，第一次点击时由 clear_first_click 移走点击处周围的地雷；
+    无猜游戏板从中心格子开始推理，开局时直接揭开中心格子。
+    """
+    rows, cols, mines, no_guess = key
+    rng = random.Random(seed)
+    if not no_guess:
+        board, positions = generate_board_and_mines(rows, cols, mines, rng)
+        return PooledBoard(board, positions, seed, None)
+
+    # 延迟导入，普通模式不加载生成器
+    from minesweeper_noguess import generate_no_guess
+    start = (rows // 2, cols // 2)
+    result = generate_no_guess(rows, cols, mines, start, rng)
+    return PooledBoard(result.board, result.positions, seed, start, result)
+
+
+def clear_first_click(engine: GameEngine, row: int, col: int, rng: random.Random):
+    """
+    把第一次点击的格子及其周围8格中的地雷移到别处
+
+    只更新被移动的地雷周围的计数，不重新计算整个游戏板；
+    目标格子随机抽取，碰到地雷或点击处周围时重抽，不扫描整个游戏板。
+    可放置的格子不够时保留剩下的地雷。
+    """
+    index = row * engine.cols + col
+    area = set(engine.neighbours.of(index))
+    area.add(index)
+    values = engine.values
+    moving = [i for i in sorted(area) if values[i] == -1]
+    if not moving:
+        return
+
+    size = engine.rows * engine.cols
+    free = size - len(area) - (len(engine.mine_positions) - len(moving))
+    count = min(len(moving), free)
+    if free * 4 < size:
+        # 地雷很密时重抽的次数太多，改为列出所有可放置的格子
+        targets = rng.sample([i for i in range(size) if values[i] != -1 and i not in area], count)
+        for source, target in zip(moving, targets):
+            engine.move_mine(source, target)
+        return
+
+    for source in moving[:count]:
+        # 移走后 source 仍在 area 中，移入后 target 成为地雷，都不会被再次选中
+        target = rng.randrange(size)
+        while values[target] == -1 or target in area:
+            target = rng.randrange(size)
+        engine.move_mine(source, target)
+
+
+class BoardPool:
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, seed: Optional[int] = None,
+                 max_keys: int = DEFAULT_MAX_KEYS):
+        """
+        创建游戏板池并启动后台线程
+
+        Args:
+            size: 每种难度预先生成的游戏板数
+            seed: 随机种子，决定各块游戏板的种子，None表示随机选择
+            max_keys: 同时保留的难度数
+        """
+        self.size = size
+        self.max_keys = max_keys
+        self.rng = random.Random(seed)
+
+        # 难度 -> 已生成的游戏板，按最近使用排序
+        self.boards: 'OrderedDict[PoolKey, Deque[PooledBoard]]' = OrderedDict()
+        # 难度 -> 等待补充的游戏板被取走的时间
+        self.requests: Dict[PoolKey, Deque[float]] = {}
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # 计数
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_time = 0.0
+        self.refill_max = 0.0
+
+        self.thread = threading.Thread(target=self._run, name="board-pool", daemon=True)
+        self.thread.start()
+
+    def prepare(self, key: PoolKey):
+        """开始为一种难度准备游戏板，例如切换难度时"""
+        with self.condition:
+            self._touch(key)
+            self.condition.notify()
+
+    def take(self, key: PoolKey) -> PooledBoard:
+        """
+        取一块游戏板，后台线程随后补充
+
+        池中没有时在调用者的线程上生成，计为未命中。
+        """
+        with self.condition:
+            boards = self._touch(key)
+            self.requests[key].append(time.perf_counter())
+            board = boards.popleft() if boards else None
+            if board is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                # 本次自己生成，不需要后台补充这一块
+                self.requests[key].pop()
+                seed = self.rng.randrange(1 << 32)
+            self.condition.notify()
+
+        return board if board is not None else generate(key, seed)
+
+    def try_take(self, key: PoolKey) -> Optional[PooledBoard]:
+        """
+        池中有游戏板时取一块，后台线程随后补充；没有时返回None，不在调用者的线程上生成
+
+        返回None时后台线程已经在为这种难度生成，调用者可以稍后再取。
+        """
+        with self.condition:
+            boards = self._touch(key)
+            if not boards:
+                self.condition.notify()
+                return None
+            self.requests[key].append(time.perf_counter())
+            self.hits += 1
+            self.condition.notify()
+            return boards.popleft()
+
+    def _touch(self, key: PoolKey) -> Deque[PooledBoard]:
+        """标记难度最近使用，必要时创建队列并丢弃最久未使用的难度，需持有锁"""
+        if key in self.boards:
+            self.boards.move_to_end(key)
+            return self.boards[key]
+
+        self.boards[key] = deque()
+        # 新难度需要补满
+        self.requests[key] = deque([time.perf_counter()] * self.size)
+        while len(self.boards) > self.max_keys:
+            old, _ = self.boards.popitem(last=False)
+            del self.requests[old]
+        return self.boards[key]
+
+    def _next_request(self) -> Optional[Tuple[PoolKey, int]]:
+        """最近使用的难度中需要补充的一个，需持有锁"""
+        for key in reversed(self.boards):
+            if self.requests[key] and len(self.boards[key]) < self.size:
+                return key, self.rng.randrange(1 << 32)
+        return None
+
+    def _run(self):
+        """后台线程: 等待补充请求并生成游戏板"""
+        while True:
+            with self.condition:
+                request = self._next_request()
+                while request is None and not self.closed:
+                    self.condition.wait()
+                    request = self._next_request()
+                if self.closed:
+                    return
+
+            key, seed = request
+            board = generate(key, seed)
+            # 开口索引也在后台构建，界面线程上揭开空格时直接使用
+            rows, cols = key[0], key[1]
+            values = array('b', chain.from_iterable(board.board))
+            board = board._replace(openings=opening_index(values, neighbour_table(rows, cols)))
+
+            with self.condition:
+                # 生成期间该难度可能已被丢弃
+                if key not in self.boards or not self.requests[key]:
+                    continue
+                latency = time.perf_counter() - self.requests[key].popleft()
+                self.boards[key].append(board)
+                self.refills += 1
+                self.refill_time += latency
+                self.refill_max = max(self.refill_max, latency)
+
+    def stats(self) -> Dict[str, float]:
+        """命中、未命中、补充次数和补充延迟 (从游戏板被取走到补充完成)"""
+        with self.condition:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'refills': self.refills,
+                'refill_avg_ms': self.refill_time / self.refills * 1000 if self.refills else 0.0,
+                'refill_max_ms': self.refill_max * 1000,
+                'ready': sum(len(boards) for boards in self.boards.values()),
+            }
+
+    def close(self):
+        """停止后台线程，正在生成的游戏板完成后退出"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
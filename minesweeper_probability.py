@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+扫雷概率分析
+根据可见状态 (已揭开的数字和标记) 计算每个未揭开格子是地雷的精确概率
+
+与数字相邻的未揭开格子 (边界) 按约束分成互不相关的连通分量，
+每个分量按格子顺序逐格枚举，相同的未完成约束状态只计算一次，
+得到 "分量内地雷数 -> 方案数" 的多项式；不与任何数字相邻的格子
+只受总地雷数约束，按组合数加权合并各分量的结果。
+
+用法示例:
+    python3 minesweeper_probability.py --rows 16 --cols 30 --mines 99 --seed 1
+"""
+
+import argparse
+import time
+from collections import deque
+from math import comb
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from minesweeper_engine import CELL_FLAG, CELL_HIDDEN, neighbour_table
+
+# 多项式: 地雷数 -> 方案数
+Poly = Dict[int, int]
+
+
+def _add(target: Poly, poly: Poly, shift: int, factor: int):
+    """target += poly * factor * x^shift"""
+    for k, ways in poly.items():
+        target[k + shift] = target.get(k + shift, 0) + ways * factor
+
+
+def _multiply(a: Poly, b: Poly) -> Poly:
+    """多项式乘法 (两组地雷数分布的卷积)"""
+    result: Poly = {}
+    for ka, wa in a.items():
+        for kb, wb in b.items():
+            result[ka + kb] = result.get(ka + kb, 0) + wa * wb
+    return result
+
+
+class Component:
+    """
+    边界的一个连通分量
+
+    属于同样几个约束的格子合为一组，组内的格子可以互换，只需枚举组内的地雷数。
+    各组依次决定地雷数；第i层的状态是 "已经开始但尚未结束" 的约束各自还差的地雷数，
+    相同状态的前缀合并计数。
+    """
+
+    def __init__(self, cells: List[int], constraints: List[Tuple[List[int], int]]):
+        """
+        Args:
+            cells: 分量内的格子 (扁平索引)，按相邻顺序排列以减少同时未完成的约束
+            constraints: [(约束涉及的格子, 这些格子中的地雷数)]
+        """
+        self.cells = cells
+
+        # 按所属约束分组，组的顺序为组内第一个格子的顺序
+        membership: Dict[int, List[int]] = {cell: [] for cell in cells}
+        for c, (members, _) in enumerate(constraints):
+            for cell in members:
+                membership[cell].append(c)
+        groups: Dict[Tuple[int, ...], List[int]] = {}
+        for cell in cells:
+            groups.setdefault(tuple(membership[cell]), []).append(cell)
+        self.groups = list(groups.values())
+        group_constraints = list(groups)
+
+        # 每个约束的首末组位置和格子数
+        n = len(self.groups)
+        first = [n] * len(constraints)
+        last = [-1] * len(constraints)
+        size = [0] * len(constraints)
+        for g, members in enumerate(group_constraints):
+            for c in members:
+                first[c] = min(first[c], g)
+                last[c] = max(last[c], g)
+                size[c] += len(self.groups[g])
+
+        # open_at[g]: 决定第g组之前已经开始且未结束的约束
+        open_at = [tuple(c for c in range(len(constraints)) if first[c] < g <= last[c])
+                   for g in range(n + 1)]
+
+        # 每层的转移: 下一层状态的每个位置取自当前状态的哪个位置 (-1表示刚开始的约束)，
+        # 以及本组涉及的约束在两层状态中的位置、需要的地雷数和本组之后还剩的格子数
+        self.layers = []
+        seen = [0] * len(constraints)
+        for g, members in enumerate(group_constraints):
+            old = {c: k for k, c in enumerate(open_at[g])}
+            new = {c: k for k, c in enumerate(open_at[g + 1])}
+            carry = [(old.get(c, -1), constraints[c][1]) for c in open_at[g + 1]]
+            touched = []
+            for c in members:
+                seen[c] += len(self.groups[g])
+                touched.append((old.get(c, -1), new.get(c, -1), constraints[c][1],
+                                size[c] - seen[c]))
+            self.layers.append((carry, touched))
+
+        self.totals: Poly = {}
+        # mine_polys[g]: 第g组中的地雷数之和，按分量内的地雷总数分布
+        self.mine_polys: List[Poly] = [{} for _ in range(n)]
+        self._enumerate()
+
+    def _step(self, g: int, state: Tuple[int, ...], mines: int) -> Optional[Tuple[int, ...]]:
+        """在状态state下第g组放mines个地雷，返回下一层的状态，违反约束时返回None"""
+        carry, touched = self.layers[g]
+        following = [state[k] if k >= 0 else needed for k, needed in carry]
+        for old, new, needed, after in touched:
+            r = (state[old] if old >= 0 else needed) - mines
+            # 剩余需要的地雷数不能为负，也不能多于约束中还没决定的格子数
+            if r < 0 or r > after:
+                return None
+            if new >= 0:
+                following[new] = r
+        return tuple(following)
+
+    def _enumerate(self):
+        """逐层枚举可达状态，前向计数乘以后向计数得到每组的地雷数"""
+        n = len(self.groups)
+        forward: List[Dict[Tuple[int, ...], Poly]] = [{(): {0: 1}}]
+        transitions = []
+
+        for g in range(n):
+            size = len(self.groups[g])
+            layer: Dict[Tuple[int, ...], Poly] = {}
+            moves = {}
+            for state, poly in forward[g].items():
+                valid = []
+                for mines in range(size + 1):
+                    following = self._step(g, state, mines)
+                    if following is None:
+                        continue
+                    # 组内放mines个地雷有 comb(size, mines) 种放法
+                    ways = comb(size, mines)
+                    valid.append((mines, ways, following))
+                    _add(layer.setdefault(following, {}), poly, mines, ways)
+                moves[state] = valid
+            forward.append(layer)
+            transitions.append(moves)
+
+        # 后向: 从第g层的状态出发完成剩余各组的方案数，每个状态只计算一次
+        backward: Dict[Tuple[int, ...], Poly] = {(): {0: 1}} if () in forward[n] else {}
+        for g in range(n - 1, -1, -1):
+            previous: Dict[Tuple[int, ...], Poly] = {}
+            mine_poly: Poly = {}
+            for state, valid in transitions[g].items():
+                completions: Poly = {}
+                for mines, ways, following in valid:
+                    rest = backward.get(following)
+                    if not rest:
+                        continue
+                    _add(completions, rest, mines, ways)
+                    if mines:
+                        _add(mine_poly, _multiply(forward[g][state], rest), mines, ways * mines)
+                if completions:
+                    previous[state] = completions
+            self.mine_polys[g] = mine_poly
+            backward = previous
+
+        self.totals = backward.get((), {})
+
+
+def find_components(rows: int, cols: int, visible: Sequence[int]
+                    ) -> Tuple[List[Component], List[int], int]:
+    """
+    从可见状态中提取约束并分成连通分量
+
+    Returns:
+        (分量列表, 不与任何数字相邻的未揭开格子, 已标记的格子数)
+    """
+    offsets, indices = neighbour_table(rows, cols)
+    constraints: List[Tuple[List[int], int]] = []
+    flags = 0
+    for index, code in enumerate(visible):
+        if code == CELL_FLAG:
+            flags += 1
+            continue
+        if not 0 < code <= 8:
+            continue
+        hidden = []
+        flagged = 0
+        for n in indices[offsets[index]:offsets[index + 1]]:
+            value = visible[n]
+            if value == CELL_HIDDEN:
+                hidden.append(n)
+            elif value == CELL_FLAG:
+                flagged += 1
+        if hidden:
+            constraints.append((hidden, code - flagged))
+
+    # 共享格子的约束属于同一分量
+    by_cell: Dict[int, List[int]] = {}
+    for c, (members, _) in enumerate(constraints):
+        for cell in members:
+            by_cell.setdefault(cell, []).append(c)
+
+    components = []
+    seen_constraints = set()
+    for start in range(len(constraints)):
+        if start in seen_constraints:
+            continue
+        # 广度优先遍历，格子的顺序也就是相邻的顺序
+        seen_constraints.add(start)
+        queue = deque([start])
+        cells: List[int] = []
+        seen_cells = set()
+        members = []
+        while queue:
+            c = queue.popleft()
+            members.append(constraints[c])
+            for cell in constraints[c][0]:
+                if cell in seen_cells:
+                    continue
+                seen_cells.add(cell)
+                cells.append(cell)
+                for other in by_cell[cell]:
+                    if other not in seen_constraints:
+                        seen_constraints.add(other)
+                        queue.append(other)
+        components.append(Component(cells, members))
+
+    unconstrained = [index for index, code in enumerate(visible)
+                     if code == CELL_HIDDEN and index not in by_cell]
+    return components, unconstrained, flags
+
+
+def mine_probabilities(rows: int, cols: int, mines: int, visible: Sequence[int]) -> Dict[int, float]:
+    """
+    计算每个未揭开且未标记的格子是地雷的精确概率
+
+    标记视为正确的地雷。所有满足数字约束和总地雷数的布局视为等可能。
+
+    Args:
+        rows: 行数
+        cols: 列数
+        mines: 地雷总数
+        visible: 按行展开的可见状态编码，见 minesweeper_engine 中的 CELL_* 常量
+
+    Returns:
+        {格子索引: 是地雷的概率}
+
+    Raises:
+        ValueError: 可见状态与地雷数矛盾，例如标记错误
+    """
+    components, unconstrained, flags = find_components(rows, cols, visible)
+    remaining = mines - flags
+    free = len(unconstrained)
+
+    # others[c]: 除分量c以外所有分量的地雷数分布，用前缀积和后缀积求得
+    count = len(components)
+    prefix: List[Poly] = [{0: 1}]
+    for component in components:
+        prefix.append(_multiply(prefix[-1], component.totals))
+    suffix: List[Poly] = [{0: 1}] * (count + 1)
+    for c in range(count - 1, -1, -1):
+        suffix[c] = _multiply(components[c].totals, suffix[c + 1])
+
+    # 边界外的格子放剩下的地雷，共有 comb(free, remaining - k) 种放法
+    def weight(poly: Poly, extra: int = 0) -> int:
+        return sum(ways * comb(free - extra, remaining - k - extra)
+                   for k, ways in poly.items() if 0 <= remaining - k - extra <= free - extra)
+
+    total = weight(prefix[-1])
+    if total == 0:
+        raise ValueError("可见状态与地雷数矛盾，没有符合条件的布局")
+
+    probabilities: Dict[int, float] = {}
+    for c, component in enumerate(components):
+        others = _multiply(prefix[c], suffix[c + 1])
+        for group, mine_poly in zip(component.groups, component.mine_polys):
+            # 组内的格子是地雷的概率相同
+            probability = weight(_multiply(mine_poly, others)) / total / len(group)
+            for cell in group:
+                probabilities[cell] = probability
+
+    if free:
+        # 某个边界外的格子是地雷: 其余 free - 1 格放剩下的 remaining - k - 1 个地雷
+        outside = weight(prefix[-1], extra=1) / total
+        for cell in unconstrained:
+            probabilities[cell] = outside
+
+    return probabilities
+
+
+def game_probabilities(game) -> Dict[int, float]:
+    """
+    计算游戏当前状态下的地雷概率
+
+    Args:
+        game: Minesweeper 或 MinesweeperGUI 实例，需要提供 visible_codes()
+    """
+    return mine_probabilities(game.rows, game.cols, game.mines, game.visible_codes())
+
+
+def safest_cell(probabilities: Dict[int, float]) -> Optional[int]:
+    """概率最低的格子，概率相同时取索引最小的，没有未揭开的格子时返回None"""
+    if not probabilities:
+        return None
+    return min(probabilities, key=lambda index: (probabilities[index], index))
+
+
+def main():
+    """主函数: 用求解器走到需要猜测的局面，输出概率分析和用时"""
+    from minesweeper import Minesweeper
+    from minesweeper_solver import MinesweeperSolver
+
+    parser = argparse.ArgumentParser(description="扫雷概率分析")
+    parser.add_argument('--rows', type=int, default=16, help="行数")
+    parser.add_argument('--cols', type=int, default=30, help="列数")
+    parser.add_argument('--mines', type=int, default=99, help="地雷数量")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    game = Minesweeper(args.rows, args.cols, args.mines, seed=args.seed)
+    solver = MinesweeperSolver(game)
+    while True:
+        solver.solve()
+        if game.game_over:
+            break
+
+        # 无法继续推理时揭开最安全的格子
+        start = time.perf_counter()
+        probabilities = game_probabilities(game)
+        elapsed = time.perf_counter() - start
+
+        cell = safest_cell(probabilities)
+        row, col = divmod(cell, game.cols)
+        print(f"{len(probabilities)} 个未揭开格子, 用时 {elapsed * 1000:.2f} ms, "
+              f"揭开 ({row}, {col}) 地雷概率 {probabilities[cell]:.2%}")
+        game.reveal_cell(row, col)
+
+    print(game.render())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+扫雷录像
+把一局游戏的操作记录成紧凑的二进制文件，并能快速跳转到任意一步
+
+文件格式 (小端序):
+    文件头     魔数、版本、行数、列数、地雷数、种子、关键帧间隔
+    操作记录   每步固定13字节: 操作、行、列、距开始的毫秒数；撤销和重做之后总有一个关键帧
+    游戏板     zlib压缩的游戏板
+    关键帧     zlib压缩的可见状态编码，每隔若干步一帧
+    关键帧索引 每帧: 之前的步数、文件偏移、长度
+    文件尾     步数以及游戏板和关键帧索引的位置
+
+用法示例:
+    python3 minesweeper_replay.py game.msr --move 120
+"""
+
+import argparse
+import bisect
+import mmap
+import shutil
+import struct
+import tempfile
+import time
+import zlib
+from typing import List, Tuple
+
+from minesweeper import Minesweeper
+from minesweeper_engine import ACTION_FLAG, ACTION_REDO, ACTION_REVEAL, ACTION_UNDO
+
+MAGIC = b'MSRP'
+END_MAGIC = b'MSRE'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHIIIQI')   # 魔数, 版本, 行数, 列数, 地雷数, 种子, 关键帧间隔
+MOVE = struct.Struct('<BIII')         # 操作, 行, 列, 毫秒
+KEYFRAME = struct.Struct('<IQI')      # 之前的步数, 偏移, 长度
+TRAILER = struct.Struct('<QQIQI4s')   # 步数, 游戏板偏移, 游戏板长度, 索引偏移, 关键帧数, 魔数
+
+DEFAULT_KEYFRAME_INTERVAL = 1000
+
+
+class GameRecorder:
+    def __init__(self, path: str, game, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        """
+        开始录制一局游戏
+
+        游戏在有效的揭开和标记操作前调用 record()，结束时调用 close()。
+
+        Args:
+            path: 录像文件路径
+            game: Minesweeper 或 MinesweeperGUI 实例，需要提供 visible_codes()
+            keyframe_interval: 每隔多少步保存一个关键帧
+        """
+        self.game = game
+        self.keyframe_interval = keyframe_interval
+        self.moves = 0
+        self.start_time = time.perf_counter()
+
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, game.rows, game.cols, game.mines,
+                                    game.seed, keyframe_interval))
+
+        # 关键帧先写入临时文件，结束时接在操作记录之后，内存占用与步数无关
+        self.keyframes = tempfile.TemporaryFile()
+        self.keyframe_index: List[Tuple[int, int, int]] = []
+        # 撤销和重做无法从之前的关键帧重放，在下一步之前 (或结束时) 保存一个关键帧
+        self.keyframe_due = False
+
+    def record(self, action: int, row: int, col: int):
+        """记录一步操作，在操作生效之前调用"""
+        if self.keyframe_due or self.moves % self.keyframe_interval == 0:
+            self._write_keyframe()
+
+        elapsed_ms = int((time.perf_counter() - self.start_time) * 1000)
+        self.file.write(MOVE.pack(action, row, col, elapsed_ms))
+        self.moves += 1
+        self.keyframe_due = action in (ACTION_UNDO, ACTION_REDO)
+
+    def _write_keyframe(self):
+        """保存当前可见状态"""
+        data = zlib.compress(bytes(self.game.visible_codes()))
+        self.keyframe_index.append((self.moves, self.keyframes.tell(), len(data)))
+        self.keyframes.write(data)
+        self.keyframe_due = False
+
+    def close(self):
+        """写入游戏板、关键帧和索引，完成录像文件"""
+        if self.file.closed:
+            return
+
+        if self.keyframe_due:
+            self._write_keyframe()
+
+        f = self.file
+        board = bytes(value + 1 for row in self.game.board for value in row)
+        board_data = zlib.compress(board)
+        board_offset = f.tell()
+        f.write(board_data)
+
+        keyframe_base = f.tell()
+        self.keyframes.seek(0)
+        shutil.copyfileobj(self.keyframes, f)
+        self.keyframes.close()
+
+        index_offset = f.tell()
+        for moves, offset, length in self.keyframe_index:
+            f.write(KEYFRAME.pack(moves, keyframe_base + offset, length))
+
+        f.write(TRAILER.pack(self.moves, board_offset, len(board_data), index_offset,
+                             len(self.keyframe_index), END_MAGIC))
+        f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayReader:
+    def __init__(self, path: str):
+        """
+        打开录像文件
+
+        只读取文件头、文件尾和关键帧索引，操作记录和关键帧按需从内存映射中读取。
+        """
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.rows, self.cols, self.mines, self.seed,
+         self.keyframe_interval) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} 不是有效的扫雷录像文件")
+
+        (self.move_count, self.board_offset, self.board_length, index_offset,
+         keyframe_count, end_magic) = TRAILER.unpack_from(self.data, len(self.data) - TRAILER.size)
+        if end_magic != END_MAGIC:
+            raise ValueError(f"{path} 录像文件不完整")
+
+        self.keyframes = [KEYFRAME.unpack_from(self.data, index_offset + i * KEYFRAME.size)
+                          for i in range(keyframe_count)]
+        self._keyframe_moves = [moves for moves, _, _ in self.keyframes]
+        self._board = None
+
+    def __len__(self) -> int:
+        return self.move_count
+
+    def move(self, index: int) -> Tuple[int, int, int, int]:
+        """第index步操作: (操作, 行, 列, 毫秒)"""
+        if not 0 <= index < self.move_count:
+            raise IndexError(index)
+        return MOVE.unpack_from(self.data, HEADER.size + index * MOVE.size)
+
+    @property
+    def board(self) -> List[List[int]]:
+        """游戏板，第一次访问时解压"""
+        if self._board is None:
+            raw = zlib.decompress(self.data[self.board_offset:self.board_offset + self.board_length])
+            cols = self.cols
+            self._board = [[value - 1 for value in raw[r * cols:(r + 1) * cols]]
+                           for r in range(self.rows)]
+        return self._board
+
+    def state_at(self, moves: int) -> Minesweeper:
+        """
+        重建执行了前moves步之后的游戏状态
+
+        从不晚于该步的最近关键帧开始，最多重放 keyframe_interval 步。
+        撤销和重做之后总有关键帧，因此重放的范围内只有揭开和标记。
+        """
+        if not 0 <= moves <= self.move_count:
+            raise IndexError(moves)
+
+        game = Minesweeper.from_board(self.board, self.seed)
+        start = 0
+        position = bisect.bisect_right(self._keyframe_moves, moves) - 1
+        if position >= 0:
+            start, offset, length = self.keyframes[position]
+            game.load_visible_codes(zlib.decompress(self.data[offset:offset + length]))
+
+        for index in range(start, moves):
+            action, row, col, _ = self.move(index)
+            if action == ACTION_FLAG:
+                game.toggle_flag(row, col)
+            elif action == ACTION_REVEAL:
+                game.reveal_cell(row, col)
+
+        return game
+
+    def close(self):
+        """关闭文件"""
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="扫雷录像回放")
+    parser.add_argument('path', help="录像文件")
+    parser.add_argument('--move', type=int, help="显示执行了前N步之后的状态，默认为最后一步")
+    args = parser.parse_args()
+
+    with ReplayReader(args.path) as replay:
+        moves = len(replay) if args.move is None else args.move
+        duration = replay.move(len(replay) - 1)[3] / 1000 if len(replay) else 0
+        print(f"{replay.rows}x{replay.cols}, {replay.mines}个地雷, 种子 {replay.seed}")
+        print(f"共 {len(replay)} 步, 用时 {duration:.1f} 秒")
+        print(f"第 {moves} 步之后:\n")
+        print(replay.state_at(moves).render())
+
+
+if __name__ == "__main__":
+    main()
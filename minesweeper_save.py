@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+扫雷存档
+把进行中的游戏保存为固定布局的二进制文件，读取时内存映射，不解析格子数据
+
+文件格式 (小端序，各段按页对齐):
+    文件头     魔数、版本、行数、列数、地雷数、种子、用时、标记数、剩余格子数、游戏状态
+    地雷位置   每个地雷4字节的扁平索引
+    标记位置   每个标记4字节的扁平索引，按地雷数预留空间
+    游戏板     每格1字节，-1表示地雷，0-8表示周围地雷数
+    可见状态   每格1字节，见 minesweeper_engine 中的 CELL_* 常量
+
+读取时游戏板和可见状态直接作为引擎的数组使用 (写时复制的内存映射)，
+只有被访问的页才会从磁盘读入。之后的保存只写回变化过的可见状态页、标记位置和文件头。
+
+用法示例:
+    python3 minesweeper_save.py game.sav
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Set, Tuple
+
+from minesweeper_engine import ChangeSet, GameEngine
+
+MAGIC = b'MSSV'
+VERSION = 1
+
+# 魔数, 版本, 行数, 列数, 地雷数, 种子, 用时(秒), 标记数, 剩余格子数, 是否结束, 是否获胜
+HEADER = struct.Struct('<4sHIIIQdIIBB')
+
+# 默认存档路径
+DEFAULT_SAVE_PATH = 'minesweeper.sav'
+
+# 各段的对齐单位，也是增量保存的单位
+PAGE_SIZE = 4096
+
+
+def _align(offset: int) -> int:
+    """向上对齐到页边界"""
+    return (offset + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+
+
+def layout(rows: int, cols: int, mines: int) -> Tuple[int, int, int, int, int]:
+    """
+    各段在文件中的偏移
+
+    Returns:
+        (地雷位置偏移, 标记位置偏移, 游戏板偏移, 可见状态偏移, 文件长度)
+    """
+    size = rows * cols
+    mines_offset = PAGE_SIZE
+    flags_offset = mines_offset + mines * 4
+    values_offset = _align(flags_offset + mines * 4)
+    visible_offset = _align(values_offset + size)
+    return mines_offset, flags_offset, values_offset, visible_offset, visible_offset + size
+
+
+def _pack_indices(indices: Iterable[int]) -> bytes:
+    """扁平索引打包为小端序的4字节整数"""
+    packed = array('i', indices)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_indices(data: bytes) -> List[int]:
+    """_pack_indices 的逆操作"""
+    packed = array('i')
+    packed.frombytes(data)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tolist()
+
+
+class SaveFile:
+    def __init__(self, path: str):
+        """
+        打开存档
+
+        只读取文件头、地雷位置和标记位置；游戏板和可见状态在 engine() 中映射，不复制。
+
+        Raises:
+            ValueError: 不是有效的扫雷存档
+        """
+        self.path = path
+        self.file = open(path, 'r+b')
+        self.data = None
+        try:
+            # 文件头都不完整时不映射 (空文件不能映射)
+            if os.fstat(self.file.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path} 不是有效的扫雷存档")
+            # 写时复制: 游戏中的修改不会直接写入文件，保存时再写回变化的页
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_COPY)
+            self._read_header()
+        except ValueError:
+            if self.data is not None:
+                self.data.close()
+            self.file.close()
+            raise
+
+        # 可见状态中变化过、尚未写回的页号 (相对于可见状态段)
+        self.dirty: Set[int] = set()
+        # 累计写回的页数，用于确认保存是增量的
+        self.pages_written = 0
+
+    def _read_header(self):
+        """
+        读取并检查文件头
+
+        Raises:
+            ValueError: 不是有效的扫雷存档或存档不完整
+        """
+        (magic, version, self.rows, self.cols, self.mines, self.seed, self.elapsed,
+         self.flag_count, self.cells_to_reveal, game_over, game_won) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} 不是有效的扫雷存档")
+        self.game_over = bool(game_over)
+        self.game_won = bool(game_won)
+
+        (self.mines_offset, self.flags_offset, self.values_offset, self.visible_offset,
+         length) = layout(self.rows, self.cols, self.mines)
+        if len(self.data) != length:
+            raise ValueError(f"{self.path} 存档不完整")
+
+    def engine(self, copy: bool = False) -> GameEngine:
+        """
+        用映射的游戏板和可见状态创建引擎，数组中的页在第一次访问时才读入
+
+        Args:
+            copy: 把游戏板和可见状态复制到内存，引擎不再依赖存档文件，之后可以删除存档
+        """
+        size = self.rows * self.cols
+        view = memoryview(self.data)
+        values = view[self.values_offset:self.values_offset + size].cast('b')
+        visible = view[self.visible_offset:self.visible_offset + size]
+        if copy:
+            values, visible = array('b', values.tobytes()), bytearray(visible)
+
+        engine = GameEngine(self.rows, self.cols, self.mines)
+        mines = _unpack_indices(self.data[self.mines_offset:self.mines_offset + self.mines * 4])
+        flags = _unpack_indices(self.data[self.flags_offset:self.flags_offset + self.flag_count * 4])
+        engine.attach(values, visible, mines, flags, self.cells_to_reveal,
+                      self.game_over, self.game_won)
+        return engine
+
+    def mark(self, changes: ChangeSet):
+        """记录变化的格子所在的页，下次 save() 时写回"""
+        for index, _ in changes:
+            self.dirty.add(index // PAGE_SIZE)
+
+    def mark_all(self):
+        """整个可见状态都需要写回，例如从关键帧恢复之后"""
+        self.dirty.update(range((self.rows * self.cols + PAGE_SIZE - 1) // PAGE_SIZE))
+
+    def save(self, engine: GameEngine, elapsed: float) -> int:
+        """
+        增量保存: 写回变化过的可见状态页、标记位置和文件头
+
+        游戏板和地雷位置在游戏开始后不再变化，只在 save_game() 中写入。
+
+        Args:
+            engine: 与存档对应的游戏引擎
+            elapsed: 已用时间(秒)
+
+        Returns:
+            写回的可见状态页数
+        """
+        if len(engine.flags) > self.mines:
+            raise ValueError("标记数超过地雷数")
+
+        f = self.file
+        visible = engine.visible
+        pages = sorted(self.dirty)
+        # 相邻的页合并为一次写入
+        for start, end in _runs(pages):
+            f.seek(self.visible_offset + start * PAGE_SIZE)
+            f.write(visible[start * PAGE_SIZE:end * PAGE_SIZE])
+        self.dirty.clear()
+        self.pages_written += len(pages)
+
+        f.seek(self.flags_offset)
+        f.write(_pack_indices(engine.flags))
+
+        self.elapsed = elapsed
+        self.flag_count = len(engine.flags)
+        self.cells_to_reveal = engine.cells_to_reveal
+        self.game_over = engine.game_over
+        self.game_won = engine.game_won
+        f.seek(0)
+        f.write(self._header())
+        f.flush()
+        return len(pages)
+
+    def _header(self) -> bytes:
+        return HEADER.pack(MAGIC, VERSION, self.rows, self.cols, self.mines, self.seed, self.elapsed,
+                           self.flag_count, self.cells_to_reveal, self.game_over, self.game_won)
+
+    def close(self):
+        """关闭文件；映射在引擎不再使用时释放"""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _runs(pages: List[int]) -> List[Tuple[int, int]]:
+    """有序页号合并为连续区间 [(起始页, 结束页)]"""
+    runs: List[Tuple[int, int]] = []
+    for page in pages:
+        if runs and runs[-1][1] == page:
+            runs[-1] = (runs[-1][0], page + 1)
+        else:
+            runs.append((page, page + 1))
+    return runs
+
+
+def save_game(path: str, engine: GameEngine, seed: int, elapsed: float) -> SaveFile:
+    """
+    完整写入存档并打开，之后用返回的 SaveFile 增量保存
+
+    先写入临时文件再替换，已经映射旧存档的引擎不受影响。
+
+    Args:
+        path: 存档路径
+        engine: 游戏引擎，地雷必须已经放置
+        seed: 游戏板的随机种子
+        elapsed: 已用时间(秒)
+    """
+    rows, cols, mines = engine.rows, engine.cols, engine.mines
+    mines_offset, flags_offset, values_offset, visible_offset, length = layout(rows, cols, mines)
+    if len(engine.flags) > mines:
+        raise ValueError("标记数超过地雷数")
+
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, mines, seed, elapsed, len(engine.flags),
+                            engine.cells_to_reveal, engine.game_over, engine.game_won))
+        f.seek(mines_offset)
+        f.write(_pack_indices(engine.mine_positions))
+        f.seek(flags_offset)
+        f.write(_pack_indices(engine.flags))
+        f.seek(values_offset)
+        f.write(engine.values)
+        f.seek(visible_offset)
+        f.write(engine.visible)
+        f.truncate(length)
+    os.replace(temp, path)
+    return SaveFile(path)
+
+
+def main():
+    """主函数: 显示存档信息"""
+    parser = argparse.ArgumentParser(description="扫雷存档信息")
+    parser.add_argument('path', help="存档文件")
+    args = parser.parse_args()
+
+    with SaveFile(args.path) as save:
+        state = "获胜" if save.game_won else "失败" if save.game_over else "进行中"
+        print(f"{save.rows}x{save.cols}, {save.mines}个地雷, 种子 {save.seed}")
+        print(f"用时 {save.elapsed:.0f} 秒, 已标记 {save.flag_count} 个, "
+              f"剩余 {save.cells_to_reveal} 格, {state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+扫雷游戏服务器
+用 asyncio 在一个进程中托管大量同时进行的游戏，每个连接对应一局 Minesweeper
+
+协议 (UTF-8 文本，每行一条命令，参数用空格分隔):
+    new 行数 列数 地雷数 [种子]   开始新游戏        -> ok 种子
+    reveal 行 列                  揭开格子          -> ok 状态 变化数 索引:编码 ...
+    flag 行 列                    切换标记          -> ok 状态 变化数 索引:编码 ...
+    state                         当前可见状态      -> ok 状态 行数 列数 每格一个字符
+    quit                          断开连接
+出错时回复 err 原因。状态为 playing、won 或 lost；编码见 minesweeper_engine 中的 CELL_* 常量，
+可见状态中 '.' 表示未揭开，其余字符与命令行版本相同。
+
+大游戏板上的耗时操作 (创建游戏、揭开可能展开很大一片的空白格子、输出整个可见状态)
+交给线程池执行，事件循环在执行期间仍能处理其他连接。
+
+用法示例:
+    python3 minesweeper_server.py --port 7777
+"""
+
+import argparse
+import asyncio
+from typing import Dict, List, Optional
+
+from minesweeper import Minesweeper
+from minesweeper_engine import CELL_FLAG, CELL_HIDDEN, CODE_TO_CHAR, ChangeSet
+
+DEFAULT_PORT = 7777
+
+# 格子数不少于此值的游戏板上，耗时操作交给线程池
+DEFAULT_OFFLOAD_CELLS = 10000
+
+# 每局游戏板格子数的默认上限，防止一条 new 命令占用过多内存
+# (每格约需60字节: 相邻格子表、嵌套列表形式的游戏板和可见状态)
+DEFAULT_MAX_CELLS = 500 * 500
+
+# 客户端读取回复时的行长度上限，大游戏板上一次展开的变化集合可能有几十MB
+REPLY_LIMIT = 1 << 30
+
+# state 命令中每个可见状态编码对应的字符
+STATE_CHARS = dict(CODE_TO_CHAR)
+STATE_CHARS[CELL_HIDDEN] = '.'
+
+
+def game_state(game: Minesweeper) -> str:
+    """playing、won 或 lost"""
+    if not game.game_over:
+        return 'playing'
+    return 'won' if game.game_won else 'lost'
+
+
+def format_changes(game: Minesweeper, changes: ChangeSet) -> str:
+    """reveal 和 flag 的回复"""
+    cells = " ".join(f"{index}:{code}" for index, code in changes)
+    return f"ok {game_state(game)} {len(changes)} {cells}".rstrip()
+
+
+def reveal_and_format(game: Minesweeper, row: int, col: int) -> str:
+    """揭开格子并返回回复"""
+    return format_changes(game, game.reveal(row, col))
+
+
+def format_state(game: Minesweeper) -> str:
+    """state 的回复"""
+    codes = "".join(map(STATE_CHARS.__getitem__, game.engine.visible))
+    return f"ok {game_state(game)} {game.rows} {game.cols} {codes}"
+
+
+class GameServer:
+    def __init__(self, offload_cells: int = DEFAULT_OFFLOAD_CELLS,
+                 max_cells: int = DEFAULT_MAX_CELLS):
+        """
+        创建服务器，调用 start() 后开始监听
+
+        Args:
+            offload_cells: 格子数不少于此值的游戏板上，耗时操作交给线程池
+            max_cells: 每局游戏板格子数的上限
+        """
+        self.offload_cells = offload_cells
+        self.max_cells = max_cells
+        self.server: Optional[asyncio.AbstractServer] = None
+
+        # 计数
+        self.sessions = 0          # 当前连接数
+        self.sessions_total = 0    # 累计连接数
+        self.games = 0             # 累计开始的游戏数
+        self.moves = 0             # 累计的揭开和标记操作数
+        self.offloaded = 0         # 交给线程池的命令数
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> int:
+        """
+        开始监听
+
+        Returns:
+            实际监听的端口，port为0时由系统选择
+        """
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """停止监听并等待关闭"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'sessions': self.sessions,
+            'sessions_total': self.sessions_total,
+            'games': self.games,
+            'moves': self.moves,
+            'offloaded': self.offloaded,
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接，命令按顺序执行，同一局游戏不会被并发修改"""
+        self.sessions += 1
+        self.sessions_total += 1
+        game: Optional[Minesweeper] = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode('utf-8', 'replace').split()
+                if not words:
+                    continue
+                if words[0] == 'quit':
+                    break
+
+                try:
+                    if words[0] == 'new':
+                        game = await self.new_game(words[1:])
+                        reply = f"ok {game.seed}"
+                    elif game is None:
+                        reply = "err 请先用 new 开始游戏"
+                    elif words[0] in ('reveal', 'flag'):
+                        reply = await self.move(game, words[0], words[1:])
+                    elif words[0] == 'state':
+                        reply = await self.run(game.rows * game.cols, format_state, game)
+                    else:
+                        reply = f"err 未知命令 {words[0]}"
+                except ValueError as e:
+                    reply = f"err {e}"
+
+                writer.write(reply.encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # 连接断开，或一行命令超过 StreamReader 的长度上限
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def run(self, cells: int, func, *args):
+        """在 cells 个格子的游戏板上执行 func，大游戏板交给线程池"""
+        if cells < self.offload_cells:
+            return func(*args)
+        # 连接的命令按顺序执行，线程池执行期间不会有其他命令修改这局游戏
+        self.offloaded += 1
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def new_game(self, args: List[str]) -> Minesweeper:
+        """
+        解析 new 的参数并创建游戏
+
+        Raises:
+            ValueError: 参数无效
+        """
+        if len(args) not in (3, 4):
+            raise ValueError("用法: new 行数 列数 地雷数 [种子]")
+        rows, cols, mines = (int(a) for a in args[:3])
+        seed = int(args[3]) if len(args) == 4 else None
+        if not (rows > 0 and cols > 0 and 0 <= mines < rows * cols):
+            raise ValueError("游戏板大小或地雷数无效")
+        if rows * cols > self.max_cells:
+            raise ValueError(f"游戏板最多 {self.max_cells} 格")
+        self.games += 1
+        return await self.run(rows * cols, Minesweeper, rows, cols, mines, seed)
+
+    async def move(self, game: Minesweeper, action: str, args: List[str]) -> str:
+        """
+        执行揭开或标记，可能展开大片区域的揭开交给线程池
+
+        Raises:
+            ValueError: 坐标无效
+        """
+        if len(args) != 2:
+            raise ValueError(f"用法: {action} 行 列")
+        row, col = int(args[0]), int(args[1])
+        if not (0 <= row < game.rows and 0 <= col < game.cols):
+            raise ValueError("坐标超出范围")
+        if game.game_over:
+            raise ValueError("游戏已结束")
+
+        index = row * game.cols + col
+        if action == 'flag':
+            # 在引擎上检查，不能标记时回复错误，不让 Minesweeper.flag 在服务器上打印提示
+            if not game.engine.can_flag(index):
+                if game.engine.visible[index] not in (CELL_HIDDEN, CELL_FLAG):
+                    raise ValueError("已揭开的格子不能标记")
+                raise ValueError(f"标记数量已达到地雷总数 {game.mines}")
+            self.moves += 1
+            return format_changes(game, game.flag(row, col))
+
+        self.moves += 1
+        if game.engine.values[index] == 0 and game.engine.visible[index] == CELL_HIDDEN:
+            # 空白格子可能展开很大一片，揭开和格式化变化集合一起执行
+            return await self.run(game.rows * game.cols, reveal_and_format, game, row, col)
+        return format_changes(game, game.reveal(row, col))
+
+
+async def serve(host: str, port: int, offload_cells: int, max_cells: int):
+    """运行服务器直到被中断"""
+    server = GameServer(offload_cells, max_cells)
+    port = await server.start(host, port)
+    print(f"扫雷服务器监听 {host}:{port}")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="扫雷游戏服务器")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="监听端口")
+    parser.add_argument('--offload-cells', type=int, default=DEFAULT_OFFLOAD_CELLS,
+                        help="格子数不少于此值的游戏板上，耗时操作交给线程池")
+    parser.add_argument('--max-cells', type=int, default=DEFAULT_MAX_CELLS,
+                        help="每局游戏板格子数的上限")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.offload_cells, args.max_cells))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
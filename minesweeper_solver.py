@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+扫雷求解器
+只通过 reveal_cell 和 toggle_flag 操作 Minesweeper 实例，
+反复应用单格约束和子集/超集约束，直到无法继续推理
+"""
+
+from collections import defaultdict
+from typing import List, NamedTuple, Set, Tuple
+
+from minesweeper import Minesweeper
+
+Cell = Tuple[int, int]
+
+NUMBERS = '12345678'
+
+
+class SolveResult(NamedTuple):
+    """求解结果"""
+    moves: int          # 调用 reveal_cell / toggle_flag 的次数
+    reveals: int        # 揭开次数
+    flags: int          # 标记次数
+    needs_guess: bool   # 游戏未结束且无法继续推理，需要猜测
+
+
+class MinesweeperSolver:
+    def __init__(self, game: Minesweeper):
+        """
+        初始化求解器
+
+        Args:
+            game: 要求解的游戏，求解器只读取其可见状态(revealed)
+        """
+        self.game = game
+
+    def find_moves(self) -> Tuple[Set[Cell], Set[Cell]]:
+        """
+        根据当前可见状态推理
+
+        Returns:
+            (一定安全的格子, 一定是地雷的格子)
+        """
+        game = self.game
+        rows, cols = game.rows, game.cols
+        revealed = game.revealed
+
+        safe: Set[Cell] = set()
+        mines: Set[Cell] = set()
+        constraints: List[Tuple[frozenset, int]] = []
+        hidden_cells: List[Cell] = []
+        flag_total = 0
+
+        for r in range(rows):
+            row = revealed[r]
+            row_range = range(max(r - 1, 0), min(r + 2, rows))
+            for c in range(cols):
+                cell = row[c]
+                if cell == ' ':
+                    hidden_cells.append((r, c))
+                    continue
+                if cell == 'F':
+                    flag_total += 1
+                    continue
+                if cell not in NUMBERS:
+                    continue
+
+                # 单格约束: 周围未揭开格子中的地雷数 = 数字 - 已标记数
+                hidden = []
+                flagged = 0
+                col_range = range(max(c - 1, 0), min(c + 2, cols))
+                for nr in row_range:
+                    neighbour_row = revealed[nr]
+                    for nc in col_range:
+                        value = neighbour_row[nc]
+                        if value == ' ':
+                            hidden.append((nr, nc))
+                        elif value == 'F':
+                            flagged += 1
+
+                if not hidden:
+                    continue
+
+                remaining = int(cell) - flagged
+                if remaining == 0:
+                    safe.update(hidden)
+                elif remaining == len(hidden):
+                    mines.update(hidden)
+                else:
+                    constraints.append((frozenset(hidden), remaining))
+
+        # 全局约束: 剩余地雷数为0或等于未揭开格子数
+        remaining_mines = game.mines - flag_total
+        if hidden_cells and remaining_mines == 0:
+            safe.update(hidden_cells)
+        elif hidden_cells and remaining_mines == len(hidden_cells):
+            mines.update(hidden_cells)
+
+        if not safe and not mines:
+            self._apply_subset_rule(constraints, safe, mines)
+
+        return safe, mines
+
+    @staticmethod
+    def _apply_subset_rule(constraints: List[Tuple[frozenset, int]],
+                           safe: Set[Cell], mines: Set[Cell]):
+        """
+        子集/超集约束
+
+        对共享格子的两个约束A、B: 若 B的雷数 - A的雷数 = |B - A|，
+        则 B - A 全是地雷且 A - B 全部安全；若A是B的子集且雷数相同，则 B - A 全部安全。
+        """
+        by_cell = defaultdict(list)
+        for i, (cells, _) in enumerate(constraints):
+            for cell in cells:
+                by_cell[cell].append(i)
+
+        for i, (a, mines_a) in enumerate(constraints):
+            related = {j for cell in a for j in by_cell[cell] if j != i}
+            for j in related:
+                b, mines_b = constraints[j]
+                only_b = b - a
+                if not only_b:
+                    continue
+
+                only_a = a - b
+                if mines_b - mines_a == len(only_b):
+                    mines.update(only_b)
+                    safe.update(only_a)
+                elif not only_a and mines_b == mines_a:
+                    safe.update(only_b)
+
+    def step(self) -> Tuple[int, int]:
+        """
+        推理一轮并执行所有确定的操作
+
+        Returns:
+            (揭开次数, 标记次数)
+        """
+        game = self.game
+        safe, mines = self.find_moves()
+
+        flags = 0
+        for row, col in mines:
+            if game.revealed[row][col] == ' ':
+                game.toggle_flag(row, col)
+                flags += 1
+
+        reveals = 0
+        for row, col in safe:
+            if game.game_over:
+                break
+            # 洪水填充可能已经揭开了该格子
+            if game.revealed[row][col] == ' ':
+                game.reveal_cell(row, col)
+                reveals += 1
+
+        return reveals, flags
+
+    def solve(self) -> SolveResult:
+        """反复推理直到游戏结束或无法继续"""
+        reveals = flags = 0
+
+        while not self.game.game_over:
+            step_reveals, step_flags = self.step()
+            if step_reveals == 0 and step_flags == 0:
+                break
+            reveals += step_reveals
+            flags += step_flags
+
+        return SolveResult(
+            moves=reveals + flags,
+            reveals=reveals,
+            flags=flags,
+            needs_guess=not self.game.game_over
+        )
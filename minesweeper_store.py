@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+有内存上限的游戏存储
+按游戏编号保存大量游戏，内存中只保留最近使用的游戏引擎 (扁平数组，不生成嵌套列表)，
+超过内存上限时把最久未使用的游戏写入磁盘，下次访问时自动读回
+
+磁盘上的格式与存档相同，见 minesweeper_save。
+
+用法示例:
+    python3 minesweeper_store.py --games 10000 --max-mb 4 --accesses 100000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from minesweeper_engine import GameEngine
+from minesweeper_save import SaveFile, save_game
+
+# 内存中游戏的默认上限 (字节)
+DEFAULT_MAX_BYTES = 64 << 20
+
+
+def engine_nbytes(engine: GameEngine) -> int:
+    """估计一个游戏引擎占用的内存，相邻格子表由同样大小的游戏板共用，不计入"""
+    nbytes = (sys.getsizeof(engine) + sys.getsizeof(engine.values) + sys.getsizeof(engine.visible)
+              + sys.getsizeof(engine.flag_counts) + sys.getsizeof(engine.mine_positions)
+              + sys.getsizeof(engine.flags) + 32 * (len(engine.mine_positions) + len(engine.flags)))
+    if engine.openings is not None:
+        nbytes += engine.openings.nbytes()
+    return nbytes
+
+
+class StoredGame:
+    """内存中的一个游戏"""
+
+    __slots__ = ('engine', 'seed', 'nbytes')
+
+    def __init__(self, engine: GameEngine, seed: int):
+        self.engine = engine
+        self.seed = seed
+        self.nbytes = engine_nbytes(engine)
+
+
+class GameStore:
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        创建游戏存储
+
+        Args:
+            directory: 换出的游戏写入的目录，None表示使用临时目录并在 close() 时删除
+            max_bytes: 内存中游戏的上限，至少保留最近访问的一个游戏
+        """
+        self.own_directory = directory is None
+        self.directory = tempfile.mkdtemp(prefix='minesweeper-store-') if directory is None else directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        # 内存中的游戏，按最近访问排序
+        self.resident: 'OrderedDict[int, StoredGame]' = OrderedDict()
+        self.nbytes = 0
+        # 已写入磁盘的游戏编号
+        self.spilled: Set[int] = set()
+        self.next_id = 0
+
+        # 计数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def create(self, rows: int, cols: int, mines: int, seed: Optional[int] = None) -> int:
+        """
+        开始一局新游戏
+
+        Returns:
+            游戏编号
+        """
+        seed = seed if seed is not None else random.randrange(1 << 32)
+        engine = GameEngine(rows, cols, mines)
+        engine.place_mines(random.Random(seed))
+        return self.add(engine, seed)
+
+    def add(self, engine: GameEngine, seed: int) -> int:
+        """
+        保存已有的游戏引擎，地雷必须已经放置
+
+        Returns:
+            游戏编号
+        """
+        game_id = self.next_id
+        self.next_id += 1
+        self._insert(game_id, StoredGame(engine, seed))
+        return game_id
+
+    def get(self, game_id: int) -> GameEngine:
+        """
+        取得游戏引擎，已换出时从磁盘读回
+
+        返回的引擎在下一次访问存储之前有效：之后它可能被换出，
+        换出后的修改不会保存，需要重新调用 get()。
+
+        Raises:
+            KeyError: 没有这个编号的游戏
+        """
+        stored = self.resident.get(game_id)
+        if stored is not None:
+            self.hits += 1
+            self.resident.move_to_end(game_id)
+            # 游戏进行中标记集合等会变化，重新估计大小
+            nbytes = engine_nbytes(stored.engine)
+            self.nbytes += nbytes - stored.nbytes
+            stored.nbytes = nbytes
+            self._evict()
+            return stored.engine
+
+        if game_id not in self.spilled:
+            raise KeyError(game_id)
+        self.misses += 1
+        path = self._path(game_id)
+        with SaveFile(path) as save_file:
+            stored = StoredGame(save_file.engine(copy=True), save_file.seed)
+        os.remove(path)
+        self.spilled.discard(game_id)
+        self._insert(game_id, stored)
+        return stored.engine
+
+    def seed(self, game_id: int) -> int:
+        """游戏板的随机种子"""
+        self.get(game_id)
+        return self.resident[game_id].seed
+
+    def remove(self, game_id: int):
+        """删除游戏，不存在时忽略"""
+        stored = self.resident.pop(game_id, None)
+        if stored is not None:
+            self.nbytes -= stored.nbytes
+        elif game_id in self.spilled:
+            self.spilled.discard(game_id)
+            os.remove(self._path(game_id))
+
+    def _path(self, game_id: int) -> str:
+        return os.path.join(self.directory, f"{game_id}.sav")
+
+    def _insert(self, game_id: int, stored: StoredGame):
+        self.resident[game_id] = stored
+        self.nbytes += stored.nbytes
+        self._evict()
+
+    def _evict(self):
+        """超过内存上限时把最久未使用的游戏写入磁盘，最近访问的游戏保留在内存中"""
+        while self.nbytes > self.max_bytes and len(self.resident) > 1:
+            game_id, stored = self.resident.popitem(last=False)
+            self.nbytes -= stored.nbytes
+            save_game(self._path(game_id), stored.engine, stored.seed, 0.0).close()
+            self.spilled.add(game_id)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self.resident) + len(self.spilled)
+
+    def __contains__(self, game_id: int) -> bool:
+        return game_id in self.resident or game_id in self.spilled
+
+    def stats(self) -> Dict[str, int]:
+        """命中、未命中、换出次数，以及内存中和磁盘上的游戏数"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'resident': len(self.resident),
+            'resident_bytes': self.nbytes,
+            'spilled': len(self.spilled),
+        }
+
+    def close(self):
+        """丢弃内存中的游戏；使用临时目录时连同换出的游戏一起删除"""
+        self.resident.clear()
+        self.nbytes = 0
+        if self.own_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.spilled.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """主函数: 创建大量游戏并随机访问，输出命中率和用时"""
+    parser = argparse.ArgumentParser(description="有内存上限的游戏存储")
+    parser.add_argument('--games', type=int, default=10000, help="游戏数")
+    parser.add_argument('--rows', type=int, default=16, help="行数")
+    parser.add_argument('--cols', type=int, default=30, help="列数")
+    parser.add_argument('--mines', type=int, default=99, help="地雷数量")
+    parser.add_argument('--max-mb', type=float, default=4.0, help="内存上限(MB)")
+    parser.add_argument('--accesses', type=int, default=100000, help="随机访问次数")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with GameStore(max_bytes=int(args.max_mb * (1 << 20))) as store:
+        start = time.perf_counter()
+        ids = [store.create(args.rows, args.cols, args.mines, rng.randrange(1 << 32))
+               for _ in range(args.games)]
+        created = time.perf_counter() - start
+
+        # 少数游戏被频繁访问: 按 1/(k+1) 的权重选择
+        weights = [1 / (k + 1) for k in range(len(ids))]
+        start = time.perf_counter()
+        for game_id in rng.choices(ids, weights, k=args.accesses):
+            engine = store.get(game_id)
+            if not engine.game_over:
+                engine.reveal(rng.randrange(engine.rows * engine.cols))
+        elapsed = time.perf_counter() - start
+
+        stats = store.stats()
+        print(f"创建 {args.games} 局用时 {created:.2f} 秒, 访问 {args.accesses} 次用时 {elapsed:.2f} 秒")
+        print(f"命中 {stats['hits']}, 未命中 {stats['misses']}, 换出 {stats['evictions']}")
+        print(f"内存中 {stats['resident']} 局 ({stats['resident_bytes'] / (1 << 20):.1f} MB), "
+              f"磁盘上 {stats['spilled']} 局")
+
+
+if __name__ == "__main__":
+    main()
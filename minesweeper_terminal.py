@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+终端增量渲染
+第一帧清屏并完整输出 Minesweeper.render() 的文本，之后只用ANSI光标定位
+重写发生变化的格子和状态行，每帧拼成一个字符串一次写出，不启动子进程
+"""
+
+import shutil
+import sys
+from typing import List, Optional, TextIO
+
+from minesweeper_engine import CELL_HIDDEN, CODE_TO_CHAR, ChangeSet
+
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+
+# render() 中游戏板之前的行数: 两行状态、空行、列号、分隔线
+BOARD_TOP = 5
+# render() 中每个格子占3个字符，字符在中间
+CELL_WIDTH = 3
+# 游戏板下方留给输入提示和错误信息的行数
+PROMPT_LINES = 4
+
+
+def move_to(line: int, column: int) -> str:
+    """移动光标到第line行第column列 (从0开始)"""
+    return f"\x1b[{line + 1};{column + 1}H"
+
+
+def cell_char(code: int) -> str:
+    """可见状态编码对应的显示字符，未揭开的格子显示为'?'"""
+    return '?' if code == CELL_HIDDEN else CODE_TO_CHAR[code]
+
+
+class TerminalRenderer:
+    def __init__(self, game, out: Optional[TextIO] = None, height: Optional[int] = None):
+        """
+        创建终端渲染器
+
+        Args:
+            game: Minesweeper 实例，需要提供 render()、render_header() 和 visible_codes()
+            out: 输出流，默认为标准输出
+            height: 终端行数，None表示每帧从终端获取
+        """
+        self.game = game
+        self.out = out if out is not None else sys.stdout
+        self.height = height
+        # 上一帧的可见状态编码和状态行，codes为None表示下一帧需要完整重绘
+        self.codes: Optional[bytearray] = None
+        self.header: List[str] = []
+        # 每行游戏板中第一个格子字符所在的列
+        self.row_offsets: List[int] = []
+        self.bytes_written = 0
+
+    def reset(self):
+        """下一帧完整重绘，例如终端被其他输出打乱之后"""
+        self.codes = None
+
+    def frame(self, changes: Optional[ChangeSet] = None) -> str:
+        """
+        生成一帧的终端输出
+
+        Args:
+            changes: 自上一帧以来的变化集合，None表示与上一帧的可见状态逐格比较
+
+        Returns:
+            第一帧为清屏加完整文本，之后为光标定位加变化的格子，
+            最后光标停在游戏板下方并清除其后的旧输出
+        """
+        game = self.game
+
+        if self.codes is None or not self._fits():
+            text = game.render()
+            self.codes = game.visible_codes()
+            self.header = game.render_header()
+            lines = text.split("\n")
+            self.row_offsets = [line.index('|') + 2 for line in lines[BOARD_TOP:BOARD_TOP + game.rows]]
+            return CLEAR_SCREEN + text + "\n"
+
+        if changes is None:
+            current = game.visible_codes()
+            old = self.codes
+            changes = [(i, code) for i, code in enumerate(current) if old[i] != code]
+
+        parts = []
+        # 状态行 (剩余地雷数、游戏状态) 变化时整行重写
+        header = game.render_header()
+        for i, line in enumerate(header):
+            if line != self.header[i]:
+                parts.append(move_to(i, 0) + line + CLEAR_LINE)
+        self.header = header
+
+        codes = self.codes
+        offsets = self.row_offsets
+        cols = game.cols
+        for index, code in changes:
+            if codes[index] == code:
+                continue
+            codes[index] = code
+            row, col = divmod(index, cols)
+            parts.append(move_to(BOARD_TOP + row, offsets[row] + col * CELL_WIDTH) + cell_char(code))
+
+        parts.append(move_to(BOARD_TOP + game.rows + 1, 0) + CLEAR_BELOW)
+        return "".join(parts)
+
+    def _fits(self) -> bool:
+        """整个画面是否能放进终端，放不下时终端会滚动，光标定位不再可靠"""
+        height = self.height
+        if height is None:
+            if not self.out.isatty():
+                return True
+            height = shutil.get_terminal_size().lines
+        return BOARD_TOP + self.game.rows + PROMPT_LINES <= height
+
+    def draw(self, changes: Optional[ChangeSet] = None):
+        """输出一帧"""
+        data = self.frame(changes)
+        self.bytes_written += len(data.encode('utf-8'))
+        self.out.write(data)
+        self.out.flush()
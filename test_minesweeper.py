@@ -3,7 +3,29 @@
 扫雷游戏测试脚本
 """
 
+import asyncio
+import os
+import random
+import tempfile
+import time
+
 from minesweeper import Minesweeper
+from minesweeper_compact import CompactBoard
+from minesweeper_engine import (CELL_HIDDEN, HAS_NUMPY, GameEngine, count_adjacent,
+                                generate_board, neighbour_table)
+from minesweeper_solver import MinesweeperSolver
+from minesweeper_batch import BatchStats, run_chunk
+from minesweeper_replay import GameRecorder, ReplayReader
+from minesweeper_terminal import CLEAR_SCREEN, TerminalRenderer
+from minesweeper_infinite import InfiniteMinesweeper
+from minesweeper_probability import game_probabilities
+from minesweeper_noguess import generate_no_guess
+from minesweeper_pool import BoardPool, clear_first_click
+from minesweeper_server import REPLY_LIMIT, STATE_CHARS, GameServer
+from minesweeper_loadgen import run_load
+from minesweeper_store import GameStore
+import minesweeper_compact
+import minesweeper_metrics
 
 def test_basic_functionality():
     """测试基本功能"""
@@ -43,6 +65,17 @@ def test_flood_fill():
 
     print(f"剩余需要揭开的格子: {game.cells_to_reveal}")
 
+def test_flood_fill_large_board():
+    """测试大游戏板的洪水填充不会超出递归深度"""
+    print("\n\n测试大游戏板洪水填充...")
+
+    game = Minesweeper(300, 300, 0)
+    game.reveal_cell(150, 150)
+
+    print(f"剩余需要揭开的格子: {game.cells_to_reveal}")
+    assert game.cells_to_reveal == 0
+    assert game.game_won
+
 def test_flagging():
     """测试标记功能"""
     print("\n\n测试标记功能...")
@@ -107,10 +140,780 @@ def test_adjacent_mine_counting():
     for row in game.revealed:
         print(row)
 
+def test_board_generation():
+    """测试游戏板生成：地雷计数正确，相同种子结果相同"""
+    print("\n\n测试游戏板生成...")
+
+    game = Minesweeper(20, 30, 120, seed=42)
+    assert sum(row.count(-1) for row in game.board) == 120
+    assert game.board == Minesweeper(20, 30, 120, seed=42).board
+
+    for i in range(game.rows):
+        for j in range(game.cols):
+            if game.board[i][j] == -1:
+                continue
+            count = sum(1 for di in [-1, 0, 1] for dj in [-1, 0, 1]
+                        if 0 <= i + di < game.rows and 0 <= j + dj < game.cols
+                        and game.board[i + di][j + dj] == -1)
+            assert game.board[i][j] == count
+
+    # 避开首次点击位置及其周围8格
+    board = generate_board(8, 8, 55, random.Random(1), avoid=(0, 0))
+    assert all(board[i][j] != -1 for i in range(2) for j in range(2))
+
+    # 满密度放置不会卡住，无法放置时立即报错
+    board = generate_board(8, 8, 64 - 9, random.Random(2), avoid=(4, 4))
+    assert sum(row.count(-1) for row in board) == 55
+    try:
+        generate_board(8, 8, 64 - 8, random.Random(2), avoid=(4, 4))
+        assert False, "地雷数量超过可放置格子数时应报错"
+    except ValueError:
+        pass
+
+    if HAS_NUMPY:
+        board = generate_board(50, 60, 600, random.Random(7), use_numpy=False)
+        assert board == generate_board(50, 60, 600, random.Random(7), use_numpy=True)
+        print("纯Python与NumPy生成结果一致")
+
+    print("游戏板生成正确")
+
+def test_compact_board():
+    """测试紧凑游戏板与嵌套列表游戏板一致"""
+    print("\n\n测试紧凑游戏板...")
+
+    game = Minesweeper(13, 17, 40, seed=5)
+    compact = CompactBoard.generate(13, 17, 40, random.Random(5), use_numpy=False)
+    assert all(compact[i][j] == game.board[i][j]
+               for i in range(game.rows) for j in range(game.cols))
+
+    safe = [(i, j) for i in range(game.rows) for j in range(game.cols)
+            if game.board[i][j] != -1]
+    for i, j in safe[:10]:
+        compact.revealed[i][j] = True
+    compact.flagged[0][0] = True
+    compact.flagged[1][1] = True
+    compact.flagged[1][1] = False
+
+    assert compact.flag_count() == 1
+    assert compact.cells_to_reveal() == game.cells_to_reveal - 10
+
+    # 大游戏板直接在位平面上抽样，计数与按地雷位置重新计算的结果一致
+    saved = minesweeper_compact.DIRECT_SAMPLE_CELLS
+    minesweeper_compact.DIRECT_SAMPLE_CELLS = 0
+    try:
+        sampled = CompactBoard.generate(40, 50, 300, random.Random(1), avoid=(0, 0),
+                                        use_numpy=False)
+        # 除避开的格子外全是地雷时也不会反复碰撞
+        full = CompactBoard.generate(40, 50, 40 * 50 - 4, random.Random(1), avoid=(0, 0),
+                                     use_numpy=False)
+    finally:
+        minesweeper_compact.DIRECT_SAMPLE_CELLS = saved
+    positions = [i for i in range(40 * 50) if sampled.mine.get(i)]
+    assert sampled.mines == len(positions) == 300
+    assert not any(sampled.mine.get(i) for i in (0, 1, 50, 51))
+    expected = count_adjacent(40, 50, positions, use_numpy=False)
+    assert all(sampled[r][c] == expected[r][c] for r in range(40) for c in range(50))
+    assert full.mine.count() == full.mines == 40 * 50 - 4
+    assert not any(full.mine.get(i) for i in (0, 1, 50, 51))
+    print(f"数据占用 {compact.nbytes()} 字节 ({game.rows}x{game.cols})")
+
+def test_solver():
+    """测试求解器只做确定的操作，不会踩雷"""
+    print("\n\n测试求解器...")
+
+    won = 0
+    for seed in range(30):
+        game = Minesweeper(16, 30, 99, seed=seed)
+        zeros = [(i, j) for i in range(game.rows) for j in range(game.cols)
+                 if game.board[i][j] == 0]
+        game.reveal_cell(*zeros[0])
+
+        result = MinesweeperSolver(game).solve()
+        assert not (game.game_over and not game.game_won)
+        assert result.needs_guess == (not game.game_over)
+        won += game.game_won
+
+    print(f"30局高级游戏中无需猜测即获胜: {won}")
+
+def test_batch_stats():
+    """测试批量模拟结果可复现且可合并"""
+    print("\n\n测试批量模拟...")
+
+    first = run_chunk((0, 20, 9, 9, 10, 'solver'))
+    second = run_chunk((20, 20, 9, 9, 10, 'solver'))
+    assert run_chunk((0, 20, 9, 9, 10, 'solver')).wins == first.wins
+
+    total = BatchStats()
+    total.merge(first)
+    total.merge(second)
+    assert total.games == 40
+    assert total.wins == first.wins + second.wins
+    print(total.summary())
+
+def test_replay():
+    """测试录像可以跳转到任意一步"""
+    print("\n\n测试录像...")
+
+    game = Minesweeper(16, 30, 99, seed=3)
+    snapshots = [game.visible_codes()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "game.msr")
+        game.recorder = GameRecorder(path, game, keyframe_interval=7)
+
+        rng = random.Random(3)
+        solver = MinesweeperSolver(game)
+        while not game.game_over:
+            safe, mines = solver.find_moves()
+            if mines:
+                game.toggle_flag(*min(mines))
+            else:
+                hidden = [(i, j) for i in range(game.rows) for j in range(game.cols)
+                          if game.revealed[i][j] == ' ']
+                game.reveal_cell(*(min(safe) if safe else rng.choice(hidden)))
+            snapshots.append(game.visible_codes())
+        game.recorder.close()
+
+        with ReplayReader(path) as replay:
+            assert len(replay) == len(snapshots) - 1
+            assert replay.board == game.board
+            for moves in range(len(snapshots)):
+                assert replay.state_at(moves).visible_codes() == snapshots[moves]
+            print(f"共 {len(replay)} 步，{len(replay.keyframes)} 个关键帧")
+
+def test_change_sets():
+    """测试变化集合：把每次操作返回的变化应用到之前的可见状态，得到之后的可见状态"""
+    print("\n\n测试变化集合...")
+
+    for seed in range(20):
+        game = Minesweeper(9, 9, 10, seed=seed)
+        rng = random.Random(seed)
+        codes = game.visible_codes()
+        actions = 0
+        while not game.game_over:
+            hidden = [(r, c) for r in range(9) for c in range(9) if game.revealed[r][c] in ' F']
+            row, col = rng.choice(hidden)
+            if rng.random() < 0.3:
+                changes = game.flag(row, col)
+            else:
+                changes = game.reveal(row, col)
+            for index, code in changes:
+                codes[index] = code
+            assert codes == game.visible_codes()
+            actions += 1
+        print(f"种子 {seed}: {actions} 次操作, {'胜利' if game.game_won else '踩雷'}")
+
+def test_terminal_renderer():
+    """测试终端渲染：第一帧完整输出，之后只输出变化的格子"""
+    print("\n\n测试终端增量渲染...")
+
+    game = Minesweeper(10, 12, 10, seed=5)
+    renderer = TerminalRenderer(game, height=50)
+
+    first = renderer.frame()
+    assert first == CLEAR_SCREEN + game.render() + "\n"
+
+    # 没有变化时只移动光标并清除旧的输入提示
+    assert renderer.frame() == "\x1b[17;1H\x1b[J"
+
+    # 标记(3, 4): 第4行游戏板在屏幕第9行，格子字符在第 3 + 4 * 3 + 2 = 17 列
+    changes = game.flag(3, 4)
+    frame = renderer.frame(changes)
+    assert "\x1b[9;17HF" in frame
+    assert "剩余地雷: 9" in frame
+    assert renderer.frame(game.flag(3, 4)).count("H") == 3
+
+    # 不传变化集合时逐格比较，结果相同
+    game.flag(3, 4)
+    assert renderer.frame() == frame
+    print(f"第一帧 {len(first)} 字符，标记一个格子 {len(frame)} 字符")
+
+def test_infinite_board():
+    """测试无限游戏板：地雷分布可复现，冷区块写入磁盘后读回的状态不变"""
+    print("\n\n测试无限游戏板...")
+
+    with InfiniteMinesweeper(seed=7, chunk_size=16, max_chunks=3) as small, \
+            InfiniteMinesweeper(seed=7, chunk_size=16) as large:
+        assert small.reveal_cell(0, 0) and large.reveal_cell(0, 0)
+
+        rng = random.Random(7)
+        for _ in range(100):
+            row, col = rng.randrange(-100, 100), rng.randrange(-100, 100)
+            if large.is_mine(row, col):
+                small.toggle_flag(row, col)
+                large.toggle_flag(row, col)
+            else:
+                small.reveal_cell(row, col)
+                large.reveal_cell(row, col)
+
+        assert len(small.chunks) == 3 and small.chunks_spilled > 0
+        assert small.revealed_count == large.revealed_count
+        assert small.render(-100, -100, 200, 200) == large.render(-100, -100, 200, 200)
+
+        # 跨区块边界的周围地雷数
+        for row in range(-20, 20):
+            for col in range(-20, 20):
+                if not large.is_mine(row, col):
+                    assert large.adjacent(row, col) == sum(
+                        large.is_mine(row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1))
+        print(f"揭开 {large.revealed_count} 格; 小内存: {small.stats()}")
+
+    # 洪水填充达到上限时不超过上限，没展开的空格留到下次揭开时继续
+    def unexpanded(game):
+        size = game.chunk_size
+        cells = []
+        for (chunk_row, chunk_col), chunk in list(game.chunks.items()):
+            for index, code in enumerate(chunk.visible):
+                row = chunk_row * size + index // size
+                col = chunk_col * size + index % size
+                if code == 0 and any(game.visible_code(row + dr, col + dc) == CELL_HIDDEN
+                                     for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+                    cells.append((row, col))
+        return cells
+
+    with InfiniteMinesweeper(seed=0, density=0.12, chunk_size=16, flood_limit=100) as limited, \
+            InfiniteMinesweeper(seed=0, density=0.12, chunk_size=16) as full:
+        full.reveal_cell(0, 0)
+        assert full.revealed_count > 300 and not full.frontier
+        steps = 0
+        while steps == 0 or limited.frontier:
+            before = limited.revealed_count
+            limited.reveal_cell(0, 0)
+            assert limited.revealed_count - before <= 100
+            assert sorted(unexpanded(limited)) == sorted(limited.frontier)
+            steps += 1
+        assert steps > 3 and not unexpanded(limited)
+        assert limited.revealed_count == full.revealed_count
+        assert limited.render(-40, -40, 80, 80) == full.render(-40, -40, 80, 80)
+
+def test_mine_index():
+    """测试地雷索引：踩雷后的显示与逐格扫描的结果相同"""
+    print("\n\n测试地雷索引...")
+
+    game = Minesweeper(30, 40, 200, seed=11)
+    assert len(game.mine_positions) == 200
+    assert all(game.board[i // 40][i % 40] == -1 for i in game.mine_positions)
+
+    mines = [(i, j) for i in range(30) for j in range(40) if game.board[i][j] == -1]
+    safe = [(i, j) for i in range(30) for j in range(40) if game.board[i][j] != -1]
+    for cell in mines[:5] + safe[:5]:
+        game.toggle_flag(*cell)
+    game.toggle_flag(*mines[0])  # 取消一个标记
+    assert len(game.flags) == game.flagged_mines == 9
+
+    assert not game.reveal_cell(*mines[-1])
+    for i, j in mines:
+        assert game.revealed[i][j] == ('F' if (i, j) in mines[1:5] else '*')
+    for i, j in safe:
+        assert game.revealed[i][j] == ('X' if (i, j) in safe[:5] else ' ')
+    print("地雷和错误标记显示正确")
+
+def test_chord():
+    """测试双击展开：周围标记数等于数字时揭开其余格子"""
+    print("\n\n测试双击展开...")
+
+    board = [[1, -1, 1, 0],
+             [1, 1, 1, 0],
+             [0, 0, 0, 0],
+             [0, 0, 0, 0]]
+    game = Minesweeper.from_board(board)
+    game.reveal_cell(0, 0)
+
+    # 没有标记时条件不满足
+    assert game.chord(0, 0) == []
+    game.toggle_flag(0, 1)
+    assert game.flag_counts[0] == 1 and game.flag_counts[2] == 1
+
+    assert game.chord(0, 0) == [(4, 1), (5, 1)]
+    assert not game.game_over
+
+    # 错误的标记会导致踩雷
+    game = Minesweeper.from_board([row[:] for row in board])
+    game.reveal_cell(1, 0)
+    game.toggle_flag(2, 0)
+    game.toggle_flag(2, 1)
+    game.toggle_flag(2, 1)
+    assert game.flag_counts[1 * 4 + 0] == 1
+    game.chord(1, 0)
+    assert game.game_over and not game.game_won
+    assert game.revealed[2][0] == 'X'
+    print("双击展开正确")
+
+def test_game_engine():
+    """测试命令行版本和GUI版本共用的游戏引擎"""
+    print("\n\n测试共用游戏引擎...")
+
+    engine = GameEngine(20, 30, 60)
+    board = engine.place_mines(random.Random(3), avoid=(10, 15))
+    assert engine.board_rows() == board
+    assert neighbour_table(20, 30) is engine.neighbours
+
+    # 相邻表与逐格边界检查的结果一致
+    for index in (0, 29, 31, 599):
+        row, col = divmod(index, 30)
+        expected = [r * 30 + c for r in range(max(row - 1, 0), min(row + 2, 20))
+                    for c in range(max(col - 1, 0), min(col + 2, 30)) if (r, c) != (row, col)]
+        assert list(engine.neighbours.of(index)) == expected
+
+    # 与命令行版本使用同一套规则，结果完全相同
+    game = Minesweeper.from_board([row[:] for row in board])
+    changes = engine.reveal(10 * 30 + 15)
+    assert changes == game.reveal(10, 15)
+    assert engine.visible == game.visible_codes()
+    assert engine.cells_to_reveal == game.cells_to_reveal
+
+    # 加载可见状态后计数一致
+    copy = GameEngine(20, 30, 60)
+    copy.set_board(board, engine.mine_positions)
+    copy.load_visible(engine.visible)
+    assert copy.cells_to_reveal == engine.cells_to_reveal
+    print(f"共用游戏引擎正确，首次点击揭开 {len(changes)} 格")
+
+def test_mine_probabilities():
+    """测试地雷概率与穷举所有布局的结果一致"""
+    print("\n\n测试地雷概率...")
+
+    from itertools import combinations
+    from minesweeper_engine import CELL_HIDDEN
+
+    checked = 0
+    for seed in range(20):
+        game = Minesweeper(5, 5, 5, seed=seed)
+        rng = random.Random(seed)
+        for _ in range(3):
+            row, col = rng.randrange(5), rng.randrange(5)
+            if game.board[row][col] != -1:
+                game.reveal_cell(row, col)
+        if game.game_over:
+            continue
+
+        # 穷举所有地雷布局
+        visible = game.visible_codes()
+        hidden = [i for i, code in enumerate(visible) if code == CELL_HIDDEN]
+        table = neighbour_table(5, 5)
+        mine_counts = dict.fromkeys(hidden, 0)
+        total = 0
+        for mines in combinations(hidden, 5):
+            mines = set(mines)
+            if all(sum(n in mines for n in table.of(i)) == code
+                   for i, code in enumerate(visible) if code <= 8):
+                total += 1
+                for i in mines:
+                    mine_counts[i] += 1
+
+        probabilities = game_probabilities(game)
+        assert probabilities.keys() == mine_counts.keys()
+        for i, count in mine_counts.items():
+            assert abs(probabilities[i] - count / total) < 1e-9
+        checked += 1
+
+    # 开局时每个格子的概率都是地雷密度
+    game = Minesweeper(16, 30, 99, seed=1)
+    probabilities = game_probabilities(game)
+    assert all(abs(p - 99 / 480) < 1e-9 for p in probabilities.values())
+    print(f"地雷概率正确，检查了 {checked} 个局面")
+
+def test_no_guess():
+    """测试无猜游戏板只靠推理就能完成"""
+    print("\n\n测试无猜游戏板...")
+
+    for seed in range(5):
+        result = generate_no_guess(16, 30, 99, (8, 15), random.Random(seed))
+        assert len(result.positions) == 99 and result.attempts >= 1
+        assert all(result.board[r][c] != -1 for r in range(7, 10) for c in range(14, 17))
+
+        game = Minesweeper.from_board(result.board)
+        game.reveal_cell(8, 15)
+        MinesweeperSolver(game).solve()
+        assert game.game_won
+        print(f"种子 {seed}: 尝试 {result.attempts} 块, 修补 {result.repairs} 次, "
+              f"用时 {result.elapsed * 1000:.1f} ms")
+
+    # 命令行版本从中心格子开始
+    game = Minesweeper(9, 9, 10, seed=1, no_guess=True)
+    assert game.revealed[4][4] == '0'
+    MinesweeperSolver(game).solve()
+    assert game.game_won
+    print("无猜游戏板正确")
+
+def test_board_pool():
+    """测试后台预先生成的游戏板池"""
+    print("\n\n测试游戏板池...")
+
+    key = (16, 30, 99, False)
+    with BoardPool(size=2, seed=1) as pool:
+        pool.prepare(key)
+        deadline = time.perf_counter() + 5
+        while pool.stats()['ready'] < 2 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+        pooled = pool.take(key)
+        stats = pool.stats()
+        assert stats['hits'] == 1 and stats['misses'] == 0 and stats['refills'] >= 2
+        assert pooled.start is None and len(pooled.positions) == 99
+        # 开口索引在后台线程构建
+        assert pooled.openings is not None
+
+        # 还没准备好的难度 try_take 不在调用者的线程上生成，后台线程随后备好
+        no_guess = (9, 9, 10, True)
+        assert pool.try_take(no_guess) is None
+        deadline = time.perf_counter() + 5
+        board = None
+        while board is None and time.perf_counter() < deadline:
+            time.sleep(0.01)
+            board = pool.try_take(no_guess)
+        assert board is not None and board.start is not None
+        assert pool.stats()['misses'] == 0
+
+    # 池已关闭，后台不再生成，没有准备过的难度只能当场生成，不构建开口索引
+    assert pool.take((9, 9, 10, False)).openings is None
+    assert pool.stats()['misses'] == 1
+
+    # 第一次点击处周围的地雷被移走，计数与重新计算的结果一致
+    engine = GameEngine(16, 30, 99)
+    engine.set_board(pooled.board, list(pooled.positions), pooled.openings)
+    clear_first_click(engine, 0, 0, random.Random(1))
+    assert all(engine.values[i] != -1 for i in (0, 1, 30, 31))
+    assert len(engine.mine_positions) == 99
+    assert engine.board_rows() == count_adjacent(16, 30, engine.mine_positions)
+    print(f"游戏板池正确，平均补充延迟 {stats['refill_avg_ms']:.1f} ms")
+
+def test_undo_redo():
+    """测试撤销和重做只写回变化的格子，计数随之恢复"""
+    print("\n\n测试撤销和重做...")
+
+    game = Minesweeper(16, 30, 99, seed=5)
+    game.enable_undo()
+    initial = game.visible_codes()
+    cells = game.cells_to_reveal
+
+    # 揭开一片空白区域，再标记一个地雷
+    zero = next(i for i, value in enumerate(game.engine.values) if value == 0)
+    opened = game.reveal(*divmod(zero, game.cols))
+    assert len(opened) > 1
+    mine = next(iter(game.mine_positions))
+    game.flag(*divmod(mine, game.cols))
+    after = game.visible_codes()
+
+    assert game.undo() == [(mine, 9)]
+    assert game.flags == set() and not any(game.flag_counts)
+    game.undo()
+    assert game.visible_codes() == initial and game.cells_to_reveal == cells
+    assert all(ch == ' ' for row in game.revealed for ch in row)
+    assert game.undo() == []
+
+    game.redo()
+    game.redo()
+    assert game.visible_codes() == after and game.flags == {mine}
+    assert game.cells_to_reveal == cells - len(opened)
+
+    # 新的操作使重做记录失效
+    game.undo()
+    game.flag(*divmod(mine, game.cols))
+    assert game.redo() == [] and game.visible_codes() == after
+
+    # 超过内存上限时最旧的记录合并成检查点，反复标记和取消的格子在检查点中抵消
+    game = Minesweeper(16, 30, 99, seed=5)
+    game.enable_undo(max_bytes=60)
+    for _ in range(20):
+        game.flag(*divmod(mine, game.cols))
+        game.flag(*divmod(mine, game.cols))
+    history = game.history
+    assert history.nbytes <= 60 and history.undo_stack[0].moves > 1
+    # 检查点本身过大时丢弃，更早的操作不能再撤销
+    for index in list(game.mine_positions)[:40]:
+        game.flag(*divmod(index, game.cols))
+    assert history.nbytes <= 60
+    while history.can_undo():
+        game.undo()
+        assert game.flags == {i for i, code in enumerate(game.visible_codes()) if code == 10}
+
+    # 录像中的撤销和重做可以跳转
+    game = Minesweeper(16, 30, 99, seed=5)
+    game.enable_undo()
+    snapshots = [game.visible_codes()]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "game.msr")
+        game.recorder = GameRecorder(path, game, keyframe_interval=100)
+        steps = [lambda: game.reveal(*divmod(zero, game.cols)),
+                 lambda: game.flag(*divmod(mine, game.cols)),
+                 game.undo, game.undo, game.redo,
+                 lambda: game.flag(*divmod(mine, game.cols))]
+        for step in steps:
+            step()
+            snapshots.append(game.visible_codes())
+        game.recorder.close()
+
+        with ReplayReader(path) as replay:
+            assert len(replay) == len(steps)
+            for moves in range(len(snapshots)):
+                assert replay.state_at(moves).visible_codes() == snapshots[moves]
+    print(f"撤销和重做正确，空白区域 {len(opened)} 格")
+
+def test_save_load():
+    """测试存档读取后状态一致，之后的保存只写回变化的页"""
+    print("\n\n测试存档...")
+
+    game = Minesweeper(200, 200, 6000, seed=2)
+    zero = next(i for i, value in enumerate(game.engine.values) if value == 0)
+    game.reveal(*divmod(zero, game.cols))
+    mine = next(iter(game.mine_positions))
+    game.flag(*divmod(mine, game.cols))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "game.sav")
+        # 第一次完整写入，200x200 的可见状态共10页
+        assert game.save(path) == 10
+
+        loaded = Minesweeper.load(path)
+        assert loaded._revealed is None and loaded.revealed == game.revealed
+        assert loaded.seed == game.seed and loaded.mines == game.mines
+        assert loaded.visible_codes() == game.visible_codes()
+        assert loaded.board == game.board
+        assert loaded.flags == game.flags and loaded.flag_counts == game.flag_counts
+        assert loaded.cells_to_reveal == game.cells_to_reveal
+
+        # 继续游戏后增量保存，只写回标记和揭开的格子所在的页 (共10页)
+        loaded.flag(*divmod(mine, game.cols))
+        last = max(i for i, value in enumerate(game.engine.values)
+                   if value > 0 and loaded.engine.visible[i] == 9)
+        loaded.reveal(*divmod(last, game.cols))
+        assert loaded.save(path) <= 2
+
+        resumed = Minesweeper.load(path)
+        assert resumed.visible_codes() == loaded.visible_codes()
+        assert resumed.flags == set() and not any(resumed.flag_counts)
+        assert resumed.cells_to_reveal == loaded.cells_to_reveal
+        loaded.save_file.close()
+        resumed.save_file.close()
+
+        # 过短、截断或不是存档的文件都报 ValueError
+        bad = os.path.join(tmp, "bad.sav")
+        with open(path, 'rb') as f:
+            data = f.read()
+        for content in (b'', b'hello', data[:len(data) // 2], b'x' * len(data)):
+            with open(bad, 'wb') as f:
+                f.write(content)
+            try:
+                Minesweeper.load(bad)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"{len(content)} 字节的文件不应读取成功")
+    print(f"存档正确，共 {loaded.save_file.pages_written} 页增量写回")
+
+def test_game_server():
+    """测试游戏服务器的协议，并用负载测试客户端跑一小段时间"""
+    print("\n\n测试游戏服务器...")
+
+    local = Minesweeper(60, 60, 300, seed=4)
+    zero = next(i for i, value in enumerate(local.engine.values) if value == 0)
+    mine = next(iter(local.mine_positions))
+
+    async def session():
+        server = GameServer(offload_cells=1000)
+        port = await server.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=REPLY_LIMIT)
+
+        async def request(line):
+            writer.write(line.encode('utf-8') + b'\n')
+            await writer.drain()
+            return (await reader.readline()).decode('utf-8').split()
+
+        assert (await request("reveal 0 0"))[0] == 'err'
+        assert await request("new 60 60 300 4") == ['ok', '4']
+
+        # 空白格子的展开交给线程池，结果与本地游戏相同
+        reply = await request(f"reveal {zero // 60} {zero % 60}")
+        changes = local.reveal(*divmod(zero, 60))
+        assert reply[:3] == ['ok', 'playing', str(len(changes))]
+        assert reply[3:] == [f"{index}:{code}" for index, code in changes]
+        assert server.stats()['offloaded'] == 2  # new 和展开
+
+        reply = await request(f"flag {mine // 60} {mine % 60}")
+        assert reply == ['ok', 'playing', '1', f"{mine}:10"]
+        local.flag(*divmod(mine, 60))
+        # 不能标记时回复错误，而不是空的变化集合
+        assert (await request(f"flag {zero // 60} {zero % 60}"))[0] == 'err'
+
+        reply = await request("state")
+        assert reply[:4] == ['ok', 'playing', '60', '60']
+        assert reply[4] == "".join(STATE_CHARS[code] for code in local.engine.visible)
+        assert (await request("reveal 60 0"))[0] == 'err'
+        assert (await request("jump"))[0] == 'err'
+        assert (await request(f"new 1000 {server.max_cells // 1000 + 1} 10"))[0] == 'err'
+
+        writer.write(b'quit\n')
+        writer.close()
+        await server.close()
+
+    asyncio.run(session())
+
+    stats = asyncio.run(run_load(None, None, clients=5, duration=0.5, rows=9, cols=9, mines=10))
+    assert stats['moves'] > 0 and stats['games'] >= 5
+    assert stats['p50_ms'] <= stats['p99_ms'] <= stats['max_ms']
+    print(f"服务器协议正确，负载测试 {stats['moves_per_sec']:.0f} 步/秒, "
+          f"p99 {stats['p99_ms']:.2f} ms")
+
+def test_game_store():
+    """测试游戏存储在内存上限内换出最久未使用的游戏，读回后状态不变"""
+    print("\n\n测试游戏存储...")
+
+    with GameStore(max_bytes=40000) as store:
+        ids = [store.create(16, 30, 99, seed) for seed in range(20)]
+        snapshots = {}
+        for game_id in ids:
+            engine = store.get(game_id)
+            engine.reveal(next(i for i, value in enumerate(engine.values) if value > 0))
+            engine.flag(engine.mine_positions[0])
+            snapshots[game_id] = (bytes(engine.visible), set(engine.flags), engine.cells_to_reveal)
+
+        stats = store.stats()
+        assert stats['evictions'] > 0 and stats['spilled'] > 0
+        assert stats['resident_bytes'] <= 40000 and len(store) == 20
+
+        # 换出的游戏读回后与换出前相同
+        misses = stats['misses']
+        engine = store.get(ids[0])
+        assert store.stats()['misses'] == misses + 1
+        assert (bytes(engine.visible), engine.flags, engine.cells_to_reveal) == snapshots[ids[0]]
+        assert bytes(engine.flag_counts) == bytes(
+            sum(1 for n in engine.neighbours.of(i) if n in engine.flags) for i in range(480))
+        hits = store.stats()['hits']
+        assert store.seed(ids[0]) == 0
+        store.get(ids[0])
+        assert store.stats()['hits'] == hits + 2  # seed() 也是一次访问
+
+        store.remove(ids[1])
+        assert ids[1] not in store and len(store) == 19
+        try:
+            store.get(ids[1])
+            assert False, "删除的游戏不应存在"
+        except KeyError:
+            pass
+    print(f"游戏存储正确，换出 {stats['evictions']} 次")
+
+def test_metrics():
+    """测试计时只在启用时生效，快照中的次数和格子数正确"""
+    print("\n\n测试热点路径计数...")
+
+    original = GameEngine.reveal
+    minesweeper_metrics.reset()
+    Minesweeper(16, 30, 99, seed=6)
+    assert minesweeper_metrics.snapshot()['init_board']['calls'] == 0
+
+    minesweeper_metrics.enable()
+    try:
+        assert GameEngine.reveal is not original
+        game = Minesweeper(16, 30, 99, seed=6)
+        zero = next(i for i, value in enumerate(game.engine.values) if value == 0)
+        opened = game.reveal(*divmod(zero, game.cols))
+        game.flag(*divmod(game.mine_positions[0], game.cols))
+        game.flag(*divmod(game.mine_positions[0], game.cols))
+        game.reveal(*divmod(game.mine_positions[1], game.cols))
+    finally:
+        minesweeper_metrics.disable()
+    assert GameEngine.reveal is original
+
+    stats = minesweeper_metrics.snapshot()
+    assert stats['init_board']['calls'] == 1 and stats['place_mines']['calls'] == 1
+    assert stats['reveal_cell']['calls'] == 2
+    assert stats['flood_fill']['calls'] == 1 and stats['flood_fill']['cells'] == len(opened) - 1
+    # 外层不重复计算内层的格子: 揭开空格和踩雷各只计自身一格
+    assert stats['reveal_cell']['cells'] == 2
+    assert stats['toggle_flag']['calls'] == 2
+    assert stats['reveal_all_mines']['calls'] == 1 and stats['reveal_all_mines']['cells'] == 98
+    assert stats['reveal_cell']['peak_ms'] <= stats['reveal_cell']['total_ms']
+    print(minesweeper_metrics.report())
+
+    minesweeper_metrics.reset()
+    assert minesweeper_metrics.snapshot()['reveal_cell']['calls'] == 0
+
+def test_opening_index():
+    """测试开口索引: 批量揭开与逐格展开结果相同，标记挡住展开或移动地雷后改用逐格展开"""
+    print("\n\n测试开口索引...")
+
+    engine = GameEngine(16, 30, 60)
+    board = engine.place_mines(random.Random(8))
+    # 生成游戏板时不构建索引
+    assert engine.openings is None
+    openings = engine.index_openings()
+    assert openings.count > 1
+
+    # 每个空格恰好属于一个开口，开口的边界都是数字格子
+    zeros = [i for i, value in enumerate(engine.values) if value == 0]
+    assert sorted(i for k in range(openings.count) for i in openings.of(k)
+                  if engine.values[i] == 0) == zeros
+    assert all(engine.values[i] > 0 for k in range(openings.count) for i in openings.of(k)
+               if openings.region[i] == -1)
+    assert sum(openings.sizes()) == len(openings.cells)
+
+    def compare(setup):
+        """分别用开口索引和逐格展开揭开每个开口，结果应该相同"""
+        for k in range(openings.count):
+            bulk = GameEngine(16, 30, 60)
+            bulk.set_board(board, list(engine.mine_positions))
+            bulk.index_openings()
+            slow = GameEngine(16, 30, 60)
+            slow.set_board(board, list(engine.mine_positions))
+            for game in (bulk, slow):
+                setup(game, k)
+            start = openings.of(k)[0]
+            changes = bulk.reveal(start)
+            slow.visible[start] = 0
+            slow.cells_to_reveal -= 1
+            assert sorted(changes[1:]) == sorted(slow.expand(start))
+            assert bulk.visible == slow.visible and bulk.cells_to_reveal == slow.cells_to_reveal
+
+    def flag_last_zero(game: GameEngine, k: int):
+        """标记开口中最后一个空格，标记会挡住展开"""
+        zeros = [i for i in openings.of(k) if engine.values[i] == 0]
+        if len(zeros) > 1:
+            game.flag(zeros[-1])
+
+    compare(lambda game, k: None)
+    compare(flag_last_zero)
+
+    # 移动地雷只让两处周围的开口失效，其余开口继续批量揭开，结果与逐格展开相同
+    engine.move_mine(engine.mine_positions[0], zeros[0])
+    assert engine.openings is openings and openings.dropped
+    assert openings.region[zeros[0]] == -1
+    slow = GameEngine(16, 30, 60)
+    slow.set_board(engine.board_rows(), list(engine.mine_positions))
+    for i in zeros[1:]:
+        engine.reveal(i)
+        slow.reveal(i)
+        assert engine.visible == slow.visible
+    assert engine.cells_to_reveal == slow.cells_to_reveal
+    # 统计时重新构建完整的索引
+    assert not engine.index_openings().dropped
+    print(f"开口 {openings.count} 个，最大 {max(openings.sizes())} 格")
+
 if __name__ == "__main__":
     test_basic_functionality()
     test_flood_fill()
+    test_flood_fill_large_board()
     test_flagging()
     test_adjacent_mine_counting()
+    test_board_generation()
+    test_compact_board()
+    test_solver()
+    test_batch_stats()
+    test_replay()
+    test_change_sets()
+    test_terminal_renderer()
+    test_infinite_board()
+    test_mine_index()
+    test_chord()
+    test_game_engine()
+    test_mine_probabilities()
+    test_no_guess()
+    test_board_pool()
+    test_undo_redo()
+    test_save_load()
+    test_game_server()
+    test_game_store()
+    test_metrics()
+    test_opening_index()
 
     print("\n\n所有测试完成!")
\ No newline at end of file